@@ -1,10 +1,8 @@
 import streamlit as st
 import yaml
 import os
-from kedro_datasets.pandas import ExcelDataset
 import pandas as pd
 import sys
-import subprocess
 
 # Get the original directory and cache
 BASE_FOLDER = "center-scheduling"
@@ -15,6 +13,16 @@ def _get_original_dir():
     return cwd
 ORIGINAL_WD = _get_original_dir()
 NEEDED_WD = os.path.join(ORIGINAL_WD, BASE_FOLDER) if BASE_FOLDER in os.listdir(ORIGINAL_WD) else ORIGINAL_WD
+
+sys.path.append("center-scheduling")
+sys.path.append(os.path.join(NEEDED_WD, "src"))
+from center_scheduling.datasets import DEFAULT_CACHE_DIR, WorkbookDataset
+
+def _workbook(fpath):
+    """
+    All sheets of a workbook, cleaned, from the cache the pipeline also reads.
+    """
+    return WorkbookDataset(fpath, cache_dir=os.path.join(NEEDED_WD, DEFAULT_CACHE_DIR)).load()
 def _get_catalog(env):
     cat_path = os.path.join(NEEDED_WD,"conf", env, "catalog.yml")
     with open(cat_path, "r") as f:
@@ -26,53 +34,38 @@ def _get_original_catalog():
 def _get_local_catalog():
     return _get_catalog("local")
 @st.cache_data
+def _get_params():
+    with open(os.path.join(NEEDED_WD, "conf", "base", "parameters.yml"), "r") as f:
+        return yaml.safe_load(f)
+@st.cache_data
 def _get_example_data(catalog):
-    example_data = {}
-    for key in catalog:
-        fpath = os.path.join(NEEDED_WD, catalog[key]["filepath"])
-        if "01_raw" in fpath:
-            sheet_name = catalog[key]["load_args"]["sheet_name"]
-            example_data[sheet_name] = pd.read_excel(fpath, 
-                                                    sheet_name=sheet_name)
-    return example_data
+    return _workbook(os.path.join(NEEDED_WD, catalog["center_hours"]["filepath"]))
 
 ORIGINAL_CATALOG = _get_original_catalog()
 LOCAL_CATALOG = _get_local_catalog()
 example_data = _get_example_data(ORIGINAL_CATALOG)
 
-sys.path.append("center-scheduling")
-
 st.title("Center Scheduling")
 st.write("This is a web app to schedule staff for a center.")
 
-process = None
 with st.container(border=True):
     st.markdown("# Setup")
     st.write("Upload the center data to get started.")
     uploaded_file = st.file_uploader("Upload the center data", type="xlsx")
     new_data = {}
 
-    # If the user uploads a file, read it and save it to the local catalog
+    # If the user uploads a file, save it as the local (not base) catalog's
+    # workbook, then parse it once; the pipeline run reads the same cache
     if uploaded_file is not None:
-        # First, read required tabs
-        multiframe = {}
-
-        for key in KEYS:
-            sheet_name = ORIGINAL_CATALOG[key]["load_args"]["sheet_name"]
-            multiframe[sheet_name] = pd.read_excel(uploaded_file, sheet_name=sheet_name)
-
-        # Then, save the data to the local (not base) catalog
         fpath = os.path.join(NEEDED_WD, LOCAL_CATALOG["center_hours"]["filepath"])
-        dataset = ExcelDataset(filepath=fpath, load_args = {"sheet_name": None})
-        dataset.save(multiframe)
-        st.write("Upload successful")
-
-        for key in LOCAL_CATALOG:
-            fpath = os.path.join(NEEDED_WD, LOCAL_CATALOG[key]["filepath"])
-            if "01_raw" in fpath:
-                sheet_name = LOCAL_CATALOG[key]["load_args"]["sheet_name"]
-                new_data[sheet_name] = pd.read_excel(fpath, 
-                                                    sheet_name=sheet_name)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        with open(fpath, "wb") as f:
+            f.write(uploaded_file.getvalue())
+        try:
+            new_data = _workbook(fpath)
+            st.write("Upload successful")
+        except ValueError as e:
+            st.error(f"Upload failed: {e}")
 
     for k, v in example_data.items():
         with st.expander(f"Example {k}"):
@@ -100,56 +93,159 @@ def _apply_bg_color(elem):
     return_str = f"background-color: {elem}; color: {font_color}"
     return return_str
 
+def _quick_schedule(sheets, params, day):
+    """
+    Heuristic schedule for one day, in-process and without a solver.
+    """
+    from center_scheduling.pipelines.data_science.nodes import (
+        build_day_model, heuristic_schedule, print_solution
+    )
+    params = {**params, "trace_build_memory": False}
+    model = build_day_model(*(sheets[k] for k in KEYS), day, params)
+    model = heuristic_schedule(model, params["reward_for_child_staff_role"])
+    return print_solution(model)
+
+if st.button("Quick schedule"):
+    # A good schedule in under a second per day; Run pipeline for the optimal one
+    sheets = new_data if env_to_run == "local" else example_data
+    params = _get_params()
+    quick_tabs = st.tabs(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
+    for i in range(len(quick_tabs)):
+        with quick_tabs[i]:
+            result = _quick_schedule(sheets, params, params[f"day{i+1}"])
+            st.dataframe(
+                result
+                .drop("Day", axis=1)
+                .set_index("Time Block")
+                .style.applymap(_apply_bg_color)
+            )
+
+time_limit = st.number_input("Solver time limit per day (seconds, 0 for none)",
+                             min_value=0, max_value=3600, value=60)
+
+@st.cache_resource
+def _job_manager():
+    """
+    One pool of solver processes for every session, started once, so a
+    request pays neither uv's nor Kedro's start-up.
+    """
+    from center_scheduling.jobs import JobManager
+    workers = min(_get_params()["parallel"]["workers"], os.cpu_count() or 1)
+    return JobManager(workers=workers)
+
 if st.button("Run pipeline"):
-    os.chdir(NEEDED_WD)
-    command = ["uv", "run", "kedro", "run", f"--env={env_to_run}", "--runner", "ParallelRunner"]
-    with open("test.log", "wb") as f:
-        process = subprocess.Popen(command, stdout=subprocess.PIPE)
-        for c in iter(lambda: process.stdout.read(1), b""):
-            f.write(c)
-    os.chdir(ORIGINAL_WD)
-
-with st.expander("Live log"):
-    for folder in [ORIGINAL_WD, NEEDED_WD]:
-        fname = os.path.join(folder, "test.log")
-        if os.path.exists(fname):
-            with open(fname, "r") as f:
-                for line in f:
-                    st.write(line)
-            break
+    sheets = new_data if env_to_run == "local" else example_data
+    if not sheets:
+        st.error("Upload the center data first")
+    else:
+        params = _get_params()
+        # The workers don't share the app's working directory
+        params = {**params, "cache": {**params["cache"],
+                                      "path": os.path.join(NEEDED_WD, params["cache"]["path"])}}
+        # Seeded with the heuristic schedule, every day has an answer by the limit
+        st.session_state["job_id"] = _job_manager().submit(sheets, params, time_limit or None)
+
+def _current_job():
+    job_id = st.session_state.get("job_id")
+    try:
+        return None if job_id is None else _job_manager().get(job_id)
+    except KeyError:
+        return None
+
+JOB = _current_job()
+POLLING = JOB is not None and not JOB.finished
+
+@st.fragment(run_every=2 if POLLING else None)
+def _show_results():
+    """
+    The current job's progress and each day's schedule as soon as it's done,
+    refreshed every 2 seconds while the job runs.
+    """
+    job = _current_job()
+    if job is None:
+        st.write("No results yet")
+        return
+    progress = job.progress()
+    finished = (~progress.status.isin(["queued", "running"])).sum()
+    st.progress(finished / len(progress), text=f"Job {job.id}: {finished} of {len(progress)} days")
+    st.dataframe(progress.dropna(axis=1, how="all"), hide_index=True)
+    if not job.finished and st.button("Cancel"):
+        job.cancel()
+
+    results = job.results()
+    res_tabs = st.tabs(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
+    for tab, day, status in zip(res_tabs, job.days, progress.status):
+        with tab:
+            if day in results:
+                st.dataframe(
+                    results[day]
+                    .drop("Day", axis=1)
+                    .set_index("Time Block")
+                    .style.applymap(_apply_bg_color)
+                )
+            else:
+                st.write(f"{day} is {status}")
+
+    if job.finished and len(results) == len(job.days):
+        csv = pd.concat(results.values()).to_csv(index=False).encode('utf-8')
+        st.download_button(
+            "Download",
+            csv,
+            "solution.csv",
+            "text/csv",
+            key='download-csv'
+        )
+    if POLLING and job.finished:
+        # Stop polling
+        st.rerun()
 
 with st.container(border=True):
     st.markdown("# Results")
-    if st.button("Refresh results"):
-        res_tabs = st.tabs(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
-        all_results = []
-        for i in range(len(res_tabs)):
-            with res_tabs[i]:
-                try:
-                    result = pd.read_csv(os.path.join(NEEDED_WD, "data", "08_reporting", f"d{i+1}_solution.csv"))
-                    all_results.append(result)
-                    styled = (
-                        result
-                        .drop("Day", axis=1)
-                        .set_index("Time Block")
-                    .style.applymap(_apply_bg_color)
-                )
-                    st.dataframe(styled)
-                except FileNotFoundError:
-                    st.write("No results yet")
-        
+    _show_results()
+
+with st.container(border=True):
+    st.markdown("# What-if")
+    st.write("Load one day, then try absences on it without rerunning the week. "
+             "Each edit re-solves only that day, starting from its last schedule.")
+    whatif_day = st.selectbox("Day", [_get_params()[f"day{i+1}"] for i in range(5)])
+    if st.button("Load day"):
+        from center_scheduling.whatif import WhatIfSession
+        sheets = new_data if env_to_run == "local" else example_data
+        if not sheets:
+            st.error("Upload the center data first")
+        else:
+            params = _get_params()
+            params = {**params, "solver": {**params["solver"], "tee": False,
+                                           "time_limit": time_limit or None}}
+            with st.spinner(f"Scheduling {whatif_day}"):
+                session = WhatIfSession.from_inputs(*(sheets[k] for k in KEYS), whatif_day,
+                                                    params)
+                st.session_state["whatif_schedule"] = session.solve()
+                st.session_state["whatif"] = session
+
+    session = st.session_state.get("whatif")
+    if session is not None:
+        st.write(f"What-if absences for {session.model.DAY} (times as 14:00, Type as "
+                 "in the absences sheet, e.g. pto or leaves early)")
+        edits = st.data_editor(
+            pd.DataFrame({"Name": pd.Series(dtype=str), "Start": pd.Series(dtype=str),
+                          "End": pd.Series(dtype=str), "Type": pd.Series(dtype=str)}),
+            num_rows="dynamic", hide_index=True, key="whatif_edits")
+        apply_col, reset_col = st.columns(2)
         try:
-            results = pd.concat(all_results)
-            csv = results.to_csv(index=False).encode('utf-8')
-
-            if len(all_results) == 5:
-                st.download_button(
-                    "Download",
-                    csv,
-                    "solution.csv",
-                    "text/csv",
-                    key='download-csv'
-                )
-        except FileNotFoundError:
-            st.write("No compiled results yet")
-                
\ No newline at end of file
+            if apply_col.button("Apply absences"):
+                with st.spinner("Re-solving"):
+                    st.session_state["whatif_schedule"] = session.apply(
+                        edits.dropna(subset=["Name", "Type"]).assign(Day=session.model.DAY))
+            if reset_col.button("Reset"):
+                with st.spinner("Re-solving"):
+                    st.session_state["whatif_schedule"] = session.reset()
+        except (ValueError, RuntimeError) as e:
+            st.error(str(e))
+        st.dataframe(
+            st.session_state["whatif_schedule"]
+            .drop("Day", axis=1)
+            .set_index("Time Block")
+            .style.applymap(_apply_bg_color)
+        )
+        st.dataframe(pd.DataFrame(session.history), hide_index=True)
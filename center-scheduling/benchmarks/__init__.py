@@ -0,0 +1,4 @@
+"""Benchmarks for the center scheduling model.
+
+Run from the project root, e.g. ``python -m benchmarks.bench_setup``.
+"""
@@ -0,0 +1,42 @@
+"""Compare solver backends, stage by stage, on each day of a workbook.
+
+    python -m benchmarks.bench_backends [--backends cbc highs] [--workbook ...]
+"""
+
+import argparse
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import solve
+from center_scheduling.pipelines.data_science.nodes.backends import SOLVER_BACKENDS
+
+from .common import SAMPLE_WORKBOOK, build_day, load_center, load_parameters
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+
+def bench_day(center: dict, day: str, params: dict, backend: str) -> dict:
+    model = build_day(center, day, params)
+    model = solve(model, {**params["solver"], "backend": backend, "tee": False})
+    return {"day": day, **model.SOLVER_STATS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workbook", default=SAMPLE_WORKBOOK)
+    parser.add_argument("--days", nargs="+", default=DAYS)
+    parser.add_argument("--backends", nargs="+", default=list(SOLVER_BACKENDS))
+    args = parser.parse_args()
+
+    center = load_center(args.workbook)
+    params = load_parameters()
+    results = pd.DataFrame([
+        bench_day(center, day, params, backend)
+        for day in args.days
+        for backend in args.backends
+    ])
+    print(results.to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
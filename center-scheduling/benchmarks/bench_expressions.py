@@ -0,0 +1,121 @@
+"""Compare building the objective and indicator constraints as flat linear
+expressions against Python ``sum()`` expression trees, including LP write time.
+
+    python -m benchmarks.bench_expressions [--workbook data/01_raw/center_data.xlsx]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from pyomo.environ import Binary, ConcreteModel, ConstraintList, Objective, Var, maximize
+
+from center_scheduling.pipelines.data_science.nodes import (
+    add_child_2_staff_indicator,
+    add_objective,
+    add_one_place_per_time_constraint,
+    add_switch_indicator,
+    add_unavailability_constraints,
+    center_hours_constraints,
+    setup_decision_variables,
+)
+
+from .common import SAMPLE_WORKBOOK, load_center, load_parameters
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+
+def _sum_child_2_staff_indicator(model: ConcreteModel) -> ConcreteModel:
+    model.z_child_2_staff_hrs = Var(model.TIME_BLOCKS, model.INDEX_DF["Child"].unique(),
+                                    within=Binary)
+    model.child_2_staff_constraints = ConstraintList()
+    for (time_block, child), positions in model.INCIDENCE.time_child:
+        n_staff = sum(model.X_LIST[p] for p in positions)
+        model.child_2_staff_constraints.add(
+            expr=n_staff <= model.z_child_2_staff_hrs[time_block, child] + 1)
+    return model
+
+
+def _sum_switch_indicator(model: ConcreteModel) -> ConcreteModel:
+    model.z_switch = Var(model.TIME_BLOCKS, model.INDEX_DF["Staff"].unique(), within=Binary)
+    model.switch_constraints = ConstraintList()
+    x, pairs = model.X_LIST, model.INCIDENCE.switch_pairs
+    for time_block, staff, current, following in zip(pairs["Time Block"], pairs["Staff"],
+                                                     pairs["Current"], pairs["Next"]):
+        z = model.z_switch[time_block, staff]
+        if current < 0 or following < 0:
+            model.switch_constraints.add(expr=x[max(current, following)] <= z)
+            continue
+        mydiff = x[current] - x[following]
+        model.switch_constraints.add(expr=mydiff <= z)
+        model.switch_constraints.add(expr=-1 * mydiff <= z)
+    return model
+
+
+def _sum_objective(model: ConcreteModel, reward_for_child_staff_role: dict) -> ConcreteModel:
+    child_hr_objs = {}
+    for role, reward in reward_for_child_staff_role.items():
+        relevant_staff = model.ROLES.pipe(lambda x: x[x.Role.str.lower() == role.lower()])["Name"]
+        relevant = model.INDEX_DF["Staff"].isin(relevant_staff).to_numpy()
+        if relevant.any():
+            child_hr_objs[role] = sum([v for v, r in zip(model.X_LIST, relevant) if r]) * reward
+    model.objective = Objective(expr=sum(child_hr_objs.values())
+                                - sum(model.z_child_2_staff_hrs.values())
+                                - sum(model.z_switch.values()) * 0.1,
+                                sense=maximize)
+    return model
+
+
+BUILDERS = {
+    "sum": (_sum_child_2_staff_indicator, _sum_switch_indicator, _sum_objective),
+    "linear": (add_child_2_staff_indicator, add_switch_indicator, add_objective),
+}
+
+
+def bench_day(center: dict, day: str, params: dict, builder: str) -> dict:
+    constraint_on_off = params["constraint_on_off"]
+    model = setup_decision_variables(center["center_hours"], center["staff_child"],
+                                     center["absences"], center["roles"], day,
+                                     constraint_on_off, params["prune_variables"])
+    for constraint in [center_hours_constraints, add_one_place_per_time_constraint,
+                       add_unavailability_constraints]:
+        model = constraint(model, constraint_on_off)
+
+    child_2_staff, switch, objective = BUILDERS[builder]
+    start = time.perf_counter()
+    model = objective(switch(child_2_staff(model)), params["reward_for_child_staff_role"])
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        model.write(os.path.join(tmp, "model.lp"))
+        write_s = time.perf_counter() - start
+    return {"day": day, "builder": builder, "build_s": build_s, "lp_write_s": write_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workbook", default=SAMPLE_WORKBOOK)
+    parser.add_argument("--days", nargs="+", default=DAYS)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    center = load_center(args.workbook)
+    params = load_parameters()
+    results = (
+        pd.DataFrame([
+            bench_day(center, day, params, builder)
+            for day in args.days
+            for builder in BUILDERS
+            for _ in range(args.repeats)
+        ])
+        .groupby(["day", "builder"], sort=False, as_index=False)
+        .min()
+    )
+    print(results.to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
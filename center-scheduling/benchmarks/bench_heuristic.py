@@ -0,0 +1,114 @@
+"""Compare the heuristic schedule with the exact solve, day by day.
+
+Reports the heuristic's time and objective, its gap to the solver's
+objective, and the solve time cold and seeded with the heuristic schedule.
+
+    python -m benchmarks.bench_heuristic [--backend cbc] [--days Mon Tue]
+
+With --children and --staff, times the heuristic alone (construction, lunch
+and local search) on synthetic centers instead, without solving. With
+--max-seconds, the command exits non-zero if any day's heuristic took
+longer, so it can gate a change to the heuristic.
+
+    python -m benchmarks.bench_heuristic --children 60 120 --staff 40 80 --max-seconds 10
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+from itertools import product
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import (
+    add_heuristic_start,
+    heuristic_gap,
+    heuristic_schedule,
+    solve,
+)
+
+from .common import SAMPLE_WORKBOOK, build_day, load_center, load_parameters
+from .synthetic import make_center
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+
+def bench_day(center: dict, day: str, params: dict, solver_options: dict) -> dict:
+    stats = {"day": day}
+    for mode, seeded in [("cold", False), ("seeded", True)]:
+        model = build_day(center, day, params)
+        model.WARM_START = None
+        model = add_heuristic_start(model, params["reward_for_child_staff_role"], seeded)
+        if seeded:
+            stats["heuristic_s"] = model.HEURISTIC_STATS["total_s"]
+            stats["heuristic_objective"] = model.HEURISTIC_STATS["objective"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = solve(model, solver_options)
+        stats[f"{mode}_first_feasible_s"] = model.SOLVER_STATS["first_feasible_s"]
+        stats[f"{mode}_solve_s"] = model.SOLVER_STATS["solve_s"]
+        stats[f"{mode}_objective"] = model.SOLVER_STATS["objective"]
+    stats["gap"] = heuristic_gap(stats["heuristic_objective"], stats["cold_objective"])
+    return stats
+
+
+def time_heuristic(n_children: int, n_staff: int, density: float, day: str,
+                   params: dict) -> dict:
+    """
+    Build a synthetic center's day and time its heuristic schedule.
+    """
+    model = build_day(make_center(n_children, n_staff, density, absence_rate=0.1), day, params)
+    model = heuristic_schedule(model, params["reward_for_child_staff_role"])
+    stats = model.HEURISTIC_STATS
+    return {
+        "children": n_children,
+        "staff": n_staff,
+        "density": density,
+        "day": day,
+        "variables": len(model.X_LIST),
+        "construct_s": stats["construct_s"],
+        "improve_s": stats["total_s"] - stats["construct_s"],
+        "total_s": stats["total_s"],
+        "passes": stats["passes"],
+        "objective": stats["objective"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workbook", default=SAMPLE_WORKBOOK)
+    parser.add_argument("--days", nargs="+",
+                        help="Defaults to every day, or Monday for synthetic centers")
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--children", type=int, nargs="+",
+                        help="Time the heuristic on synthetic centers of these sizes")
+    parser.add_argument("--staff", type=int, nargs="+")
+    parser.add_argument("--density", type=float, default=0.2)
+    parser.add_argument("--max-seconds", type=float,
+                        help="Fail if a synthetic day's heuristic takes longer")
+    args = parser.parse_args()
+
+    params = load_parameters()
+    if args.children:
+        results = pd.DataFrame([
+            time_heuristic(c, s, args.density, day, params)
+            for (c, s), day in product(zip(args.children, args.staff), args.days or ["Mon"])
+        ])
+        print(results.to_string(index=False))  # noqa: T201
+        if args.max_seconds is not None and (results["total_s"] > args.max_seconds).any():
+            print(f"Slower than {args.max_seconds}s")  # noqa: T201
+            sys.exit(1)
+        return
+
+    center = load_center(args.workbook)
+    solver_options = {**params["solver"], "tee": False}
+    if args.backend:
+        solver_options["backend"] = args.backend
+    results = pd.DataFrame([
+        bench_day(center, day, params, solver_options) for day in args.days or DAYS
+    ])
+    print(results.to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
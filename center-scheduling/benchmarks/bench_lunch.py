@@ -0,0 +1,88 @@
+"""Compare the lunch formulations with lunch off, day by day.
+
+Reports model size, build and solve time and objective for lunch off and
+each form, and its solve time overhead over lunch off. The forms are the
+window form with lunch starts picked by the heuristic ("heuristic") or by the
+solver ("free"), and the legacy row per staff ("legacy"). "free" is only
+practical with HiGHS, and "legacy" can run for many minutes.
+
+    python -m benchmarks.bench_lunch [--days Mon Tue] [--forms heuristic free legacy]
+                                     [--lunch-minutes 30] [--backend highs]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import solve
+
+from .common import (
+    SAMPLE_WORKBOOK,
+    build_day,
+    load_center,
+    load_parameters,
+    model_size,
+    objective_value,
+)
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+FORMS = ["off", "heuristic"]
+
+
+def bench_day(center: dict, day: str, params: dict, form: str, lunch_minutes: int,
+              solver_options: dict) -> dict:
+    params = {
+        **params,
+        "constraint_on_off": {**params["constraint_on_off"], "lunch": form != "off"},
+        "formulation": {**params.get("formulation", {}),
+                        "lunch": "legacy" if form == "legacy" else "window",
+                        "lunch_starts": "free" if form == "free" else "heuristic",
+                        "lunch_minutes": lunch_minutes},
+    }
+    start = time.perf_counter()
+    model = build_day(center, day, params)
+    build_s = time.perf_counter() - start
+    size = model_size(model)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = solve(model, solver_options)
+    solve_s = time.perf_counter() - start
+    return {
+        "day": day,
+        "lunch": form,
+        **size,
+        "build_s": build_s,
+        "solve_s": solve_s,
+        "objective": objective_value(model),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workbook", default=SAMPLE_WORKBOOK)
+    parser.add_argument("--days", nargs="+", default=DAYS)
+    parser.add_argument("--forms", nargs="+", default=FORMS)
+    parser.add_argument("--lunch-minutes", type=int, default=30)
+    parser.add_argument("--backend", default=None)
+    args = parser.parse_args()
+
+    center = load_center(args.workbook)
+    params = {**load_parameters(), "trace_build_memory": False}
+    solver_options = {**params["solver"], "tee": False}
+    if args.backend:
+        solver_options["backend"] = args.backend
+    results = pd.DataFrame([
+        bench_day(center, day, params, form, args.lunch_minutes, solver_options)
+        for day in args.days
+        for form in ["off", *(f for f in args.forms if f != "off")]
+    ])
+    off = results[results.lunch == "off"].set_index("day").solve_s
+    results["overhead"] = results.solve_s / results.day.map(off)
+    print(results.to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
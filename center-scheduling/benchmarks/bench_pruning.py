@@ -0,0 +1,58 @@
+"""Compare pruning variables at setup against creating then fixing them.
+
+    python -m benchmarks.bench_pruning [--workbook data/01_raw/center_data.xlsx]
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from .common import (
+    SAMPLE_WORKBOOK,
+    build_day,
+    load_center,
+    load_parameters,
+    model_size,
+    objective_value,
+    timed_solve,
+)
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+
+def bench_day(center: dict, day: str, params: dict, prune_variables: bool) -> dict:
+    params = {**params, "prune_variables": prune_variables}
+    start = time.perf_counter()
+    model = build_day(center, day, params)
+    build_s = time.perf_counter() - start
+    size = model_size(model)
+    model, solve_s = timed_solve(model)
+    return {
+        "day": day,
+        "prune_variables": prune_variables,
+        **size,
+        "build_s": build_s,
+        "solve_s": solve_s,
+        "objective": objective_value(model),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workbook", default=SAMPLE_WORKBOOK)
+    parser.add_argument("--days", nargs="+", default=DAYS)
+    args = parser.parse_args()
+
+    center = load_center(args.workbook)
+    params = load_parameters()
+    results = pd.DataFrame([
+        bench_day(center, day, params, prune)
+        for day in args.days
+        for prune in [False, True]
+    ])
+    print(results.to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Run the full day pipeline on synthetic centers of growing size.
+
+Each scale point (children and staff, eligibility density, absence rate) is
+generated with benchmarks.synthetic and scheduled as the data science
+pipeline does: setup, build, solve (write, solve, load) and extract. Every
+point runs in a fresh process, so its peak RSS is its own, and a point that
+takes longer than --timeout is stopped and reported as such.
+
+    python -m benchmarks.bench_scale --children 15 30 60 --staff 10 20 40
+                                     [--density 0.2] [--absence-rate 0 0.1]
+                                     [--days Mon] [--output scale.csv]
+                                     [--baseline scale.csv --tolerance 0.25]
+
+With --baseline, the stage timings are compared with a previous --output,
+point by point, and the command exits non-zero if any got slower by more
+than the tolerance (and a second), so it can gate a performance change.
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import resource
+import sys
+import time
+from itertools import product
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import (
+    add_heuristic_start,
+    build_model,
+    input_sense_checks,
+    print_solution,
+    setup_decision_variables,
+    solution_long,
+    solve,
+)
+
+from .common import load_parameters, model_size
+from .synthetic import make_center
+
+POINT = ["children", "staff", "density", "absence_rate", "day"]
+STAGES = ["setup_s", "build_s", "write_s", "solve_s", "load_s", "extract_s"]
+
+
+def run_point(n_children: int, n_staff: int, density: float, absence_rate: float,
+              day: str, params: dict, solver_options: dict) -> dict:
+    """
+    Schedule one day of one synthetic center in the current process.
+    """
+    center = make_center(n_children, n_staff, density, absence_rate=absence_rate)
+    stats = {}
+
+    start = time.perf_counter()
+    model = setup_decision_variables(center["center_hours"], center["staff_child"],
+                                     center["absences"], center["roles"], day,
+                                     params["constraint_on_off"], params["prune_variables"])
+    model = input_sense_checks(model)
+    stats["setup_s"] = time.perf_counter() - start
+
+    model = build_model(model, params["constraint_on_off"],
+                        params["reward_for_child_staff_role"], False, params["formulation"])
+    stats["build_s"] = model.BUILD_STATS["total_s"]
+    stats.update(model_size(model))
+    model = add_heuristic_start(model, params["reward_for_child_staff_role"],
+                                params["heuristic_start"])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = solve(model, solver_options)
+    stats.update({k: model.SOLVER_STATS[k] for k in ["write_s", "solve_s", "load_s"]})
+    stats["termination"] = model.SOLVER_STATS["termination"]
+    stats["objective"] = model.SOLVER_STATS["objective"]
+
+    start = time.perf_counter()
+    solution_long(model)
+    print_solution(model)
+    stats["extract_s"] = time.perf_counter() - start
+    # kB on Linux
+    stats["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    return stats
+
+
+def bench_point(point: dict, params: dict, solver_options: dict, timeout: float) -> dict:
+    """
+    run_point in a fresh worker process, stopped after timeout seconds.
+    """
+    start = time.perf_counter()
+    with multiprocessing.Pool(1) as pool:
+        result = pool.apply_async(run_point, (*point.values(), params, solver_options))
+        try:
+            stats = {**result.get(timeout), "status": "ok"}
+        except multiprocessing.TimeoutError:
+            stats = {"status": "timeout"}
+    stats["total_s"] = time.perf_counter() - start
+    print(point, stats, file=sys.stderr)  # noqa: T201
+    return {**point, **stats}
+
+
+def regressions(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+    """
+    The (point, stage) timings slower than the baseline by more than tolerance
+    (relative) and a second (absolute), or that no longer finish.
+    """
+    merged = results.merge(baseline, on=POINT, suffixes=("", "_baseline"))
+    rows = []
+    for _, row in merged.iterrows():
+        if row["status"] != "ok" and row["status_baseline"] == "ok":
+            rows.append({**row[POINT], "stage": "status", "baseline": "ok", "now": row["status"]})
+            continue
+        for stage in STAGES:
+            now, before = row.get(stage), row.get(f"{stage}_baseline")
+            if pd.notna(now) and pd.notna(before) and now > max(before * (1 + tolerance), before + 1):
+                rows.append({**row[POINT], "stage": stage, "baseline": before, "now": now})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--children", type=int, nargs="+", default=[15, 30, 60])
+    parser.add_argument("--staff", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--density", type=float, nargs="+", default=[0.2])
+    parser.add_argument("--absence-rate", type=float, nargs="+", default=[0.1])
+    parser.add_argument("--days", nargs="+", default=["Mon"])
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Solver time limit per point, in seconds. Defaults to 80%% "
+                             "of --timeout, so the solver stops before its process is")
+    parser.add_argument("--timeout", type=float, default=600,
+                        help="Seconds before a point's process is stopped")
+    parser.add_argument("--output", help="CSV to write the results to")
+    parser.add_argument("--baseline", help="CSV from a previous --output to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    params = load_parameters()
+    solver_options = {**params["solver"], "tee": False,
+                      "time_limit": args.time_limit or 0.8 * args.timeout}
+    if args.backend:
+        solver_options["backend"] = args.backend
+    points = [
+        dict(zip(POINT, (c, s, d, a, day)))
+        for (c, s), d, a, day in product(zip(args.children, args.staff), args.density,
+                                         args.absence_rate, args.days)
+    ]
+    results = pd.DataFrame([bench_point(p, params, solver_options, args.timeout)
+                            for p in points])
+    print(results.to_string(index=False))  # noqa: T201
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    if args.baseline:
+        slower = regressions(results, pd.read_csv(args.baseline), args.tolerance)
+        if len(slower):
+            print("Slower than the baseline:")  # noqa: T201
+            print(slower.to_string(index=False))  # noqa: T201
+            sys.exit(1)
+        print("No regressions against the baseline")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Time ``setup_decision_variables`` as the roster grows.
+
+    python -m benchmarks.bench_setup --children 15 30 60 --staff 10 20 40
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import setup_decision_variables
+
+from .synthetic import make_center
+
+
+def bench_setup(n_children: int, n_staff: int, density: float, repeats: int) -> dict:
+    center = make_center(n_children, n_staff, density)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model = setup_decision_variables(center["center_hours"], center["staff_child"],
+                                         center["absences"], center["roles"], "Mon")
+        timings.append(time.perf_counter() - start)
+    return {
+        "children": n_children,
+        "staff": n_staff,
+        "variables": len(model.INDEX_DF),
+        "setup_s": min(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--children", type=int, nargs="+", default=[15, 30, 60])
+    parser.add_argument("--staff", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--density", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    results = pd.DataFrame([
+        bench_setup(c, s, args.density, args.repeats)
+        for c, s in zip(args.children, args.staff)
+    ])
+    print(results.to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
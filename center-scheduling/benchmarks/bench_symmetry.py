@@ -0,0 +1,75 @@
+"""Compare solving with and without symmetry breaking between interchangeable staff.
+
+Runs the sample workbook and a synthetic center with many floaters (SBTs and
+TSs, who can work with every child), and reports the groups of
+interchangeable staff, the ordering rows, solve time and objective.
+
+    python -m benchmarks.bench_symmetry [--days Mon Tue] [--floaters 6]
+                                        [--children 20] [--staff 8] [--backend highs]
+"""
+
+import argparse
+import contextlib
+import io
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import solve
+
+from .common import SAMPLE_WORKBOOK, build_day, load_center, load_parameters, objective_value
+from .synthetic import make_center
+
+FORMS = ["none", "order"]
+
+
+def bench_day(center: dict, label: str, day: str, params: dict, form: str,
+              solver_options: dict) -> dict:
+    params = {**params, "formulation": {**params.get("formulation", {}), "symmetry": form}}
+    model = build_day(center, day, params)
+    classes = model.SYMMETRY["classes"] if model.SYMMETRY else []
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = solve(model, solver_options)
+    return {
+        "center": label,
+        "day": day,
+        "symmetry": form,
+        "groups": "/".join(str(len(names)) for names, _ in classes),
+        "rows": len(model.symmetry_constraints) if model.SYMMETRY else 0,
+        "solve_s": model.SOLVER_STATS["solve_s"],
+        "objective": objective_value(model),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workbook", default=SAMPLE_WORKBOOK)
+    parser.add_argument("--days", nargs="+", default=["Mon", "Tue"])
+    parser.add_argument("--floaters", type=int, default=6)
+    parser.add_argument("--children", type=int, default=20)
+    parser.add_argument("--staff", type=int, default=8)
+    parser.add_argument("--backend", default=None)
+    args = parser.parse_args()
+
+    params = {**load_parameters(), "trace_build_memory": False}
+    solver_options = {**params["solver"], "tee": False}
+    if args.backend:
+        solver_options["backend"] = args.backend
+    centers = {
+        "sample": load_center(args.workbook),
+        f"synthetic {args.floaters} floaters": make_center(
+            args.children, args.staff, n_floaters=args.floaters),
+    }
+    results = pd.DataFrame([
+        bench_day(center, label, day, params, form, solver_options)
+        for label, center in centers.items()
+        for day in args.days
+        for form in FORMS
+    ])
+    results["speedup"] = (
+        results.groupby(["center", "day"]).solve_s.transform("first") / results.solve_s
+    )
+    print(results.to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
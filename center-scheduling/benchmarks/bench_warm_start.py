@@ -0,0 +1,62 @@
+"""Compare cold starts with warm starts from a previous schedule, day by day.
+
+Reports time to the first incumbent and total solve time for both, and how
+much the warm start saved.
+
+    python -m benchmarks.bench_warm_start [--previous data/08_reporting/solution.csv]
+                                          [--backend cbc] [--days Mon Tue]
+"""
+
+import argparse
+import contextlib
+import io
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import add_warm_start, solve
+
+from .common import SAMPLE_WORKBOOK, build_day, load_center, load_parameters
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+
+def bench_day(center: dict, day: str, params: dict, previous: pd.DataFrame,
+              solver_options: dict) -> dict:
+    stats = {"day": day}
+    for mode, start in [("cold", None), ("warm", previous)]:
+        model = add_warm_start(build_day(center, day, params), start)
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = solve(model, solver_options)
+        stats[f"{mode}_first_feasible_s"] = model.SOLVER_STATS["first_feasible_s"]
+        stats[f"{mode}_solve_s"] = model.SOLVER_STATS["solve_s"]
+        stats[f"{mode}_objective"] = model.SOLVER_STATS["objective"]
+    stats["used"] = model.WARM_START["used"] if model.WARM_START else 0
+    stats["solve_saved_s"] = stats["cold_solve_s"] - stats["warm_solve_s"]
+    if None not in (stats["cold_first_feasible_s"], stats["warm_first_feasible_s"]):
+        stats["first_feasible_saved_s"] = (stats["cold_first_feasible_s"]
+                                           - stats["warm_first_feasible_s"])
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workbook", default=SAMPLE_WORKBOOK)
+    parser.add_argument("--previous", default="data/08_reporting/solution.csv")
+    parser.add_argument("--days", nargs="+", default=DAYS)
+    parser.add_argument("--backend", default=None)
+    args = parser.parse_args()
+
+    center = load_center(args.workbook)
+    params = load_parameters()
+    previous = pd.read_csv(args.previous)
+    solver_options = {**params["solver"], "tee": False}
+    if args.backend:
+        solver_options["backend"] = args.backend
+    results = pd.DataFrame([
+        bench_day(center, day, params, previous, solver_options) for day in args.days
+    ])
+    print(results.to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
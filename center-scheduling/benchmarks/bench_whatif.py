@@ -0,0 +1,77 @@
+"""Compare a what-if re-solve with rebuilding and solving the day from scratch.
+
+Each scenario marks one staff member out from --after until close. The
+what-if session applies it as bound changes to the persistent HiGHS model;
+the baseline adds the absence to the sheet and rebuilds.
+
+    python -m benchmarks.bench_whatif [--day Mon] [--scenarios 3] [--after 14:00]
+                                      [--time-limit 10]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import solve
+from center_scheduling.whatif import WhatIfSession
+
+from .common import SAMPLE_WORKBOOK, build_day, load_center, load_parameters
+
+
+def pto_after(name: str, day: str, after: str) -> pd.DataFrame:
+    return pd.DataFrame({"Name": [name], "Day": [day], "Start": [after],
+                         "End": [None], "Type": ["pto"]})
+
+
+def full_rebuild(center: dict, day: str, params: dict, absence: pd.DataFrame) -> dict:
+    center = {**center, "absences": pd.concat([center["absences"], absence])}
+    start = time.perf_counter()
+    model = build_day(center, day, params)
+    build_s = time.perf_counter() - start
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = solve(model, {**params["solver"], "backend": "highs", "tee": False})
+    return {"mode": "rebuild", "build_s": build_s,
+            "solve_s": time.perf_counter() - start - build_s,
+            "objective": model.SOLVER_STATS["objective"],
+            "termination": model.SOLVER_STATS["termination"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workbook", default=SAMPLE_WORKBOOK)
+    parser.add_argument("--day", default="Mon")
+    parser.add_argument("--scenarios", type=int, default=3)
+    parser.add_argument("--after", default="14:00")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Seconds allowed for each what-if re-solve")
+    args = parser.parse_args()
+
+    center = load_center(args.workbook)
+    params = load_parameters()
+    params["solver"] = {**params["solver"], "tee": False}
+    session = WhatIfSession.from_inputs(center["center_hours"], center["staff_child"],
+                                        center["absences"], center["roles"], args.day,
+                                        params)
+    session.solve()
+    session.solver.config.time_limit = args.time_limit
+    staff = list(session.model.INDEX_DF["Staff"].cat.categories[:args.scenarios])
+
+    results = []
+    for name in staff:
+        absence = pto_after(name, args.day, args.after)
+        start = time.perf_counter()
+        session.apply(absence)
+        results.append({"staff": name, "mode": "what-if", "build_s": 0.0,
+                        "solve_s": time.perf_counter() - start,
+                        "objective": session.history[-1]["objective"],
+                        "termination": session.history[-1]["termination"]})
+        session.reset()
+        results.append({"staff": name, **full_rebuild(center, args.day, params, absence)})
+    print(pd.DataFrame(results).to_string(index=False))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
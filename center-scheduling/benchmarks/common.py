@@ -0,0 +1,54 @@
+"""Shared helpers for the benchmarks."""
+
+import contextlib
+import io
+import time
+
+import pandas as pd
+import yaml
+from pyomo.environ import ConcreteModel, Var, value
+
+from center_scheduling.pipelines.data_science.nodes import build_day_model, solve
+
+SAMPLE_WORKBOOK = "data/01_raw/center_data.xlsx"
+PARAMETERS = "conf/base/parameters.yml"
+SHEETS = ["center_hours", "staff_child", "absences", "roles"]
+
+
+def load_center(path: str = SAMPLE_WORKBOOK) -> dict[str, pd.DataFrame]:
+    return pd.read_excel(path, sheet_name=SHEETS, engine="openpyxl")
+
+
+def load_parameters(path: str = PARAMETERS) -> dict:
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def build_day(center: dict[str, pd.DataFrame], day: str, params: dict) -> ConcreteModel:
+    """
+    Run the data science pipeline nodes for one day, up to the objective.
+    """
+    return build_day_model(center["center_hours"], center["staff_child"],
+                           center["absences"], center["roles"], day, params)
+
+
+def timed_solve(model: ConcreteModel) -> tuple[ConcreteModel, float]:
+    """
+    Solve quietly, returning the model and the wall-clock solve time.
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = solve(model)
+    return model, time.perf_counter() - start
+
+
+def model_size(model: ConcreteModel) -> dict:
+    return {
+        "x_created": len(model.X),
+        "variables": sum(1 for v in model.component_data_objects(Var) if not v.fixed),
+        "constraints": model.nconstraints(),
+    }
+
+
+def objective_value(model: ConcreteModel) -> float:
+    return value(model.objective)
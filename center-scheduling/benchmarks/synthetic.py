@@ -0,0 +1,80 @@
+"""Synthetic centers in the ``center_data.xlsx`` schema."""
+
+import numpy as np
+import pandas as pd
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+# Child absence types and their [Start, End) times; blank (NaN, as read from
+# Excel) is open or close
+CHILD_ABSENCES = [
+    ("late arrival", np.nan, "10:00"),
+    ("leaves early", "14:30", np.nan),
+    ("speech", "10:30", "11:30"),
+    ("nap", "13:00", "14:00"),
+]
+
+
+def make_center(n_children: int,
+                n_staff: int,
+                density: float = 0.2,
+                seed: int = 0,
+                n_floaters: int = 1,
+                absence_rate: float = 0.0) -> dict[str, pd.DataFrame]:
+    """
+    Generate a random center.
+
+    Args:
+        n_children (int): Number of children.
+        n_staff (int): Number of techs in the staff_child matrix.
+        density (float): Share of (child, tech) pairs that are allowed.
+        seed (int): Random seed.
+        n_floaters (int): Number of SBTs and of TSs, who can work with every child.
+        absence_rate (float): Share of (child, day) pairs with an absence
+            (late arrival, leaving early, speech or nap) and of (tech, day)
+            pairs with a whole day of PTO.
+
+    Returns:
+        dict[str, pd.DataFrame]: One frame per workbook sheet, keyed by
+            sheet name (center_hours, staff_child, absences, roles).
+    """
+    rng = np.random.default_rng(seed)
+    children = [f"child {i}" for i in range(n_children)]
+    staff = [f"Tech {i}" for i in range(n_staff)]
+
+    center_hours = pd.DataFrame({"Day": DAYS, "Open": "8:30", "Close": "16:30"})
+
+    allowed = rng.random((n_children, n_staff)) < density
+    # Every child needs at least one tech
+    allowed[np.arange(n_children), rng.integers(0, n_staff, n_children)] = True
+    staff_child = pd.DataFrame(np.where(allowed, "x", None), columns=staff)
+    staff_child.insert(0, "Child", children)
+
+    absences = _make_absences(rng, children, staff, absence_rate)
+
+    sbts = [f"SBT {i + 1}" for i in range(n_floaters)]
+    tss = [f"TS {i + 1}" for i in range(n_floaters)]
+    roles = pd.DataFrame({
+        "Name": staff + sbts + tss + ["BS", "OM", "SBA 1"],
+        "Role": ["Tech"] * n_staff + ["SBT"] * n_floaters + ["TS"] * n_floaters
+                + ["BS", "OM", "SBA"],
+    })
+    return {
+        "center_hours": center_hours,
+        "staff_child": staff_child,
+        "absences": absences,
+        "roles": roles,
+    }
+
+
+def _make_absences(rng: np.random.Generator, children: list[str], staff: list[str],
+                   absence_rate: float) -> pd.DataFrame:
+    rows = []
+    for day in DAYS:
+        for child in np.array(children)[rng.random(len(children)) < absence_rate]:
+            kind, start, end = CHILD_ABSENCES[rng.integers(len(CHILD_ABSENCES))]
+            rows.append((child, day, start, end, kind))
+        for tech in np.array(staff)[rng.random(len(staff)) < absence_rate]:
+            rows.append((tech, day, np.nan, np.nan, "PTO"))
+    return pd.DataFrame([(*row, "once") for row in rows],
+                        columns=["Name", "Day", "Start", "End", "Type", "Occurrence"])
@@ -0,0 +1,257 @@
+"""Schedule many centers in one run.
+
+Every workbook in a directory is one center. Its days are scheduled as the
+parallel pipeline schedules them (see schedule_day), all centers' days
+sharing one pool of worker processes. Each day runs in its own process, so a
+day that fails or runs past --timeout is stopped and recorded without
+holding up the rest.
+
+    python -m center_scheduling.batch CENTERS_DIR [--output data/08_reporting/centers]
+                                      [--workers 4] [--timeout 600] [--env local]
+
+A center's parameters are the project's (conf/base, then --env) with the
+overrides in an optional <center>.yml next to its workbook, e.g.
+block_minutes: 15 or solver: {gap: 0.02}. Each center gets
+<output>/<center>/solution.csv and solver_metrics.parquet, and
+<output>/summary.csv has one row per center and day with its status, time
+and objective. The command exits non-zero if any day didn't finish.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+from collections import deque
+from multiprocessing.connection import wait
+from pathlib import Path
+
+import pandas as pd
+import yaml
+from kedro.config import OmegaConfigLoader
+from omegaconf import OmegaConf
+
+from center_scheduling.datasets import DEFAULT_CACHE_DIR, WorkbookDataset
+from center_scheduling.pipelines.parallel.nodes import DAY_KEYS, _solver_threads, schedule_day
+from center_scheduling.pipelines.reporting.nodes import combine_solver_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = "data/08_reporting/centers"
+SUMMARY_COLUMNS = ["center", "day", "status", "seconds", "objective", "termination",
+                   "gap", "error"]
+
+
+def project_parameters(env: str = None, conf_source: str = "conf") -> dict:
+    """
+    The project parameters as kedro run would load them.
+    """
+    loader = OmegaConfigLoader(conf_source, base_env="base", default_run_env="local", env=env)
+    return loader["parameters"]
+
+
+def center_parameters(params: dict, workbook: Path) -> dict:
+    """
+    params with the overrides in <workbook stem>.yml, if there is one, merged in.
+    """
+    overrides = workbook.with_suffix(".yml")
+    if not overrides.is_file():
+        return params
+    with open(overrides) as f:
+        return OmegaConf.to_container(OmegaConf.merge(params, yaml.safe_load(f) or {}))
+
+
+def _run_day(conn, sheets: dict, day: str, params: dict, solver_options: dict) -> None:
+    """
+    Worker process: schedule one day and send back its result or error.
+    """
+    # Its own process group, so a timeout also stops the solver it started
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    try:
+        wide, _, metrics = schedule_day(sheets["center_hours"], sheets["staff_child"],
+                                        sheets["absences"], sheets["roles"],
+                                        pd.DataFrame(), day, params, solver_options)
+        conn.send(("ok", wide, metrics))
+    except Exception:
+        conn.send(("failed", traceback.format_exc(), None))
+    finally:
+        conn.close()
+
+
+def _stop(process: multiprocessing.Process) -> None:
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    process.kill()
+    process.join()
+
+
+class BatchRun:
+    """
+    All (center, day) tasks of a batch, run at most workers at a time.
+
+    Args:
+        workers (int): Days solved at once. Solver threads are capped at
+            cores // workers.
+        timeout (float): Seconds before a day's process is stopped. Its solver
+            time limit is at most 80% of this, so it usually stops first with
+            its best schedule so far.
+    """
+
+    def __init__(self, workers: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self.tasks = deque()
+        self.results = []
+
+    def add_center(self, center: str, sheets: dict, params: dict) -> None:
+        solver_options = {
+            **params["solver"],
+            "threads": _solver_threads(params["solver"]["threads"], self.workers),
+            "time_limit": min(params["solver"].get("time_limit") or float("inf"),
+                              0.8 * self.timeout),
+            "tee": False,
+        }
+        for key in DAY_KEYS:
+            self.tasks.append((center, params[key], sheets, params, solver_options))
+
+    def add_failure(self, center: str, params: dict, error: str) -> None:
+        """
+        Record every day of a center that couldn't be set up as failed.
+        """
+        for key in DAY_KEYS:
+            self.results.append({"center": center, "day": params[key], "status": "failed",
+                                 "error": error})
+
+    def _record(self, task: tuple, started: float, status: str, wide: pd.DataFrame = None,
+                metrics: dict = None, error: str = None) -> None:
+        center, day = task[:2]
+        result = {"center": center, "day": day, "status": status,
+                  "seconds": time.perf_counter() - started, "wide": wide,
+                  "metrics": metrics, "error": error}
+        if metrics is not None:
+            result.update({k: metrics[k] for k in ["objective", "termination", "gap"]})
+        log = logger.info if status == "ok" else logger.warning
+        log("%s %s: %s in %.1fs%s", center, day, status, result["seconds"],
+            f"\n{error}" if error else "")
+        self.results.append(result)
+
+    def run(self) -> list[dict]:
+        """
+        Run the tasks, returning one result per (center, day) task.
+        """
+        running = {}
+        while self.tasks or running:
+            while self.tasks and len(running) < self.workers:
+                task = self.tasks.popleft()
+                _, day, sheets, params, solver_options = task
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_run_day, args=(sender, sheets, day, params, solver_options),
+                    daemon=True)
+                process.start()
+                sender.close()
+                running[receiver] = (task, process, time.perf_counter())
+
+            for receiver in wait(list(running), timeout=1):
+                task, process, started = running.pop(receiver)
+                try:
+                    status, payload, metrics = receiver.recv()
+                except EOFError:
+                    status, payload, metrics = "failed", None, None
+                process.join()
+                if status == "ok":
+                    self._record(task, started, "ok", payload, metrics)
+                else:
+                    self._record(task, started, "failed", error=payload or
+                                 f"Worker exited with code {process.exitcode}")
+
+            now = time.perf_counter()
+            for receiver, (task, process, started) in list(running.items()):
+                if now - started > self.timeout:
+                    _stop(process)
+                    del running[receiver]
+                    self._record(task, started, "timeout")
+        return self.results
+
+
+def write_outputs(results: list[dict], output: Path) -> pd.DataFrame:
+    """
+    Write each center's solution and solver metrics and the summary.
+
+    Returns:
+        pd.DataFrame: The summary, one row per center and day.
+    """
+    summary = pd.DataFrame(results).reindex(columns=[*SUMMARY_COLUMNS, "wide", "metrics"])
+    for center, days in summary.groupby("center", sort=False):
+        done = days[days.status == "ok"]
+        if done.empty:
+            continue
+        folder = output / center
+        folder.mkdir(parents=True, exist_ok=True)
+        pd.concat(list(done.wide), ignore_index=True).to_csv(folder / "solution.csv",
+                                                             index=False)
+        combine_solver_metrics(*done.metrics).to_parquet(folder / "solver_metrics.parquet")
+    summary = summary[SUMMARY_COLUMNS]
+    output.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(output / "summary.csv", index=False)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("centers", type=Path, help="Directory of center workbooks (.xlsx)")
+    parser.add_argument("--output", type=Path, default=Path(DEFAULT_OUTPUT))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout", type=float, default=600,
+                        help="Seconds before a day is stopped")
+    parser.add_argument("--env", default=None, help="Kedro environment of the parameters")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Where parsed workbooks are cached")
+    parser.add_argument("--verbose", action="store_true", help="Log every node's progress")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logger.setLevel(logging.INFO)
+
+    workbooks = sorted(p for p in args.centers.glob("*.xlsx") if not p.name.startswith("~$"))
+    if not workbooks:
+        parser.error(f"No .xlsx workbooks in {args.centers}")
+    params = project_parameters(args.env)
+    batch = BatchRun(args.workers, args.timeout)
+    for workbook in workbooks:
+        try:
+            center_params = center_parameters(params, workbook)
+            sheets = WorkbookDataset(str(workbook), cache_dir=args.cache_dir).load()
+        except Exception as e:
+            logger.warning("%s can't be loaded: %s", workbook.stem, e)
+            batch.add_failure(workbook.stem, params, f"{type(e).__name__}: {e}")
+            continue
+        batch.add_center(workbook.stem, sheets, center_params)
+
+    logger.info("Scheduling %d days of %d centers on %d workers", len(batch.tasks),
+                len(workbooks), args.workers)
+    summary = write_outputs(batch.run(), args.output)
+    by_center = summary.groupby("center", sort=False).agg(
+        days=("day", "size"),
+        ok=("status", lambda s: (s == "ok").sum()),
+        failed=("status", lambda s: (s == "failed").sum()),
+        timeout=("status", lambda s: (s == "timeout").sum()),
+        seconds=("seconds", "sum"),
+        objective=("objective", "sum"),
+    )
+    print(by_center.to_string())  # noqa: T201
+    print(f"Summary in {args.output / 'summary.csv'}")  # noqa: T201
+    if (summary.status != "ok").any():
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Content-addressed disk cache of day solutions.
+
+Each entry is one JSON file named by the SHA-256 of everything that
+determines the day's schedule. Reading an entry marks it as used; writing
+one evicts the least recently used entries beyond the size limit.
+
+    python -m center_scheduling.cache list [--path data/07_model_output/solution_cache]
+    python -m center_scheduling.cache purge [KEY ...] [--all] [--older-than DAYS]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = "data/07_model_output/solution_cache"
+DEFAULT_MAX_MB = 100
+
+# Bump when a code change alters the schedules the same inputs produce
+CACHE_VERSION = 1
+
+
+def cache_key(frames: dict[str, pd.DataFrame], params: dict) -> str:
+    """
+    Hash input frames (values, columns and dtypes, not the index) and
+    JSON-able parameters into a hex key. Dict order doesn't matter.
+    """
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for name in sorted(frames):
+        frame = frames[name]
+        digest.update(name.encode())
+        digest.update(json.dumps([[str(c), str(t)] for c, t in frame.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    """
+    Day solutions on local disk, evicted least recently used first.
+
+    Args:
+        path (str): Directory of the entries, created on first write.
+        max_mb (float): Size limit of the directory.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_mb: float = DEFAULT_MAX_MB):
+        self.path = Path(path)
+        self.max_bytes = max_mb * 2**20
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def get(self, key: str) -> dict:
+        """
+        The entry for key, or None. A hit counts as a use for eviction.
+        """
+        file = self._file(key)
+        try:
+            entry = json.loads(file.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(file)
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        """
+        Store entry under key, then evict down to the size limit.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.path / f".{key}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps({**entry, "created": time.time()}, default=str))
+        # Atomic, so concurrent days never read half an entry
+        tmp.replace(self._file(key))
+        self.evict()
+
+    def _files(self) -> list[Path]:
+        if not self.path.exists():
+            return []
+        return list(self.path.glob("*.json"))
+
+    def evict(self) -> list[str]:
+        """
+        Delete the least recently used entries until the cache fits max_mb.
+
+        Returns:
+            list[str]: The evicted keys.
+        """
+        files = sorted(self._files(), key=lambda f: f.stat().st_mtime)
+        total = sum(f.stat().st_size for f in files)
+        evicted = []
+        for file in files:
+            if total <= self.max_bytes:
+                break
+            total -= file.stat().st_size
+            file.unlink(missing_ok=True)
+            evicted.append(file.stem)
+        if evicted:
+            logger.info("Evicted %d cached solutions", len(evicted))
+        return evicted
+
+    def entries(self) -> pd.DataFrame:
+        """
+        One row per entry: key, day, objective, size and last use, most
+        recently used first.
+        """
+        rows = []
+        for file in self._files():
+            stat = file.stat()
+            try:
+                entry = json.loads(file.read_text())
+            except json.JSONDecodeError:
+                entry = {}
+            rows.append({
+                "key": file.stem,
+                "day": entry.get("day"),
+                "objective": entry.get("stats", {}).get("objective"),
+                "size_kb": stat.st_size / 2**10,
+                "last_used": pd.Timestamp(stat.st_mtime, unit="s"),
+            })
+        columns = ["key", "day", "objective", "size_kb", "last_used"]
+        return (pd.DataFrame(rows, columns=columns)
+                .sort_values("last_used", ascending=False, ignore_index=True))
+
+    def purge(self, keys: list[str] = None, older_than_days: float = None) -> list[str]:
+        """
+        Delete the given keys (or key prefixes), the entries unused for
+        older_than_days, or every entry if neither is given.
+
+        Returns:
+            list[str]: The deleted keys.
+        """
+        cutoff = None if older_than_days is None else time.time() - older_than_days * 86400
+        deleted = []
+        for file in self._files():
+            if keys and not any(file.stem.startswith(k) for k in keys):
+                continue
+            if cutoff is not None and file.stat().st_mtime >= cutoff:
+                continue
+            file.unlink(missing_ok=True)
+            deleted.append(file.stem)
+        return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List the entries, most recently used first")
+    purge = commands.add_parser("purge", help="Delete entries")
+    purge.add_argument("keys", nargs="*", help="Keys or key prefixes to delete")
+    purge.add_argument("--all", action="store_true", help="Delete every entry")
+    purge.add_argument("--older-than", type=float, help="Delete entries unused for DAYS")
+    args = parser.parse_args()
+
+    cache = SolutionCache(args.path)
+    if args.command == "list":
+        entries = cache.entries()
+        print(entries.to_string(index=False))  # noqa: T201
+        print(f"{len(entries)} entries, {entries.size_kb.sum() / 2**10:.2f} MB")  # noqa: T201
+        return
+    if not (args.keys or args.all or args.older_than is not None):
+        parser.error("purge needs KEYs, --all or --older-than")
+    deleted = cache.purge(args.keys or None, args.older_than)
+    print(f"Deleted {len(deleted)} entries")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
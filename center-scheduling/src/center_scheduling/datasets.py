@@ -0,0 +1,184 @@
+"""Project-specific Kedro datasets."""
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+from kedro.io import AbstractDataset, DatasetError
+from kedro_datasets.pandas import CSVDataset
+
+from center_scheduling.pipelines.data_science.nodes.setup import _clean_names
+from center_scheduling.pipelines.data_science.nodes.times import (
+    format_time_errors,
+    parse_time_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class OptionalCSVDataset(CSVDataset):
+    """
+    A CSVDataset that loads as an empty DataFrame when the file doesn't exist,
+    for inputs the pipeline can run without.
+    """
+
+    def _load(self) -> pd.DataFrame:
+        if not self._exists():
+            return pd.DataFrame()
+        return super()._load()
+
+
+DEFAULT_CACHE_DIR = "data/02_intermediate/workbook_cache"
+
+# Bump when the cleaning below changes what a workbook loads as
+WORKBOOK_CACHE_VERSION = 2
+
+# Sheet -> (required columns, name columns, time columns). In staff_child,
+# every column but Child is a staff member.
+WORKBOOK_SHEETS = {
+    "center_hours": (["Day", "Open", "Close"], [], ["Open", "Close"]),
+    "staff_child": (["Child"], ["Child"], []),
+    "absences": (["Name", "Day", "Start", "End", "Type", "Occurrence"], ["Name"],
+                 ["Start", "End"]),
+    "roles": (["Name", "Role"], ["Name"], []),
+}
+
+
+def _text(column: pd.Series) -> pd.Series:
+    """
+    Text cells as str, blanks as None, so each column has one Parquet type.
+    """
+    return column.map(lambda v: None if pd.isna(v) or v == "" else str(v)).astype(object)
+
+
+def clean_sheet(sheet: str, frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validate one workbook sheet and clean it as setup_decision_variables
+    expects: names without spaces or underscores, times in hours (e.g. 12.5
+    for 12:30) and text columns as str. Cleaning twice changes nothing.
+
+    Raises:
+        ValueError: If a required column is missing, a time can't be read or,
+            in staff_child, two staff columns have the same cleaned name.
+    """
+    required, names, times = WORKBOOK_SHEETS[sheet]
+    missing = [c for c in required if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Sheet {sheet!r} is missing columns {missing}")
+    frame = frame.dropna(how="all")
+
+    if sheet == "staff_child":
+        staff = _clean_names(pd.Series(frame.columns.drop("Child"), dtype=str))
+        duplicated = staff[staff.duplicated()].tolist()
+        if duplicated:
+            raise ValueError(f"Sheet 'staff_child' has duplicate staff columns {duplicated}")
+        frame = frame.set_axis(["Child", *staff], axis=1)
+
+    frame = frame.assign(**{c: _text(frame[c]) for c in frame.columns if c not in times})
+    for column in names:
+        frame[column] = _clean_names(frame[column])
+    # To the minute, so the model can use any block size
+    minutes, errors = parse_time_columns(frame, times, sheet, required[0], blocks_per_hour=60)
+    if len(errors):
+        raise ValueError(f"Times can't be read:\n{format_time_errors(errors)}")
+    for column in times:
+        frame[column] = minutes[column] / 60
+    return frame.reset_index(drop=True)
+
+
+class WorkbookDataset(AbstractDataset[dict, dict]):
+    """
+    The center workbook, every sheet in WORKBOOK_SHEETS parsed in one pass and
+    cleaned with clean_sheet.
+
+    The cleaned sheets are cached as Parquet under cache_dir, keyed by a hash
+    of the file's contents, so only a new or edited workbook is parsed again.
+
+    Args:
+        filepath (str): Path of the .xlsx workbook.
+        cache_dir (str): Directory of the Parquet cache.
+        metadata (dict): Kedro metadata, unused.
+    """
+
+    def __init__(self, filepath: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 metadata: dict = None):
+        self._filepath = Path(filepath)
+        self._cache_dir = Path(cache_dir)
+        self.metadata = metadata
+
+    def _cache_path(self, content: bytes) -> Path:
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        return self._cache_dir / f"{self._filepath.stem}-v{WORKBOOK_CACHE_VERSION}-{digest}"
+
+    def _load_sheets(self, sheets: list[str]) -> dict[str, pd.DataFrame]:
+        content = self._filepath.read_bytes()
+        cache = self._cache_path(content)
+        if cache.is_dir():
+            return {s: pd.read_parquet(cache / f"{s}.parquet") for s in sheets}
+
+        raw = pd.read_excel(io.BytesIO(content), sheet_name=list(WORKBOOK_SHEETS),
+                            engine="openpyxl")
+        cleaned = {s: clean_sheet(s, raw[s]) for s in WORKBOOK_SHEETS}
+        # Written aside, then renamed, so a concurrent load never reads half a cache
+        tmp = self._cache_dir / f".{cache.name}.{os.getpid()}"
+        tmp.mkdir(parents=True, exist_ok=True)
+        for sheet, frame in cleaned.items():
+            frame.to_parquet(tmp / f"{sheet}.parquet", index=False)
+        try:
+            tmp.rename(cache)
+        except OSError:
+            # Another process cached it first
+            shutil.rmtree(tmp, ignore_errors=True)
+        logger.info("Parsed %s into %s", self._filepath, cache)
+        return {s: cleaned[s] for s in sheets}
+
+    def _load(self) -> dict[str, pd.DataFrame]:
+        return self._load_sheets(list(WORKBOOK_SHEETS))
+
+    def _save(self, data: dict[str, pd.DataFrame]) -> None:
+        """
+        Write the sheets (raw or cleaned) to the workbook. Its new hash keys the cache.
+        """
+        self._filepath.parent.mkdir(parents=True, exist_ok=True)
+        with pd.ExcelWriter(self._filepath, engine="openpyxl") as writer:
+            for sheet, frame in data.items():
+                frame.to_excel(writer, sheet_name=sheet, index=False)
+
+    def _exists(self) -> bool:
+        return self._filepath.is_file()
+
+    def _describe(self) -> dict:
+        return {"filepath": str(self._filepath), "cache_dir": str(self._cache_dir)}
+
+
+class WorkbookSheetDataset(WorkbookDataset):
+    """
+    One sheet of a WorkbookDataset. The first sheet loaded parses and caches
+    them all, so the others load from the cache.
+
+    Args:
+        filepath (str): Path of the .xlsx workbook.
+        sheet (str): A WORKBOOK_SHEETS name.
+        cache_dir (str): Directory of the Parquet cache.
+        metadata (dict): Kedro metadata, unused.
+    """
+
+    def __init__(self, filepath: str, sheet: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 metadata: dict = None):
+        if sheet not in WORKBOOK_SHEETS:
+            raise DatasetError(f"Unknown sheet {sheet!r}; expected one of {list(WORKBOOK_SHEETS)}")
+        super().__init__(filepath, cache_dir, metadata)
+        self._sheet = sheet
+
+    def _load(self) -> pd.DataFrame:
+        return self._load_sheets([self._sheet])[self._sheet]
+
+    def _save(self, data: pd.DataFrame) -> None:
+        raise DatasetError("Save the whole workbook with WorkbookDataset")
+
+    def _describe(self) -> dict:
+        return {**super()._describe(), "sheet": self._sheet}
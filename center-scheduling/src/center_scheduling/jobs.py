@@ -0,0 +1,232 @@
+"""Background scheduling jobs, for the app.
+
+A JobManager keeps a pool of worker processes alive between requests, so a
+schedule request pays neither uv's nor Kedro's start-up and never blocks
+the caller. Each request is a job of one task per day, scheduled as the
+parallel pipeline schedules a day (see schedule_day); each day's schedule
+is available as soon as that day finishes.
+
+    jobs = JobManager(workers=2)
+    job_id = jobs.submit(sheets, params)
+    jobs.get(job_id).progress()    # one row per day: status, seconds, objective
+    jobs.get(job_id).results()     # {"Mon": wide schedule, ...} of the days done so far
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from center_scheduling.pipelines.parallel.nodes import DAY_KEYS, _solver_threads, schedule_day
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_COLUMNS = ["day", "status", "seconds", "objective", "termination", "gap", "error"]
+
+
+def _schedule_day(sheets: dict, day: str, params: dict, solver_options: dict) -> tuple:
+    """
+    Worker: one day's wide schedule, solver metrics and wall-clock seconds.
+    """
+    start = time.perf_counter()
+    wide, _, metrics = schedule_day(sheets["center_hours"], sheets["staff_child"],
+                                    sheets["absences"], sheets["roles"], pd.DataFrame(),
+                                    day, params, solver_options)
+    return wide, metrics, time.perf_counter() - start
+
+
+class Job:
+    """
+    One schedule request: a future per day once the day has started, and
+    each day's outcome once it has one. Futures complete on the pool's
+    thread, so state is locked.
+
+    Args:
+        job_id (str): The job's id.
+        days (list[str]): The days scheduled, in order.
+    """
+
+    def __init__(self, job_id: str, days: list[str]):
+        self.id = job_id
+        self.days = days
+        self.submitted_at = time.time()
+        self.futures: dict[str, Future] = {}
+        self.cancelled = False
+        self._outcomes: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _set_outcome(self, day: str, outcome: dict) -> None:
+        with self._lock:
+            self._outcomes[day] = outcome
+
+    def _on_done(self, day: str, future: Future) -> None:
+        try:
+            wide, metrics, seconds = future.result()
+            outcome = {"status": "done", "wide": wide, "seconds": seconds,
+                       **{k: metrics[k] for k in ["objective", "termination", "gap"]}}
+        except Exception as e:
+            outcome = {"status": "failed",
+                       "error": "".join(traceback.format_exception_only(type(e), e)).strip()}
+            logger.warning("Job %s %s failed: %s", self.id, day, outcome["error"])
+        self._set_outcome(day, outcome)
+
+    def _status(self, day: str) -> str:
+        if day in self._outcomes:
+            return self._outcomes[day]["status"]
+        return "running" if day in self.futures else "queued"
+
+    def progress(self) -> pd.DataFrame:
+        """
+        One row per day: status (queued, running, done, failed or cancelled)
+        and, once finished, its seconds, objective, termination, gap or error.
+        """
+        with self._lock:
+            rows = [{**self._outcomes.get(day, {}), "day": day, "status": self._status(day)}
+                    for day in self.days]
+        return pd.DataFrame(rows).reindex(columns=PROGRESS_COLUMNS)
+
+    def results(self) -> dict[str, pd.DataFrame]:
+        """
+        The wide schedule of each day done so far, in day order.
+        """
+        with self._lock:
+            return {day: self._outcomes[day]["wide"] for day in self.days
+                    if self._outcomes.get(day, {}).get("status") == "done"}
+
+    @property
+    def finished(self) -> bool:
+        with self._lock:
+            return len(self._outcomes) == len(self.days)
+
+    def cancel(self) -> None:
+        """
+        Cancel the days that haven't started. Running days finish.
+        """
+        with self._lock:
+            self.cancelled = True
+            for day in self.days:
+                if day not in self.futures and day not in self._outcomes:
+                    self._outcomes[day] = {"status": "cancelled"}
+
+
+class JobManager:
+    """
+    Runs schedule requests on a shared pool of worker processes, oldest
+    request first. Only as many days as there are workers are handed to the
+    pool at a time, so a day's future exists only once it is running.
+
+    Args:
+        workers (int): Days solved at once. Solver threads are capped at
+            cores // workers.
+        max_jobs (int): Jobs kept for lookup; the oldest finished ones go first.
+    """
+
+    def __init__(self, workers: int = None, max_jobs: int = 20):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._pool = self._new_pool()
+        self._queue = deque()
+        self._running = 0
+        # Reentrant: a future that is already done runs its callback at once
+        self._lock = threading.RLock()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawned, not forked: the app's server is multi-threaded
+        return ProcessPoolExecutor(max_workers=self.workers,
+                                   mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit_day(self, *args) -> Future:
+        try:
+            return self._pool.submit(_schedule_day, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); the jobs on it have failed
+            logger.warning("Worker pool broken, starting a new one")
+            self._pool = self._new_pool()
+            return self._pool.submit(_schedule_day, *args)
+
+    def _dispatch(self) -> None:
+        """
+        Hand queued days to the pool while there are idle workers.
+        """
+        with self._lock:
+            while self._queue and self._running < self.workers:
+                job, day, args = self._queue.popleft()
+                if job.cancelled:
+                    continue
+                self._running += 1
+                job.futures[day] = self._submit_day(*args)
+                job.futures[day].add_done_callback(
+                    lambda future, job=job, day=day: self._on_done(job, day, future))
+
+    def _on_done(self, job: Job, day: str, future: Future) -> None:
+        job._on_done(day, future)
+        with self._lock:
+            self._running -= 1
+        self._dispatch()
+
+    def submit(self, sheets: dict[str, pd.DataFrame], params: dict,
+               time_limit: float = None) -> str:
+        """
+        Queue every day of a center for scheduling.
+
+        Args:
+            sheets (dict[str, pd.DataFrame]): The input sheets, cleaned as
+                WorkbookDataset loads them.
+            params (dict): The project parameters.
+            time_limit (float): Solver seconds per day, over params. With a
+                limit, each day starts from the heuristic schedule, so it has
+                an answer by then.
+
+        Returns:
+            str: The job id, see get.
+        """
+        solver_options = {
+            **params["solver"],
+            "threads": _solver_threads(params["solver"]["threads"], self.workers),
+            "tee": False,
+        }
+        if time_limit:
+            solver_options["time_limit"] = time_limit
+            params = {**params, "heuristic_start": True}
+        job = Job(uuid.uuid4().hex[:8], [params[key] for key in DAY_KEYS])
+        with self._lock:
+            self.jobs[job.id] = job
+            self._queue.extend((job, day, (sheets, day, params, solver_options))
+                               for day in job.days)
+            self._forget_old_jobs()
+        self._dispatch()
+        logger.info("Job %s: %d days on %d workers", job.id, len(job.days), self.workers)
+        return job.id
+
+    def _forget_old_jobs(self) -> None:
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id].finished:
+                del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Job:
+        """
+        Raises:
+            KeyError: If there is no such job (or it has been forgotten).
+        """
+        return self.jobs[job_id]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Cancel every queued day and stop the workers, after their running
+        days if wait.
+        """
+        with self._lock:
+            for job in self.jobs.values():
+                job.cancel()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
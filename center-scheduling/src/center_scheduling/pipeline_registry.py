@@ -11,5 +11,9 @@ def register_pipelines() -> dict[str, Pipeline]:
         A mapping from pipeline names to ``Pipeline`` objects.
     """
     pipelines = find_pipelines()
+    # Alternatives to data_science that write the same outputs
+    alternatives = {name: pipelines.pop(name) for name in ["parallel", "weekly"]}
     pipelines["__default__"] = sum(pipelines.values())
+    for name, alternative in alternatives.items():
+        pipelines[name] = alternative + pipelines["reporting"]
     return pipelines
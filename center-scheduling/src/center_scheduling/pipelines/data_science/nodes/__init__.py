@@ -3,3 +3,9 @@ from .constraints import *
 from .objective import *
 from .solve import *
 from .indicators import *
+from .warm_start import *
+from .build import *
+from .heuristic import *
+from .symmetry import *
+from .metrics import *
+from .refine import *
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel
+
+
+
+# constraint_on_off key -> (absence types, who the absence applies to).
+# Absences that apply to None (team meetings) block everyone.
+ABSENCE_TYPES = {
+    "pto": (["pto"], "Staff"),
+    "parent_training": (["parent training"], "Child"),
+    "team_meeting": (["team meeting"], None),
+    "nap_time": (["nap"], "Child"),
+    "speech_therapy": (["speech"], "Child"),
+    "arrival_departure": (["late arrival", "leaves early"], "Child"),
+}
+
+def _unavailable_intervals(model: ConcreteModel, constraint_on_off: dict, 
+                           keys: list[str] = None, 
+                           absences: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Turn the absences into half-open [Start, End) block intervals.
+
+    Args:
+        model (ConcreteModel): Model with ABSENCES.
+        constraint_on_off (dict): Switches; absence types that are off are skipped.
+        keys (list[str]): ABSENCE_TYPES keys to consider. Defaults to all of them.
+        absences (pd.DataFrame): Absences with their blocks (see absence_blocks)
+            to use instead of model.ABSENCES.
+
+    Returns:
+        pd.DataFrame: Name, Applies ("Staff", "Child" or None), Start and End.
+    """
+    keys = ABSENCE_TYPES.keys() if keys is None else keys
+    absences = model.ABSENCES if absences is None else absences
+    intervals = []
+    for key in keys:
+        if not constraint_on_off[key]:
+            continue
+        types, applies = ABSENCE_TYPES[key]
+        rows = absences[absences.Type.isin(types)
+                        & (absences["Start Block"] < absences["End Block"])]
+        intervals.append(pd.DataFrame({
+            "Name": rows["Name"].to_numpy(),
+            "Applies": applies,
+            "Start": rows["Start Block"].to_numpy(),
+            "End": rows["End Block"].to_numpy(),
+        }, columns=["Name", "Applies", "Start", "End"]))
+    if not intervals:
+        return pd.DataFrame(columns=["Name", "Applies", "Start", "End"])
+    return pd.concat(intervals, ignore_index=True)
+
+def _unavailable_positions(index_df: pd.DataFrame, intervals: pd.DataFrame) -> np.ndarray:
+    """
+    Row positions of index_df that fall inside any of the intervals.
+
+    Joins the intervals on Child or Staff (or on nothing, for intervals that
+    apply to everyone), then keeps rows whose time block is in [Start, End).
+    """
+    index_df = index_df.reset_index(drop=True).rename_axis("Position").reset_index()
+    matches = []
+    for applies, df in intervals.groupby("Applies", dropna=False):
+        if pd.isna(applies):
+            joined = index_df.merge(df, how="cross")
+        else:
+            joined = index_df.merge(df, left_on=index_df[applies].astype(str), 
+                                    right_on="Name")
+        in_interval = ((joined["Time Block"] >= joined["Start"]) 
+                       & (joined["Time Block"] < joined["End"]))
+        matches.append(joined.loc[in_interval, "Position"].to_numpy())
+    if len(matches) == 0:
+        return np.array([], dtype=int)
+    return np.unique(np.concatenate(matches))
+
+def _center_closed_positions(index_df: pd.DataFrame, center_hours: pd.DataFrame) -> np.ndarray:
+    """
+    Row positions of index_df that fall outside the center's opening hours
+    (Open Block and Close Block, see setup_decision_variables).
+    """
+    times = index_df["Time Block"].to_numpy()
+    closed = np.zeros(len(times), dtype=bool)
+    for open_time, close_time in zip(center_hours["Open Block"], center_hours["Close Block"]):
+        closed |= (times < open_time) | (times >= close_time)
+    return np.flatnonzero(closed)
+
+def _prunable_positions(model: ConcreteModel, constraint_on_off: dict) -> np.ndarray:
+    """
+    Row positions of INDEX_DF whose variables can only ever be 0, given the
+    center hours and absence switches in constraint_on_off.
+    """
+    positions = [_unavailable_positions(model.INDEX_DF, 
+                                        _unavailable_intervals(model, constraint_on_off))]
+    if constraint_on_off["center_hours"]:
+        positions.append(_center_closed_positions(model.INDEX_DF, model.CENTER_HOURS))
+    return np.unique(np.concatenate(positions))
@@ -0,0 +1,482 @@
+import contextlib
+import logging
+import re
+import sys
+import time
+from functools import partial
+
+import numpy as np
+from pyomo.common.dependencies import attempt_import
+from pyomo.common.errors import ApplicationError
+from pyomo.common.timing import HierarchicalTimer
+from pyomo.contrib import appsi
+from pyomo.environ import ConcreteModel, SolverFactory, TerminationCondition, Var, maximize, value
+
+# Optional: pip install center-scheduling[highs]
+highspy, _ = attempt_import("highspy")
+
+logger = logging.getLogger(__name__)
+
+
+def _timed(method, timings: dict, stage: str):
+    """
+    Wrap a solver method so its wall-clock time is recorded in timings[stage].
+    """
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[stage] = time.perf_counter() - start
+    return wrapper
+
+
+# CBC log line for each new incumbent, e.g. "Cbc0012I Integer solution of -310.9
+# found by DiveCoefficient after 1203 iterations and 0 nodes (2.31 seconds)"
+CBC_INCUMBENT = re.compile(r"Cbc00(?:04|12)I Integer solution of \S+ found .*\(([\d.]+) seconds\)")
+
+
+def _cbc_first_feasible(log: str) -> float:
+    """
+    Seconds until CBC found its first incumbent, or None if it never did.
+    """
+    match = CBC_INCUMBENT.search(log or "")
+    return float(match.group(1)) if match else None
+
+
+class SolverEvents:
+    """
+    Structured progress of one solve: an "incumbent" event for each better
+    schedule and a "bound" event for each bound update, each with the best
+    objective and bound so far (in the model's sense), their relative gap and
+    the seconds since the solve started. Each event is logged and passed to
+    on_event, if given.
+
+    Args:
+        day (str): Day of the model, copied into each event.
+        backend (str): Backend name, copied into each event.
+        on_event (Callable): Called with each event dict, e.g. to stream them.
+    """
+
+    def __init__(self, day: str, backend: str, on_event=None):
+        self.day = day
+        self.backend = backend
+        self.on_event = on_event
+        self.objective = None
+        self.bound = None
+        self.incumbents = []
+        self.start = time.perf_counter()
+
+    def emit(self, kind: str, elapsed_s: float = None, objective: float = None,
+             bound: float = None) -> None:
+        # CBC logs a MIP start twice
+        if kind == "incumbent" and objective is not None and objective == self.objective:
+            return
+        if objective is not None:
+            self.objective = objective
+        if bound is not None:
+            self.bound = bound
+        gap = None
+        if self.objective is not None and self.bound is not None and np.isfinite(self.bound):
+            gap = abs(self.bound - self.objective) / max(abs(self.objective), 1e-9)
+        event = {
+            "day": self.day,
+            "backend": self.backend,
+            "event": kind,
+            "elapsed_s": time.perf_counter() - self.start if elapsed_s is None else elapsed_s,
+            "objective": self.objective,
+            "bound": self.bound,
+            "gap": gap,
+        }
+        if kind == "incumbent":
+            self.incumbents.append(event)
+            logger.info("Solver event: %s", event)
+        else:
+            logger.debug("Solver event: %s", event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+
+# CBC log lines with progress. Seconds are CBC's own, as it writes its log in
+# blocks. The signs are not consistent (CBC minimizes, so most values of a
+# maximized objective show negated, but not MIP starts), so values take the
+# sign of the root LP bound, which shows in the model's sense.
+CBC_ROOT_BOUND = re.compile(r"Continuous objective value is (?P<bound>\S+) - (?P<seconds>[\d.]+) seconds")
+CBC_EVENTS = [
+    ("incumbent", re.compile(r"Cbc00(?:04|12)I Integer solution of (?P<objective>\S+) found "
+                             r".*\((?P<seconds>[\d.]+) seconds\)")),
+    ("incumbent", re.compile(r"MIPStart provided solution with cost (?P<objective>\S+)")),
+    ("bound", CBC_ROOT_BOUND),
+    ("bound", re.compile(r"Cbc0010I After \d+ nodes, \d+ on tree, \S+ best solution, "
+                         r"best possible (?P<bound>\S+) \((?P<seconds>[\d.]+) seconds\)")),
+]
+
+# CBC log lines with the presolved size and, at the end, the search summary
+CBC_PRESOLVED = re.compile(r"Cgl0004I processed model has (?P<rows>\d+) rows, (?P<columns>\d+) columns")
+CBC_NODES = re.compile(r"^Enumerated nodes:\s+(?P<nodes>\d+)")
+CBC_BOUND = re.compile(r"^(?:Upper|Lower) bound:\s+(?P<bound>\S+)")
+
+
+class _CbcLogStream:
+    """
+    Write-only stream for CBC's output that turns log lines into events,
+    echoing them to stdout if tee. The presolved size, node count and final
+    (or else latest) bound go into summary.
+    """
+
+    def __init__(self, events: SolverEvents, sign: float, tee: bool):
+        self.events = events
+        # Until the root LP bound shows, assume values are negated if maximizing
+        self.sign = sign
+        self.root_sign = None
+        self.echo = sys.stdout if tee else None
+        self.buffer = ""
+        self.summary = {}
+
+    def write(self, text: str) -> int:
+        if self.echo is not None:
+            self.echo.write(text)
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split("\n")
+        for line in lines:
+            self._summarize(line)
+            for kind, pattern in CBC_EVENTS:
+                match = pattern.search(line)
+                if match is None:
+                    continue
+                values = match.groupdict()
+                if pattern is CBC_ROOT_BOUND and float(values["bound"]) != 0:
+                    self.root_sign = np.sign(float(values["bound"]))
+                seconds = values.pop("seconds", None)
+                values = {k: self._value(v) for k, v in values.items()}
+                # CBC skips the final bound when it solves at the root; the
+                # last one in its log is the best there is until then
+                if kind == "bound":
+                    self.summary["bound"] = values["bound"]
+                self.events.emit(kind, None if seconds is None else float(seconds), **values)
+                break
+        return len(text)
+
+    def _summarize(self, line: str) -> None:
+        if match := CBC_PRESOLVED.search(line):
+            self.summary["presolved_rows"] = int(match["rows"])
+            self.summary["presolved_columns"] = int(match["columns"])
+        elif match := CBC_NODES.search(line):
+            self.summary["nodes"] = int(match["nodes"])
+        elif match := CBC_BOUND.search(line):
+            with contextlib.suppress(ValueError):
+                self.summary["bound"] = self._value(match["bound"])
+
+    def _value(self, text: str) -> float:
+        if self.root_sign is None:
+            return self.sign * float(text)
+        return self.root_sign * abs(float(text))
+
+    def flush(self) -> None:
+        if self.echo is not None:
+            self.echo.flush()
+
+
+@contextlib.contextmanager
+def _stream_cbc_log(model: ConcreteModel, events: SolverEvents, tee: bool):
+    """
+    Route the CBC output that the solver interface tees to stdout through a
+    _CbcLogStream, so events come out while CBC runs. Yields the stream.
+    """
+    sign = -1.0 if model.objective.sense == maximize else 1.0
+    stream = _CbcLogStream(events, sign, tee)
+    with contextlib.redirect_stdout(stream):
+        yield stream
+
+
+# Terminations after which a shell solver has no schedule to hand back
+NO_SCHEDULE = {
+    TerminationCondition.infeasible,
+    TerminationCondition.unbounded,
+    TerminationCondition.infeasibleOrUnbounded,
+    TerminationCondition.intermediateNonInteger,
+    TerminationCondition.error,
+    TerminationCondition.solverFailure,
+    TerminationCondition.internalSolverError,
+    TerminationCondition.invalidProblem,
+}
+
+
+def _has_schedule(model: ConcreteModel, termination: TerminationCondition) -> bool:
+    """
+    Whether a shell solve left a schedule in the model: the termination
+    allows one, every X has a value and every binary is 0 or 1. Stopped
+    before any incumbent, CBC hands back the (fractional) LP relaxation.
+    """
+    if termination in NO_SCHEDULE:
+        return False
+    if any(v.value is None for v in model.X_LIST):
+        return False
+    binaries = np.array([v.value for v in model.component_data_objects(Var)
+                         if v.is_binary() and v.value is not None], dtype=float)
+    return bool(np.all(np.abs(binaries - np.round(binaries)) < 1e-5))
+
+
+def _warm_start(model: ConcreteModel) -> bool:
+    return getattr(model, "WARM_START", None) is not None
+
+
+def _cbc_limits(cbc_options: dict, options: dict) -> None:
+    """
+    Pass the time limit and seed to CBC. The limit goes to CBC itself rather
+    than to Pyomo, which kills CBC a second after it and loses the incumbent.
+    """
+    if options["time_limit"] is not None:
+        cbc_options['sec'] = options["time_limit"]
+        cbc_options['timeMode'] = 'elapsed'
+    if options["seed"] is not None:
+        cbc_options['randomCbcSeed'] = options["seed"]
+
+
+def _solve_shell(model: ConcreteModel, options: dict, solver_io: str,
+                 events: SolverEvents) -> dict:
+    """
+    Solve with the CBC executable, writing the model to an LP or NL file.
+
+    Shell solvers run in three phases: write the problem file, run the
+    executable, and read the solution file back. A warm start is passed as
+    a CBC mipstart file, which Pyomo only supports for LP files.
+    """
+    solver = SolverFactory('cbc', solver_io=solver_io)
+    solver.options['threads'] = options["threads"]  # Use multiple threads if available
+    solver.options['ratio'] = options["gap"]        # Gap tolerance
+    solver.options['heur'] = 'on'                   # Enable heuristics
+    _cbc_limits(solver.options, options)
+
+    timings = {}
+    solver._presolve = _timed(solver._presolve, timings, "write")
+    solver._apply_solver = _timed(solver._apply_solver, timings, "solve")
+
+    warm_start = _warm_start(model) and solver_io == "lp"
+    start = time.perf_counter()
+    try:
+        with _stream_cbc_log(model, events, options["tee"]) as log:
+            results = solver.solve(model, tee=True, warmstart=warm_start)
+        termination = results.solver.termination_condition
+    except ApplicationError:
+        # CBC 2.10 can crash on its way out when it stops on time with only the
+        # MIP start; X still holds the start, so that is the best schedule
+        if not (warm_start and options["time_limit"] is not None):
+            raise
+        logger.warning("CBC stopped abnormally on its time limit, keeping the warm start")
+        termination = TerminationCondition.maxTimeLimit
+    total = time.perf_counter() - start
+    timings.setdefault("solve", total - timings["write"])
+    return {
+        # From the solution, not the log: CBC only logs incumbents with an LP file
+        "feasible": _has_schedule(model, termination),
+        "warm_start": warm_start,
+        "write_s": timings["write"],
+        "solve_s": timings["solve"],
+        "load_s": total - timings["write"] - timings["solve"],
+        "first_feasible_s": _cbc_first_feasible(solver._log),
+        "termination": str(termination),
+        **log.summary,
+    }
+
+
+def _appsi_cbc(options: dict) -> appsi.solvers.Cbc:
+    solver = appsi.solvers.Cbc()
+    solver.cbc_options['threads'] = options["threads"]
+    solver.cbc_options['ratio'] = options["gap"]
+    solver.cbc_options['heur'] = 'on'
+    _cbc_limits(solver.cbc_options, options)
+    return solver
+
+
+class WarmStartHighs(appsi.solvers.Highs):
+    """
+    Persistent in-process HiGHS that passes the current variable values to
+    HiGHS as a MIP start before each solve, and records when the first
+    incumbent was found in first_feasible_s. If events is set, each new
+    incumbent also goes to events (see SolverEvents).
+
+    If start_vars is set, only those variables are passed. HiGHS fixes them
+    and solves a sub-MIP for the rest, which repairs a start that an edit
+    has made infeasible.
+    """
+    warm_start = True
+    start_vars = None
+    first_feasible_s = None
+    events = None
+
+    def _set_start(self):
+        if self.start_vars is None:
+            col_value = np.zeros(self._solver_model.getNumCol())
+            for var_id, col in self._pyomo_var_to_solver_var_map.items():
+                col_value[col] = self._vars[var_id][0].value or 0
+            solution = highspy.HighsSolution()
+            solution.col_value = col_value.tolist()
+            solution.value_valid = True
+            self._solver_model.setSolution(solution)
+        else:
+            cols = np.array([self._pyomo_var_to_solver_var_map[id(v)]
+                             for v in self.start_vars], dtype=np.int32)
+            values = np.array([v.value or 0 for v in self.start_vars], dtype=np.float64)
+            self._solver_model.setSolution(len(cols), cols, values)
+
+    def _on_incumbent(self, event):
+        if self.first_feasible_s is None:
+            self.first_feasible_s = event.data_out.running_time
+        if self.events is not None:
+            self.events.emit("incumbent", event.data_out.running_time,
+                             event.data_out.objective_function_value,
+                             event.data_out.mip_dual_bound)
+
+    def _solve(self, timer):
+        self.first_feasible_s = None
+        has_values = any(v.value is not None for v, *_ in self._vars.values())
+        if self.warm_start and self._solver_model is not None and has_values:
+            self._set_start()
+        callback = self._solver_model.cbMipImprovingSolution
+        callback.subscribe(self._on_incumbent)
+        try:
+            return super()._solve(timer)
+        finally:
+            callback.unsubscribe(self._on_incumbent)
+
+
+def _appsi_highs(options: dict) -> appsi.solvers.Highs:
+    solver = WarmStartHighs()
+    solver.config.mip_gap = options["gap"]
+    solver.highs_options['threads'] = options["threads"]
+    solver.config.time_limit = options["time_limit"]
+    if options["seed"] is not None:
+        solver.highs_options['random_seed'] = options["seed"]
+    return solver
+
+
+# appsi timer names for each stage
+APPSI_STAGES = {
+    "write": ["write lp file", "set_instance", "update"],
+    "solve": ["subprocess", "optimize"],
+    "load": ["parse solution", "load solution"],
+}
+
+def _solve_appsi(model: ConcreteModel, options: dict, make_solver,
+                 events: SolverEvents) -> dict:
+    """
+    Solve with a pyomo.contrib.appsi interface. HiGHS runs in-process through
+    highspy, so the model never goes through a file.
+    """
+    solver = make_solver(options)
+    if not solver.available():
+        raise RuntimeError(f"Solver {type(solver).__name__} is not available")
+    # Keep a feasible but not proven optimal solution rather than raising
+    solver.config.load_solution = False
+
+    # Only HiGHS takes a MIP start through appsi
+    warm_start = _warm_start(model) and isinstance(solver, WarmStartHighs)
+    if isinstance(solver, WarmStartHighs):
+        solver.warm_start = warm_start
+        solver.events = events
+        solver.config.stream_solver = options["tee"]
+        stream = contextlib.nullcontext()
+    else:
+        # CBC's output is parsed for events, and echoed if tee
+        solver.config.stream_solver = True
+        stream = _stream_cbc_log(model, events, options["tee"])
+
+    timer = HierarchicalTimer()
+    with stream as log:
+        results = solver.solve(model, timer=timer)
+    if results.best_feasible_objective is not None:
+        timer.start("load solution")
+        results.solution_loader.load_vars()
+        timer.stop("load solution")
+    stats = {"feasible": results.best_feasible_objective is not None, "warm_start": warm_start}
+    stats.update({
+        f"{stage}_s": sum(timer.timers[name].total_time for name in names if name in timer.timers)
+        for stage, names in APPSI_STAGES.items()
+    })
+    stats["first_feasible_s"] = getattr(solver, "first_feasible_s", None)
+    stats["termination"] = results.termination_condition.name
+    stats.update(_highs_summary(solver) if log is None else log.summary)
+    return stats
+
+
+def _highs_summary(solver: WarmStartHighs) -> dict:
+    """
+    Presolved size, node count and final bound of a HiGHS solve, like the
+    summary of a CBC log. HiGHS drops its presolved MIP once solved, so this
+    presolves again (a fraction of the solve) after the solution is loaded.
+    """
+    highs = solver._solver_model
+    info = highs.getInfo()
+    summary = {"nodes": int(info.mip_node_count), "bound": float(info.mip_dual_bound)}
+    highs.setOptionValue("output_flag", False)
+    highs.presolve()
+    presolved = highs.getPresolvedLp()
+    summary["presolved_rows"] = int(presolved.num_row_)
+    summary["presolved_columns"] = int(presolved.num_col_)
+    return summary
+
+
+# Backend name -> function(model, options) -> stats
+SOLVER_BACKENDS = {
+    "cbc": partial(_solve_shell, solver_io="lp"),
+    "cbc_nl": partial(_solve_shell, solver_io="nl"),
+    "appsi_cbc": partial(_solve_appsi, make_solver=_appsi_cbc),
+    "highs": partial(_solve_appsi, make_solver=_appsi_highs),
+}
+
+DEFAULT_SOLVER_OPTIONS = {
+    "backend": "cbc",
+    "threads": 4,
+    "gap": 0.01,
+    "time_limit": None,
+    "seed": None,
+    "tee": True,
+    "on_event": None,
+}
+
+
+def day_solver_options(solver_options: dict, day: str) -> dict:
+    """
+    Solver options for one day: DEFAULT_SOLVER_OPTIONS, updated with
+    solver_options, then with solver_options["days"][day] if there is one.
+    """
+    options = {**DEFAULT_SOLVER_OPTIONS, **(solver_options or {})}
+    overrides = (options.pop("days", None) or {}).get(day, {})
+    return {**options, **overrides}
+
+
+def run_backend(model: ConcreteModel, solver_options: dict = None) -> dict:
+    """
+    Solve the model with the backend named in solver_options.
+
+    Args:
+        model (ConcreteModel): The Pyomo model to be solved.
+        solver_options (dict): backend, threads, gap, time_limit (seconds),
+            seed, tee and on_event (called with each SolverEvents event), plus
+            per-day overrides under days, e.g. {"Mon": {"time_limit": 60}}.
+            Missing keys take their value from DEFAULT_SOLVER_OPTIONS.
+
+    Returns:
+        dict: backend, whether a warm start was passed, per-stage wall-clock
+            times (write_s, solve_s, load_s), seconds to the first incumbent
+            (None if unknown), termination condition, objective value (None if
+            the solver stopped before finding a schedule), the incumbent
+            events and, where the solver reports them, its presolved size
+            (presolved_rows, presolved_columns), branch-and-bound nodes and
+            final bound.
+    """
+    options = day_solver_options(solver_options, model.DAY)
+    backend = options["backend"]
+    if backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver backend {backend!r}; "
+                         f"expected one of {sorted(SOLVER_BACKENDS)}")
+    events = SolverEvents(model.DAY, backend, options["on_event"])
+    stats = SOLVER_BACKENDS[backend](model, options, events=events)
+    feasible = stats.pop("feasible")
+    return {
+        "backend": backend,
+        **stats,
+        "objective": value(model.objective, exception=False) if feasible else None,
+        "incumbents": events.incumbents,
+    }
@@ -0,0 +1,212 @@
+import logging
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+import pandas as pd
+from pyomo.environ import ConcreteModel
+
+from .constraints import (
+    add_lunch_constraints,
+    add_lunch_switch_constraints,
+    add_one_place_per_time_constraint,
+    add_staff_child_constraints,
+    add_unavailability_constraints,
+    center_hours_constraints,
+)
+from .heuristic import fix_lunch_starts
+from .indicators import add_child_2_staff_indicator, add_switch_indicator
+from .objective import add_objective
+from .setup import setup_decision_variables
+from .solve import load_cached_solution
+from .symmetry import add_symmetry_breaking
+from .times import BLOCK_MINUTES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Builder:
+    """
+    One step of build_model.
+
+    Attributes:
+        name (str): Name used in BUILD_STATS.
+        func (Callable): Takes the model plus the build arguments named in args
+            and returns the model.
+        switch (str): constraint_on_off key that turns the step on or off.
+            None for steps that always run (or check several switches themselves).
+        args (tuple[str, ...]): build_model arguments passed to func, in order.
+    """
+    name: str
+    func: Callable[..., ConcreteModel]
+    switch: str = None
+    args: tuple[str, ...] = ("constraint_on_off",)
+
+
+# Run in order by build_model. Constraints first, then the indicators, which
+# read the fixed variables (and the rows that tie constraints to them), then
+# the objective, which uses the indicators.
+MODEL_BUILDERS = [
+    Builder("center_hours", center_hours_constraints, "center_hours"),
+    Builder("staff_child", add_staff_child_constraints, "staff_child"),
+    Builder("one_place_per_time", add_one_place_per_time_constraint, "one_place_per_time"),
+    Builder("lunch", add_lunch_constraints, "lunch",
+            args=("constraint_on_off", "formulation")),
+    Builder("unavailability", add_unavailability_constraints),
+    # Reads the variables fixed above
+    Builder("lunch_starts", fix_lunch_starts, "lunch",
+            args=("constraint_on_off", "formulation", "reward_for_child_staff_role")),
+    # Compares the variables left free above
+    Builder("symmetry", add_symmetry_breaking,
+            args=("reward_for_child_staff_role", "formulation")),
+    # Assessments, 1:1 trainings and admin (TBC) go here
+    Builder("child_2_staff_indicator", add_child_2_staff_indicator, args=()),
+    Builder("switch_indicator", add_switch_indicator, args=("formulation",)),
+    Builder("lunch_switches", add_lunch_switch_constraints, "lunch",
+            args=("constraint_on_off", "formulation")),
+    Builder("objective", add_objective, args=("reward_for_child_staff_role",)),
+]
+
+
+def register_builder(builder: Builder, before: str = None) -> None:
+    """
+    Add a step to MODEL_BUILDERS, at the end or before the named step.
+
+    Args:
+        builder (Builder): The step to add.
+        before (str): Name of the step to insert it before, e.g. "objective".
+    """
+    names = [b.name for b in MODEL_BUILDERS]
+    if builder.name in names:
+        raise ValueError(f"Model builder {builder.name!r} is already registered")
+    position = len(MODEL_BUILDERS) if before is None else names.index(before)
+    MODEL_BUILDERS.insert(position, builder)
+
+
+# How each constraint is written, where there is more than one way
+DEFAULT_FORMULATION = {
+    "lunch": "window",
+    "lunch_minutes": 30,
+    "lunch_starts": "heuristic",
+    "switch": "aggregated",
+    "symmetry": "none",
+}
+
+
+def build_model(model: ConcreteModel,
+                constraint_on_off: dict,
+                reward_for_child_staff_role: dict,
+                trace_memory: bool = False,
+                formulation: dict = None) -> ConcreteModel:
+    """
+    Add the constraints, indicators and objective to a set-up model by running
+    MODEL_BUILDERS in order.
+
+    A model whose schedule came from the solution cache (CACHE_HIT) is left
+    unbuilt.
+
+    Each step's wall-clock time, constraint count and, if trace_memory,
+    allocated and peak memory (tracemalloc, which slows the build down) go
+    into one record, logged and stored in model.BUILD_STATS.
+
+    Args:
+        model (ConcreteModel): The model from setup_decision_variables.
+        constraint_on_off (dict): Which constraints to add.
+        reward_for_child_staff_role (dict): Objective reward per role.
+        trace_memory (bool): Whether to measure memory per step.
+        formulation (dict): How to write the constraints that have more than
+            one form. Missing keys come from DEFAULT_FORMULATION.
+
+    Returns:
+        ConcreteModel: The model, ready to solve.
+    """
+    kwargs = {
+        "constraint_on_off": constraint_on_off,
+        "reward_for_child_staff_role": reward_for_child_staff_role,
+        "formulation": {**DEFAULT_FORMULATION, **(formulation or {})},
+    }
+    if getattr(model, "CACHE_HIT", False):
+        # The schedule came from the cache, see load_cached_solution
+        model.BUILD_ARGS = kwargs
+        model.BUILD_STATS = {"day": model.DAY, "total_s": 0.0, "steps": [], "cache": "hit"}
+        logger.info("Skipped building %s: solution from cache", model.DAY)
+        return model
+
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    steps = []
+    build_start = time.perf_counter()
+    try:
+        for builder in MODEL_BUILDERS:
+            if builder.switch is not None and not constraint_on_off[builder.switch]:
+                steps.append({"name": builder.name, "skipped": True})
+                continue
+            n_constraints = model.nconstraints()
+            if trace_memory:
+                tracemalloc.reset_peak()
+                mem_before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            model = builder.func(model, *(kwargs[arg] for arg in builder.args))
+            step = {
+                "name": builder.name,
+                "skipped": False,
+                "seconds": time.perf_counter() - start,
+                "constraints": model.nconstraints() - n_constraints,
+            }
+            if trace_memory:
+                mem_after, peak = tracemalloc.get_traced_memory()
+                step["alloc_mb"] = (mem_after - mem_before) / 2**20
+                step["peak_mb"] = (peak - mem_before) / 2**20
+            steps.append(step)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    # What the model was built from, e.g. for the solution cache key
+    model.BUILD_ARGS = kwargs
+    model.BUILD_STATS = {
+        "day": model.DAY,
+        "total_s": time.perf_counter() - build_start,
+        "steps": steps,
+    }
+    logger.info("Built %s: %s", model.DAY, model.BUILD_STATS)
+    return model
+
+
+def build_day_model(center_hours: pd.DataFrame,
+                    staff_child: pd.DataFrame,
+                    absences: pd.DataFrame,
+                    roles: pd.DataFrame,
+                    day: str,
+                    params: dict,
+                    allowed: pd.DataFrame = None,
+                    cached: dict = None) -> ConcreteModel:
+    """
+    Build one day's model in-process, as the data science pipeline does,
+    up to the objective.
+
+    Args:
+        center_hours, staff_child, absences, roles (pd.DataFrame): The input sheets.
+        day (str): Day of the week, e.g. "Mon".
+        params (dict): The project parameters.
+        allowed (pd.DataFrame): Optional restriction of the assignments, see
+            setup_decision_variables.
+        cached (dict): The day's solution cache lookup, see
+            lookup_cached_solution. On a hit the model is left unbuilt.
+
+    Returns:
+        ConcreteModel: The model, ready to solve.
+    """
+    model = setup_decision_variables(center_hours, staff_child, absences, roles, day,
+                                     params["constraint_on_off"],
+                                     params.get("prune_variables", False),
+                                     params.get("block_minutes", BLOCK_MINUTES), allowed)
+    model = load_cached_solution(model, cached)
+    return build_model(model, params["constraint_on_off"],
+                       params["reward_for_child_staff_role"],
+                       params.get("trace_build_memory", False),
+                       params.get("formulation"))
@@ -1,134 +1,75 @@
+import math
+from itertools import repeat
+
+import numpy as np
 import pandas as pd
 from pyomo.environ import (
     ConcreteModel, Var, Constraint, Objective, SolverFactory, Set, Binary,
     ConstraintList, maximize
 )
 
+from .availability import (
+    ABSENCE_TYPES, _center_closed_positions, _unavailable_intervals, _unavailable_positions
+)
+from .expressions import linear_sum
 from .setup import _24h_time_to_index, _index_to_24h_time
 
 
-def _clean_start_end(model: ConcreteModel, row: pd.Series) -> tuple[int, int]:
-    start = row["Start"]
-    end = row["End"]
-    # Can be floats (e.g. 12.5 for 12:30)
-    # or times like 12:30
-    try:
-        start = float(start) * 2
-        end = float(end) * 2
-        start, end= int(start), int(end)
-    except ValueError:
-        if start is None or pd.isna(start):
-            start = min(model.TIME_BLOCKS)
-        else:
-            start = _24h_time_to_index(start)
-        if end is None or pd.isna(end):
-            end = max(model.TIME_BLOCKS)
-        else:
-            end = _24h_time_to_index(end)
-
-    # Also make sure these do not exceed time blocks
-    start = max(start, min(model.TIME_BLOCKS))
-    end = min(end, max(model.TIME_BLOCKS))
-    return int(start), int(end)
+# Lunch is taken between these times (24h)
+LUNCH_START = 11.5
+LUNCH_END = 14
 
-def add_pto_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
-    if not constraint_on_off["pto"]:
-        return model
-    pto = model.ABSENCES.pipe(lambda x: x[x.Type == "pto"])[["Name", "Day", "Start", "End"]]
-    for _, row in pto.iterrows():
-        start, end = _clean_start_end(model, row)
-        if start >= end:
-            continue
-        df = model.INDEX_DF[(model.INDEX_DF["Time Block"] >= start) & (model.INDEX_DF["Time Block"] < end)]
-        df = df[df["Staff"] == row["Name"]]
-        for _, row in df.iterrows():
-            model.X[row["Time Block"], row["Child"], row["Staff"]].fix(0)
+
+# Absences -------------------------------------------------------------------
+
+def _fix_positions(model: ConcreteModel, positions: np.ndarray) -> ConcreteModel:
+    """
+    Fix to 0 the decision variables at the given INDEX_DF row positions.
+    """
+    for pos in positions:
+        model.X_LIST[pos].fix(0)
     return model
 
+def add_unavailability_constraints(model: ConcreteModel, constraint_on_off: dict, 
+                                   keys: list[str] = None) -> ConcreteModel:
+    """
+    Fix to 0 every variable that falls in an absence, in one batch.
+
+    Covers PTO, parent training, team meetings, naps, speech therapy and
+    late arrivals / early departures. Each type still has its own switch
+    in constraint_on_off.
+
+    Args:
+        model (ConcreteModel): The Pyomo model to which the constraints will be added.
+        constraint_on_off (dict): Constraint switches.
+        keys (list[str]): ABSENCE_TYPES keys to apply. Defaults to all of them.
+
+    Returns:
+        ConcreteModel: The model with the constraints added.
+    """
+    intervals = _unavailable_intervals(model, constraint_on_off, keys)
+    return _fix_positions(model, _unavailable_positions(model.INDEX_DF, intervals))
+
+def add_pto_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
+    return add_unavailability_constraints(model, constraint_on_off, ["pto"])
+
 def add_parent_training_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
-    if not constraint_on_off["parent_training"]:
-        return model
-    model.parent_training_constraints = ConstraintList()
-    parent_training = model.ABSENCES.pipe(lambda x: x[x.Type.str.title() == "Parent Training"])[["Name", "Day", "Start", "End"]]
-    for _, row in parent_training.iterrows():
-        start, end = _clean_start_end(model, row)
-        df = model.INDEX_DF[(model.INDEX_DF["Time Block"] >= start) & (model.INDEX_DF["Time Block"] < end)]
-        df = df[df["Child"] == row["Name"]]
-        for _, row in df.iterrows():
-            model.X[row["Time Block"], row["Child"], row["Staff"]].fix(0)
-    return model
+    return add_unavailability_constraints(model, constraint_on_off, ["parent_training"])
 
 def add_team_meeting_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
-    if not constraint_on_off["team_meeting"]:
-        return model
-    model.team_meeting_constraints = ConstraintList()
-    team_meeting = model.ABSENCES.pipe(lambda x: x[x.Type.str.title() == "Team Meeting"])[["Name", "Day", "Start", "End"]]
-    for _, row in team_meeting.iterrows():
-        start, end = _clean_start_end(model, row)
-        if start >= end:
-            continue
-        df = model.INDEX_DF[(model.INDEX_DF["Time Block"] >= start) & (model.INDEX_DF["Time Block"] < end)]
-        for _, row in df.iterrows():
-            model.X[row["Time Block"], row["Child"], row["Staff"]].fix(0)
-    return model
+    return add_unavailability_constraints(model, constraint_on_off, ["team_meeting"])
 
 def add_nap_time_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
-    if not constraint_on_off["nap_time"]:
-        return model
-    model.nap_time_constraints = ConstraintList()
-    nap_rows = model.ABSENCES.pipe(lambda x: x[x.Type.str.title() == "Nap"])[["Name", "Day", "Start", "End"]]
-    for _, row in nap_rows.iterrows():
-        start, end = _clean_start_end(model, row)
-        if start >= end:
-            continue
-        df = model.INDEX_DF[(model.INDEX_DF["Time Block"] >= start) & (model.INDEX_DF["Time Block"] < end)]
-        df = df[df["Child"] == row["Name"]]
-        for _, row in df.iterrows():
-            model.X[row["Time Block"], row["Child"], row["Staff"]].fix(0)
-    return model
+    return add_unavailability_constraints(model, constraint_on_off, ["nap_time"])
 
 def add_speech_therapy_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
-    if not constraint_on_off["speech_therapy"]:
-        return model
-    model.speech_constraints = ConstraintList()
-    speech_therapy = model.ABSENCES.pipe(lambda x: x[x.Type.str.title() == "Speech"])[["Name", "Day", "Start", "End"]]
-    for _, row in speech_therapy.iterrows():
-        start, end = _clean_start_end(model, row)
-        if start >= end:
-            continue
-        df = model.INDEX_DF[(model.INDEX_DF["Time Block"] >= start) & (model.INDEX_DF["Time Block"] < end)]
-        df = df[df["Child"] == row["Name"]]
-        for _, row in df.iterrows():
-            model.X[row["Time Block"], row["Child"], row["Staff"]].fix(0)
-    return model
+    return add_unavailability_constraints(model, constraint_on_off, ["speech_therapy"])
 
 def add_arrival_departure_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
     """
     Take kids who arrive late and leave early into account
     """
-    if not constraint_on_off["arrival_departure"]:
-        return model
-    arr_dep = (
-        model.ABSENCES
-        .pipe(lambda x: x[x.Type.isin(["late arrival", "leaves early"])])
-        [["Name", "Start", "End"]]
-    )
-    model.arrival_departure_constraints = ConstraintList()
-    for _, row in arr_dep.iterrows():
-        start, end = _clean_start_end(model, row)
-        if start >= end:
-            continue
-        for i in range(start, end):
-            df = model.INDEX_DF[(model.INDEX_DF["Time Block"] == i) & (model.INDEX_DF["Child"] == row["Name"])]
-            for staff in df.Staff:
-                model.X[i, row["Name"], staff].fix(0)
-
-        #model.arrival_departure_constraints.add(
-        #    expr=sum(model.X[i, row["Name"], staff]
-        #             for staff in model.STAFF
-        #             for i in range(start, end)) == 0
-        #)
-    return model
+    return add_unavailability_constraints(model, constraint_on_off, ["arrival_departure"])
 
 def center_hours_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
     """
@@ -142,16 +83,7 @@ def center_hours_constraints(model: ConcreteModel, constraint_on_off: dict) -> C
     """
     if not constraint_on_off["center_hours"]:
         return model
-    model.center_hours_constraints = ConstraintList()
-    for _, row in model.CENTER_HOURS.iterrows():
-        day = row["Day"]
-        start_time = _24h_time_to_index(row["Open"])
-        end_time = _24h_time_to_index(row["Close"])
-        for time_block, df in model.INDEX_DF.groupby("Time Block"):
-            if time_block < start_time or time_block >= end_time:
-                for _, row in df.iterrows():
-                    model.X[time_block, row["Child"], row["Staff"]].fix(0)
-    return model
+    return _fix_positions(model, _center_closed_positions(model.INDEX_DF, model.CENTER_HOURS))
 
 def add_staff_child_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
     if not constraint_on_off["staff_child"]:
@@ -183,40 +115,193 @@ def add_one_place_per_time_constraint(model: ConcreteModel, constraint_on_off: d
     if not constraint_on_off["one_place_per_time"]:
         return model
     model.one_place_per_time = ConstraintList()
-    for (time_block, staff), df in model.INDEX_DF.groupby(["Time Block", "Staff"]):
+    for _, positions in model.INCIDENCE.time_staff:
         model.one_place_per_time.add(
-            expr=sum(model.X[time_block, child, staff]
-                        for child in df.Child) <= 1
+            expr=linear_sum(model.X_LIST[p] for p in positions) <= 1
+        )
+    return model
+
+
+def _lunch_window(model: ConcreteModel) -> pd.DataFrame:
+    """
+    (Time Block, Staff) groups of X in the lunch window, with their positions.
+    """
+    lunch_start = _24h_time_to_index(LUNCH_START, model.BLOCKS_PER_HOUR)
+    lunch_end = _24h_time_to_index(LUNCH_END, model.BLOCKS_PER_HOUR)
+    groups = model.INCIDENCE.time_staff
+    keys = groups.keys.assign(Group=range(len(groups)))
+    return keys[(keys["Time Block"] >= lunch_start) & (keys["Time Block"] < lunch_end)]
+
+
+def _add_lunch_legacy(model: ConcreteModel) -> ConcreteModel:
+    """
+    Each staff member is free for at least one block between LUNCH_START and
+    LUNCH_END: one row per staff over the whole window.
+    """
+    span = (_24h_time_to_index(LUNCH_END, model.BLOCKS_PER_HOUR)
+            - _24h_time_to_index(LUNCH_START, model.BLOCKS_PER_HOUR))
+    groups = model.INCIDENCE.time_staff
+    model.lunch_constraints = ConstraintList()
+    for _, window in _lunch_window(model).groupby("Staff", sort=False):
+        positions = np.concatenate([groups.indices[groups.indptr[g]:groups.indptr[g + 1]]
+                                    for g in window["Group"]])
+        model.lunch_constraints.add(
+            expr=linear_sum(model.X_LIST[p] for p in positions) <= span - 1
+        )
+    return model
+
+
+def _add_lunch_window(model: ConcreteModel, lunch_minutes: int) -> ConcreteModel:
+    """
+    Each staff member takes one break of at least lunch_minutes, in whole
+    consecutive blocks, that starts and ends between LUNCH_START and LUNCH_END.
+
+    lunch_start[staff, start] is one-hot per staff, and every (block, staff)
+    in the window gets one row: the staff's X at that block plus the starts
+    whose break covers it is at most 1. That is a clique row, so the LP
+    relaxation already spreads one whole break per staff across the window.
+    """
+    lunch_blocks = math.ceil(lunch_minutes * model.BLOCKS_PER_HOUR / 60)
+    first = _24h_time_to_index(LUNCH_START, model.BLOCKS_PER_HOUR)
+    last = _24h_time_to_index(LUNCH_END, model.BLOCKS_PER_HOUR)
+    starts = list(range(first, last - lunch_blocks + 1))
+    if not starts:
+        raise ValueError(f"A {lunch_minutes}-minute lunch doesn't fit between "
+                         f"{LUNCH_START} and {LUNCH_END}")
+    window = _lunch_window(model)
+    staff = list(dict.fromkeys(window["Staff"]))
+    model.LUNCH = {"staff": staff, "starts": starts, "blocks": lunch_blocks}
+    model.lunch_start = Var(staff, starts, within=Binary)
+    model.lunch_one_start = Constraint(
+        staff, rule=lambda m, s: linear_sum(m.lunch_start[s, t] for t in starts) == 1)
+
+    groups = model.INCIDENCE.time_staff
+    model.lunch_constraints = ConstraintList()
+    for time_block, s, g in zip(window["Time Block"], window["Staff"], window["Group"]):
+        covering = [model.lunch_start[s, t] for t in starts
+                    if t <= time_block < t + lunch_blocks]
+        positions = groups.indices[groups.indptr[g]:groups.indptr[g + 1]]
+        model.lunch_constraints.add(
+            expr=linear_sum([*(model.X_LIST[p] for p in positions), *covering]) <= 1
         )
     return model
 
 
-def add_lunch_constraints(model: ConcreteModel, constraint_on_off: dict) -> ConcreteModel:
+def _fixed_lunch_start(model: ConcreteModel, staff: str) -> int:
     """
-    Add constraints to ensure that lunch is scheduled for each staff member between 12 and 2.
+    The staff member's lunch start if fix_lunch_starts fixed it, else None.
+    """
+    for t in model.LUNCH["starts"]:
+        var = model.lunch_start[staff, t]
+        if var.fixed and var.value == 1:
+            return t
+    return None
+
+
+def add_lunch_switch_constraints(model: ConcreteModel, constraint_on_off: dict,
+                                 formulation: dict) -> ConcreteModel:
+    """
+    Tighten the window lunch form: anyone who works the block before the lunch
+    window and the block after it leaves a child and comes back within it, so
+    switches at least twice there.
+
+    Without these rows, the LP relaxation takes a fraction of every block off
+    for lunch and never pays for the switches around a real break.
+    Needs z_switch, so it runs after add_switch_indicator.
+
+    Where fix_lunch_starts has fixed the break, the return is known to be at
+    its last block, so the row says that instead: whoever works the block
+    after the break switched into it. Leaving for the break needs no row,
+    the switch indicator's stop row already charges it. The row is tighter
+    than the one over the window and keeps the solve with lunch about as
+    fast as without.
 
     Args:
         model (ConcreteModel): The Pyomo model to which the constraints will be added.
+        constraint_on_off (dict): Constraint switches.
+        formulation (dict): Only applies to the "window" lunch form.
 
     Returns:
         ConcreteModel: The model with the constraints added.
     """
-    if not constraint_on_off["lunch"]:
+    if not constraint_on_off["lunch"] or formulation["lunch"] != "window":
         return model
-    # Define the lunch time range
-    lunch_start = _24h_time_to_index(11.5)
-    lunch_end = _24h_time_to_index(14)
-    span = lunch_end - lunch_start
+    before = _24h_time_to_index(LUNCH_START, model.BLOCKS_PER_HOUR) - 1
+    after = _24h_time_to_index(LUNCH_END, model.BLOCKS_PER_HOUR)
+    groups = model.INCIDENCE.time_staff
+    group = {key: g for g, key in enumerate(groups.keys.itertuples(index=False, name=None))}
 
-    model.lunch_constraints = ConstraintList()
-    for staff, df in model.INDEX_DF.groupby("Staff"):
-        time_range_req = [x for x in list(range(lunch_start, lunch_end))
-                          if x in model.TIME_BLOCKS]
-        if len(time_range_req) == 0:
+    def busy(time_block: int, staff: str) -> np.ndarray:
+        g = group[time_block, staff]
+        return groups.indices[groups.indptr[g]:groups.indptr[g + 1]]
+
+    model.lunch_switch_constraints = ConstraintList()
+    for staff in model.LUNCH["staff"]:
+        start = _fixed_lunch_start(model, staff)
+        if start is not None:
+            # z_switch[t] is the change between t and t + 1
+            end = start + model.LUNCH["blocks"]
+            if (end, staff) in group and (end - 1, staff) in model.z_switch:
+                positions = busy(end, staff)
+                model.lunch_switch_constraints.add(
+                    expr=linear_sum([model.z_switch[end - 1, staff],
+                                     *(model.X_LIST[p] for p in positions)],
+                                    [1, *repeat(-1, len(positions))]) >= 0
+                )
             continue
-        model.lunch_constraints.add(
-                expr=sum(model.X[time_block, child, staff]
-                         for time_block in time_range_req
-                         for child in df.Child.unique()) <= span - 1
-            )
+        if (before, staff) not in group or (after, staff) not in group:
+            continue
+        # sum(z over the window) >= 2 * (busy before + busy after - 1)
+        positions = np.concatenate([busy(before, staff), busy(after, staff)])
+        switches = [model.z_switch[t, staff] for t in range(before, after)
+                    if (t, staff) in model.z_switch]
+        model.lunch_switch_constraints.add(
+            expr=linear_sum([*switches, *(model.X_LIST[p] for p in positions)],
+                            [*repeat(1, len(switches)), *repeat(-2, len(positions))]) >= -2
+        )
     return model
+
+
+def set_lunch_start_values(model: ConcreteModel, x: np.ndarray) -> ConcreteModel:
+    """
+    Give each staff member the earliest lunch start whose break is free in x
+    (X values aligned with INDEX_DF), e.g. to complete a MIP start. Fixed
+    lunch starts are left as they are.
+    """
+    starts, lunch_blocks = model.LUNCH["starts"], model.LUNCH["blocks"]
+    assigned = model.INDEX_DF[x > 0.5]
+    busy = set(zip(assigned["Time Block"], assigned["Staff"].astype(str)))
+    for s in model.LUNCH["staff"]:
+        if model.lunch_start[s, starts[0]].fixed:
+            continue
+        free = [t for t in starts
+                if not any((b, s) in busy for b in range(t, t + lunch_blocks))]
+        for t in starts:
+            model.lunch_start[s, t].set_value(int(t == (free or starts)[0]))
+    return model
+
+
+def add_lunch_constraints(model: ConcreteModel, constraint_on_off: dict,
+                          formulation: dict) -> ConcreteModel:
+    """
+    Add constraints to ensure that lunch is scheduled for each staff member between
+    LUNCH_START and LUNCH_END.
+
+    Args:
+        model (ConcreteModel): The Pyomo model to which the constraints will be added.
+        constraint_on_off (dict): Constraint switches.
+        formulation (dict): lunch is "legacy" (free for at least one block in
+            the window) or "window" (one break of lunch_minutes, rounded up
+            to whole blocks, with explicit start variables).
+
+    Returns:
+        ConcreteModel: The model with the constraints added.
+    """
+    if not constraint_on_off["lunch"]:
+        return model
+    if formulation["lunch"] == "legacy":
+        return _add_lunch_legacy(model)
+    if formulation["lunch"] == "window":
+        return _add_lunch_window(model, formulation["lunch_minutes"])
+    raise ValueError(f"Unknown lunch formulation {formulation['lunch']!r}; "
+                     "expected 'legacy' or 'window'")
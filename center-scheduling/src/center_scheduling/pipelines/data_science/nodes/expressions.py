@@ -0,0 +1,23 @@
+from typing import Iterable
+
+from pyomo.core.expr import LinearExpression, MonomialTermExpression
+
+
+def linear_sum(variables: Iterable, coefs: Iterable[float] = None) -> LinearExpression:
+    """
+    Build sum(coef * var) as one flat LinearExpression.
+
+    Python's sum() over variables, scaled and combined with other sums, builds
+    nested expression trees that are slow to build and slow to write out.
+
+    Args:
+        variables (Iterable): Pyomo variables.
+        coefs (Iterable[float]): One coefficient per variable. Defaults to 1.
+
+    Returns:
+        LinearExpression: The weighted sum.
+    """
+    if coefs is None:
+        return LinearExpression(list(variables))
+    return LinearExpression([v if c == 1 else MonomialTermExpression((float(c), v))
+                             for c, v in zip(coefs, variables)])
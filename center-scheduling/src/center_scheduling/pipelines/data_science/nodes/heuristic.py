@@ -0,0 +1,356 @@
+import logging
+import time
+
+import numpy as np
+from pyomo.environ import ConcreteModel
+
+from .constraints import LUNCH_END, LUNCH_START
+from .indicators import set_indicator_values
+from .objective import CHILD_2_STAFF_PENALTY, SWITCH_PENALTY, _role_rewards
+from .times import _24h_time_to_index
+
+logger = logging.getLogger(__name__)
+
+
+class _Schedule:
+    """
+    A day's schedule as arrays, with the bookkeeping to score a change to one
+    (staff, block) without re-scoring the day.
+
+    Attributes:
+        position (np.ndarray): [staff, block, child] -> INDEX_DF row, -1 where
+            the assignment isn't available (pruned, fixed to 0 or absent).
+        reward (np.ndarray): Role reward per staff.
+        assign (np.ndarray): [staff, block] -> child code, -1 when unassigned.
+        n_staff (np.ndarray): [block, child] -> number of staff with the child.
+    """
+
+    def __init__(self, position: np.ndarray, reward: np.ndarray):
+        n_staff, n_blocks, n_children = position.shape
+        self.position = position
+        self.reward = reward
+        self.assign = np.full((n_staff, n_blocks), -1)
+        self.n_staff = np.zeros((n_blocks, n_children), dtype=int)
+
+    def allowed(self, staff: int, block: int, child: int) -> bool:
+        """
+        Whether staff can take child (-1: nobody) at block, given everyone else.
+        """
+        current = self.assign[staff, block]
+        if child < 0 or child == current:
+            return True
+        return self.position[staff, block, child] >= 0 and self.n_staff[block, child] < 2
+
+    def _switches(self, staff: int, block: int, child: int) -> int:
+        row = self.assign[staff]
+        return (int(block > 0 and row[block - 1] != child)
+                + int(block < len(row) - 1 and row[block + 1] != child))
+
+    def gain(self, staff: int, block: int, child: int) -> float:
+        """
+        Change in the day's objective if staff moves to child at block.
+        """
+        current = self.assign[staff, block]
+        if child == current:
+            return 0.0
+        delta = self.reward[staff] * (int(child >= 0) - int(current >= 0))
+        if current >= 0 and self.n_staff[block, current] == 2:
+            delta += CHILD_2_STAFF_PENALTY
+        if child >= 0 and self.n_staff[block, child] == 1:
+            delta -= CHILD_2_STAFF_PENALTY
+        delta -= SWITCH_PENALTY * (self._switches(staff, block, child)
+                                   - self._switches(staff, block, current))
+        return delta
+
+    def swap_gain(self, staff1: int, staff2: int, block: int) -> float:
+        """
+        Change in the day's objective if two staff swap children at block.
+        Both stay assigned and each child keeps its number of staff, so only
+        the two staff's switches into and out of block change.
+        """
+        a, b = self.assign[staff1, block], self.assign[staff2, block]
+        switches = (self._switches(staff1, block, b) - self._switches(staff1, block, a)
+                    + self._switches(staff2, block, a) - self._switches(staff2, block, b))
+        return -SWITCH_PENALTY * switches
+
+    def move(self, staff: int, block: int, child: int) -> None:
+        current = self.assign[staff, block]
+        if current >= 0:
+            self.n_staff[block, current] -= 1
+        if child >= 0:
+            self.n_staff[block, child] += 1
+        self.assign[staff, block] = child
+
+    def objective(self) -> float:
+        assigned = self.assign >= 0
+        switches = (self.assign[:, :-1] != self.assign[:, 1:]).sum()
+        return float((self.reward[:, None] * assigned).sum()
+                     - CHILD_2_STAFF_PENALTY * (self.n_staff == 2).sum()
+                     - SWITCH_PENALTY * switches)
+
+
+def _lunch_starts(model: ConcreteModel) -> tuple[list[list[int]], int]:
+    """
+    For each staff member (by Staff code), the block offsets where their lunch
+    break can start, and its length in blocks. Nobody has starts if the model
+    has no lunch constraints.
+    """
+    staff = model.INDEX_DF["Staff"].cat.categories
+    first = min(model.TIME_BLOCKS)
+    if hasattr(model, "lunch_start"):
+        starts = {
+            s: [t - first for t in model.LUNCH["starts"]
+                if not model.lunch_start[s, t].fixed or model.lunch_start[s, t].value == 1]
+            for s in model.LUNCH["staff"]
+        }
+        return [starts.get(s, []) for s in staff], model.LUNCH["blocks"]
+    if hasattr(model, "lunch_constraints"):
+        # The legacy form: free for one block somewhere in the window
+        window = range(_24h_time_to_index(LUNCH_START, model.BLOCKS_PER_HOUR),
+                       _24h_time_to_index(LUNCH_END, model.BLOCKS_PER_HOUR))
+        return [[t - first for t in window] for _ in staff], 1
+    return [[] for _ in staff], 0
+
+
+def _schedule_for(model: ConcreteModel, reward_for_child_staff_role: dict) -> _Schedule:
+    """
+    Lay out the model's available assignments and rewards as a _Schedule.
+    """
+    index_df = model.INDEX_DF
+    staff = index_df["Staff"].cat.codes.to_numpy()
+    child = index_df["Child"].cat.codes.to_numpy()
+    blocks = index_df["Time Block"].to_numpy() - min(model.TIME_BLOCKS)
+    # Variables fixed or bounded to 0 by the constraints (or a what-if edit)
+    available = np.array([not v.fixed and v.ub != 0 for v in model.X_LIST])
+
+    position = np.full((len(index_df["Staff"].cat.categories), len(model.TIME_BLOCKS),
+                        len(index_df["Child"].cat.categories)), -1)
+    position[staff[available], blocks[available], child[available]] = np.flatnonzero(available)
+    reward = np.zeros(position.shape[0])
+    reward[staff] = _role_rewards(model, reward_for_child_staff_role)
+    return _Schedule(position, reward)
+
+
+def _construct(schedule: _Schedule) -> None:
+    """
+    Fill the day block by block. Staff choose in order of role reward: first
+    anyone who can stay with their child, then the rest, each taking the child
+    with the best gain and, among equals, the longest run ahead of them.
+    """
+    n_staff, n_blocks, n_children = schedule.position.shape
+    order = np.argsort(-schedule.reward, kind="stable")
+    for block in range(n_blocks):
+        previous = schedule.assign[:, block - 1] if block else np.full(n_staff, -1)
+        staying = [s for s in order if previous[s] >= 0]
+        for s in [*staying, *order]:
+            if schedule.assign[s, block] >= 0 or schedule.reward[s] <= 0:
+                continue
+            if s in staying and schedule.n_staff[block, previous[s]] == 0:
+                options = [previous[s]]
+            else:
+                options = np.flatnonzero(schedule.position[s, block] >= 0)
+            best, best_key = -1, (schedule.gain(s, block, -1), 0)
+            for c in options:
+                if not schedule.allowed(s, block, c):
+                    continue
+                ahead = schedule.position[s, block:, c] >= 0
+                run = int(ahead.argmin()) if not ahead.all() else len(ahead)
+                key = (schedule.gain(s, block, c), run)
+                if key > best_key:
+                    best, best_key = c, key
+            if best >= 0:
+                schedule.move(s, block, best)
+
+
+def _take_lunch(schedule: _Schedule, starts: list[list[int]], lunch_blocks: int) -> list:
+    """
+    Give each staff member the lunch break that costs the objective least, and
+    keep those blocks free from then on.
+
+    Returns:
+        list: Each staff member's break start (block offset), None if they have none.
+    """
+    n_blocks = schedule.assign.shape[1]
+    chosen = []
+    for s, staff_starts in enumerate(starts):
+        best, best_gain = None, -np.inf
+        for t in staff_starts:
+            blocks = [b for b in range(t, t + lunch_blocks) if 0 <= b < n_blocks]
+            kept = schedule.assign[s, blocks].copy()
+            gain = 0.0
+            for b in blocks:
+                gain += schedule.gain(s, b, -1)
+                schedule.move(s, b, -1)
+            for b, c in zip(blocks, kept):
+                schedule.move(s, b, c)
+            if gain > best_gain:
+                best, best_gain = t, gain
+        if best is not None:
+            for b in range(max(best, 0), min(best + lunch_blocks, n_blocks)):
+                schedule.move(s, b, -1)
+                schedule.position[s, b] = -1
+        chosen.append(best)
+    return chosen
+
+
+def _improve(schedule: _Schedule, max_passes: int) -> int:
+    """
+    Local search: move one staff at one block to another child (or none), and
+    swap the children of two staff at one block, while either improves the
+    objective. Each is scored by its change to the objective (see gain and
+    swap_gain), never by re-scoring the day.
+
+    Returns:
+        int: Passes made over the day.
+    """
+    n_staff, n_blocks, _ = schedule.position.shape
+    for passes in range(1, max_passes + 1):
+        improved = False
+        for block in range(n_blocks):
+            for s in range(n_staff):
+                for c in [-1, *np.flatnonzero(schedule.position[s, block] >= 0)]:
+                    if schedule.allowed(s, block, c) and schedule.gain(s, block, c) > 1e-9:
+                        schedule.move(s, block, c)
+                        improved = True
+            for s1 in range(n_staff):
+                for s2 in range(s1 + 1, n_staff):
+                    a, b = schedule.assign[s1, block], schedule.assign[s2, block]
+                    if (a < 0 or b < 0 or a == b or schedule.position[s1, block, b] < 0
+                            or schedule.position[s2, block, a] < 0):
+                        continue
+                    if schedule.swap_gain(s1, s2, block) > 1e-9:
+                        schedule.move(s1, block, b)
+                        schedule.move(s2, block, a)
+                        improved = True
+        if not improved:
+            return passes
+    return max_passes
+
+
+def heuristic_schedule(model: ConcreteModel,
+                       reward_for_child_staff_role: dict,
+                       max_passes: int = 10) -> ConcreteModel:
+    """
+    Schedule the day without a solver: a greedy construction that favours the
+    roles with the highest reward, lunch breaks where they cost least, then a
+    local search that removes switches and double staffing.
+
+    It uses the model's own INDEX_DF, the variables the constraints have fixed
+    to 0, the lunch constraints and the objective weights. It only ever assigns
+    a staff member to one child at a time and at most two staff per child, and
+    keeps a lunch break free for everyone. So the schedule is feasible for the
+    model and can be used as a MIP start.
+
+    Args:
+        model (ConcreteModel): The model, up to the objective.
+        reward_for_child_staff_role (dict): Objective reward per role.
+        max_passes (int): Most local search passes over the day.
+
+    Returns:
+        ConcreteModel: The model with X (and indicator) values set to the
+            schedule, and its objective and timings in HEURISTIC_STATS.
+    """
+    start = time.perf_counter()
+    schedule = _schedule_for(model, reward_for_child_staff_role)
+    _construct(schedule)
+    _take_lunch(schedule, *_lunch_starts(model))
+    construct_s = time.perf_counter() - start
+    constructed = schedule.objective()
+    passes = _improve(schedule, max_passes)
+
+    staff, block = np.nonzero(schedule.assign >= 0)
+    positions = schedule.position[staff, block, schedule.assign[staff, block]]
+    for var in model.X_LIST:
+        if not var.fixed:
+            var.set_value(0)
+    for pos in positions:
+        model.X_LIST[pos].set_value(1)
+    if hasattr(model, "z_switch"):
+        set_indicator_values(model)
+
+    model.HEURISTIC_STATS = {
+        "day": model.DAY,
+        "assigned": len(positions),
+        "constructed_objective": constructed,
+        "objective": schedule.objective(),
+        "passes": passes,
+        "construct_s": construct_s,
+        "total_s": time.perf_counter() - start,
+    }
+    logger.info("Heuristic schedule for %s: %s", model.DAY, model.HEURISTIC_STATS)
+    return model
+
+
+def fix_lunch_starts(model: ConcreteModel,
+                     constraint_on_off: dict,
+                     formulation: dict,
+                     reward_for_child_staff_role: dict) -> ConcreteModel:
+    """
+    With lunch_starts "heuristic", fix each staff member's lunch start to the
+    break that costs the greedy schedule least, and fix X to 0 during it.
+
+    The solver then only places everyone around known breaks, which keeps the
+    solve time close to lunch off at the price of a slightly worse schedule
+    than letting it choose ("free").
+
+    Args:
+        model (ConcreteModel): The model, with the window lunch form and
+            the other constraints that fix variables.
+        constraint_on_off (dict): Constraint switches.
+        formulation (dict): lunch and lunch_starts.
+        reward_for_child_staff_role (dict): Objective reward per role.
+
+    Returns:
+        ConcreteModel: The model with the lunch starts fixed.
+    """
+    if (not constraint_on_off["lunch"] or formulation["lunch"] != "window"
+            or formulation["lunch_starts"] == "free"):
+        return model
+    if formulation["lunch_starts"] != "heuristic":
+        raise ValueError(f"Unknown lunch_starts {formulation['lunch_starts']!r}; "
+                         "expected 'free' or 'heuristic'")
+    schedule = _schedule_for(model, reward_for_child_staff_role)
+    _construct(schedule)
+    chosen = _take_lunch(schedule, *_lunch_starts(model))
+
+    first, lunch_blocks = min(model.TIME_BLOCKS), model.LUNCH["blocks"]
+    staff_codes = {s: i for i, s in enumerate(model.INDEX_DF["Staff"].cat.categories)}
+    groups = model.INCIDENCE.time_staff
+    group = {key: g for g, key in enumerate(groups.keys.itertuples(index=False, name=None))}
+    for s in model.LUNCH["staff"]:
+        start = chosen[staff_codes[s]] + first
+        for t in model.LUNCH["starts"]:
+            model.lunch_start[s, t].fix(int(t == start))
+        for t in range(start, start + lunch_blocks):
+            if (t, s) in group:
+                g = group[t, s]
+                for pos in groups.indices[groups.indptr[g]:groups.indptr[g + 1]]:
+                    model.X_LIST[pos].fix(0)
+    return model
+
+
+def add_heuristic_start(model: ConcreteModel,
+                        reward_for_child_staff_role: dict,
+                        heuristic_start: bool) -> ConcreteModel:
+    """
+    Use the heuristic schedule as the MIP start, unless there is already a
+    warm start from a previous schedule or the schedule came from the cache.
+
+    Args:
+        model (ConcreteModel): The model from add_warm_start.
+        reward_for_child_staff_role (dict): Objective reward per role.
+        heuristic_start (bool): Whether to seed the solver with the heuristic.
+
+    Returns:
+        ConcreteModel: The model, with WARM_START set if the heuristic was used.
+    """
+    if not heuristic_start or model.WARM_START is not None or getattr(model, "CACHE_HIT", False):
+        return model
+    model = heuristic_schedule(model, reward_for_child_staff_role)
+    model.WARM_START = {
+        "entries": model.HEURISTIC_STATS["assigned"],
+        "used": model.HEURISTIC_STATS["assigned"],
+        "dropped": 0,
+        "heuristic": True,
+    }
+    return model
@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel
+
+
+@dataclass
+class Groups:
+    """
+    CSR-style grouping of variables: the variables of group i are
+    X_LIST[indices[indptr[i]:indptr[i + 1]]].
+
+    Attributes:
+        keys (pd.DataFrame): One row per group, with the group's key columns.
+        indptr (np.ndarray): Start of each group in indices, plus the end.
+        indices (np.ndarray): INDEX_DF row positions, sorted by group.
+    """
+    keys: pd.DataFrame
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self):
+        """
+        Yield (key, positions) for each group, like a groupby.
+        """
+        keys = self.keys.itertuples(index=False, name=None)
+        for i, key in enumerate(keys):
+            yield key, self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+
+@dataclass
+class Incidence:
+    """
+    Precomputed groupings of the decision variables, built once after setup.
+
+    Attributes:
+        time_staff (Groups): (Time Block, Staff) -> variables.
+        time_child (Groups): (Time Block, Child) -> variables.
+        switch_pairs (pd.DataFrame): One row per (Time Block, Staff, Child) where
+            X at Time Block or at Time Block + 1 exists. Current and Next are
+            INDEX_DF row positions, -1 where the variable does not exist.
+    """
+    time_staff: Groups
+    time_child: Groups
+    switch_pairs: pd.DataFrame
+
+
+def _group(index_df: pd.DataFrame, time_blocks: range, column: str) -> Groups:
+    """
+    Group INDEX_DF rows by (Time Block, column) without a pandas groupby.
+    """
+    times = index_df["Time Block"].to_numpy()
+    codes = index_df[column].cat.codes.to_numpy()
+    n_codes = len(index_df[column].cat.categories)
+    group_codes = (times - min(time_blocks)).astype(np.int64) * n_codes + codes
+
+    indices = np.argsort(group_codes, kind="stable")
+    sorted_codes = group_codes[indices]
+    starts = np.flatnonzero(np.diff(sorted_codes)) + 1
+    indptr = np.concatenate([[0], starts, [len(indices)]]).astype(np.int64)
+
+    first = indices[indptr[:-1]]
+    categories = np.asarray(index_df[column].cat.categories)
+    keys = pd.DataFrame({
+        "Time Block": times[first].tolist(),
+        column: categories[codes[first]].tolist(),
+    })
+    return Groups(keys=keys, indptr=indptr, indices=indices)
+
+
+def _switch_pairs(index_df: pd.DataFrame, time_blocks: range) -> pd.DataFrame:
+    """
+    Pair every variable with the same (child, staff) variable in the next block.
+    """
+    first_time, n_times = min(time_blocks), len(time_blocks)
+    child, staff = index_df["Child"].array, index_df["Staff"].array
+    pair_codes = child.codes.astype(np.int64) * len(staff.categories) + staff.codes
+    pair_ids, pair_codes = np.unique(pair_codes, return_inverse=True)
+    time_codes = index_df["Time Block"].to_numpy() - first_time
+
+    # position[pair, time] -> INDEX_DF row, -1 if the variable doesn't exist
+    position = np.full((len(pair_ids), n_times), -1, dtype=np.int64)
+    position[pair_codes, time_codes] = np.arange(len(index_df))
+
+    current, following = position[:, :-1], position[:, 1:]
+    pair, time = np.nonzero((current >= 0) | (following >= 0))
+    child_names = np.asarray(child.categories)[pair_ids // len(staff.categories)]
+    staff_names = np.asarray(staff.categories)[pair_ids % len(staff.categories)]
+    return pd.DataFrame({
+        "Time Block": (time + first_time).tolist(),
+        "Staff": staff_names[pair].tolist(),
+        "Child": child_names[pair].tolist(),
+        "Current": current[pair, time],
+        "Next": following[pair, time],
+    })
+
+
+def build_incidence(model: ConcreteModel) -> ConcreteModel:
+    """
+    Attach X_LIST (the variables, aligned with INDEX_DF rows) and INCIDENCE
+    to the model, so constraint builders don't need to group INDEX_DF.
+
+    Args:
+        model (ConcreteModel): Model with INDEX_DF, TIME_BLOCKS and X.
+
+    Returns:
+        ConcreteModel: The model with X_LIST and INCIDENCE.
+    """
+    model.X_LIST = list(model.X.values())
+    model.INCIDENCE = Incidence(
+        time_staff=_group(model.INDEX_DF, model.TIME_BLOCKS, "Staff"),
+        time_child=_group(model.INDEX_DF, model.TIME_BLOCKS, "Child"),
+        switch_pairs=_switch_pairs(model.INDEX_DF, model.TIME_BLOCKS),
+    )
+    return model
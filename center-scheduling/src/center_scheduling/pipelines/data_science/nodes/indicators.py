@@ -1,9 +1,16 @@
+from itertools import repeat
+
+import numpy as np
 import pandas as pd
 from pyomo.environ import (
     ConcreteModel, Var, Constraint, Objective, SolverFactory, Set, Binary,
     ConstraintList, maximize
 )
 
+from .constraints import set_lunch_start_values
+from .expressions import linear_sum
+from .symmetry import order_symmetric_staff
+
 
 
 def add_child_2_staff_indicator(model: ConcreteModel) -> ConcreteModel:
@@ -16,77 +23,145 @@ def add_child_2_staff_indicator(model: ConcreteModel) -> ConcreteModel:
     Returns:
         ConcreteModel: The model with the constraint added.
     """
-    model.z_child_2_staff_hrs = Var(model.INDEX_DF["Time Block"].unique(), 
+    model.z_child_2_staff_hrs = Var(model.TIME_BLOCKS, 
                                   model.INDEX_DF["Child"].unique(),
                                   within=Binary)
     
     model.child_2_staff_constraints = ConstraintList()
-    for (time_block, child), df in model.INDEX_DF.groupby(["Time Block", "Child"]):
-        n_staff = sum(model.X[time_block, child, staff]
-                        for staff in df.Staff)
+    for (time_block, child), positions in model.INCIDENCE.time_child:
         # if n_staff == 2, then z_child_2_staff_hrs = 1
         # else, z_child_2_staff_hrs = 0
+        # n_staff - z_child_2_staff_hrs <= 1
         model.child_2_staff_constraints.add(
-            expr= n_staff <= model.z_child_2_staff_hrs[time_block, child] + 1
+            expr= linear_sum([*(model.X_LIST[p] for p in positions),
+                              model.z_child_2_staff_hrs[time_block, child]],
+                             [*repeat(1, len(positions)), -1]) <= 1
         )
     return model
 
 
-def add_switch_indicator(model: ConcreteModel) -> ConcreteModel:
+def _add_switch_pairwise(model: ConcreteModel) -> ConcreteModel:
     """
-    Add a constraint to indicate when a staff switches between children.
-
-    Args:
-        model (ConcreteModel): The Pyomo model to which the constraint will be added.
-
-    Returns:
-        ConcreteModel: The model with the constraint added.
+    z_switch >= |X[t, child, staff] - X[t + 1, child, staff]|: two rows per
+    (time, staff, child).
     """
-    model.z_switch = Var(model.INDEX_DF["Time Block"].unique(), 
-                                  model.INDEX_DF["Staff"].unique(),
-                                  within=Binary)
-    
-    model.switch_constraints = ConstraintList()
-    
-    for (time_block, staff, child), df in model.INDEX_DF.groupby(["Time Block", "Staff", "Child"]):
-        next_time_block = time_block + 1
-        if next_time_block > max(model.INDEX_DF["Time Block"]):
+    x = model.X_LIST
+    pairs = model.INCIDENCE.switch_pairs
+    for time_block, staff, current, following in zip(pairs["Time Block"], pairs["Staff"],
+                                                     pairs["Current"], pairs["Next"]):
+        # Variables that were pruned at setup are 0, so starting after or
+        # stopping before a pruned block is a switch
+        z = model.z_switch[time_block, staff]
+        if current < 0:
+            model.switch_constraints.add(expr = linear_sum([x[following], z], [1, -1]) <= 0)
+            continue
+        if following < 0:
+            model.switch_constraints.add(expr = linear_sum([x[current], z], [1, -1]) <= 0)
             continue
         # if staff switches between children, then z_switch = 1
         # else, z_switch = 0
-        mydiff = model.X[time_block, child, staff] - model.X[next_time_block, child, staff]
+        # |x[current] - x[following]| <= z
         model.switch_constraints.add(
-            expr = mydiff <= model.z_switch[time_block, staff]
+            expr = linear_sum([x[current], x[following], z], [1, -1, -1]) <= 0
         )
         model.switch_constraints.add(
-            expr = -1 * mydiff <= model.z_switch[time_block, staff]
+            expr = linear_sum([x[current], x[following], z], [-1, 1, -1]) <= 0
         )
     return model
 
 
-# Indicators ------------------------------------------------------------------
+def _add_switch_aggregated(model: ConcreteModel) -> ConcreteModel:
+    """
+    One start row per (time, staff, child), z_switch >= X[t + 1] - X[t], and
+    one stop row per (time, staff), z_switch >= busy at t - busy at t + 1.
 
-def add_child_no_staff_indicator(model: ConcreteModel) -> ConcreteModel:
+    A staff member is with at most one child per block, so moving to another
+    child starts that child, and leaving for nobody shows in the stop row.
     """
-    Add a constraint to indicate when a child does not have staff.
+    x = model.X_LIST
+    pairs = model.INCIDENCE.switch_pairs
+    for (time_block, staff), group in pairs.groupby(["Time Block", "Staff"], sort=False):
+        z = model.z_switch[time_block, staff]
+        current = group["Current"].to_numpy()
+        following = group["Next"].to_numpy()
+        for cur, fol in zip(current, following):
+            # Pruned variables are 0: nothing to start if the next one is pruned
+            if fol < 0:
+                continue
+            if cur < 0:
+                model.switch_constraints.add(expr = linear_sum([x[fol], z], [1, -1]) <= 0)
+                continue
+            model.switch_constraints.add(
+                expr = linear_sum([x[fol], x[cur], z], [1, -1, -1]) <= 0
+            )
+        now, later = current[current >= 0], following[following >= 0]
+        if len(now):
+            model.switch_constraints.add(
+                expr = linear_sum([*(x[p] for p in now), *(x[p] for p in later), z],
+                                  [*repeat(1, len(now)), *repeat(-1, len(later)), -1]) <= 0
+            )
+    return model
+
+
+SWITCH_FORMULATIONS = {
+    "pairwise": _add_switch_pairwise,
+    "aggregated": _add_switch_aggregated,
+}
+
+
+def add_switch_indicator(model: ConcreteModel, formulation: dict = None) -> ConcreteModel:
+    """
+    Add a constraint to indicate when a staff switches between children.
 
     Args:
         model (ConcreteModel): The Pyomo model to which the constraint will be added.
+        formulation (dict): switch is "pairwise" (two rows per time, staff and
+            child) or "aggregated" (one start row per time, staff and child
+            plus one stop row per time and staff). Defaults to pairwise.
 
     Returns:
         ConcreteModel: The model with the constraint added.
     """
-    model.z_child_no_staff = Var(model.INDEX_DF["Time Block"].unique(), 
-                                  model.INDEX_DF["Child"].unique(),
+    form = (formulation or {}).get("switch", "pairwise")
+    if form not in SWITCH_FORMULATIONS:
+        raise ValueError(f"Unknown switch formulation {form!r}; "
+                         f"expected one of {sorted(SWITCH_FORMULATIONS)}")
+    model.z_switch = Var(model.TIME_BLOCKS, 
+                                  model.INDEX_DF["Staff"].unique(),
                                   within=Binary)
     
-    model.child_no_staff_constraints = ConstraintList()
-    for (time_block, child), df in model.INDEX_DF.groupby(["Time Block", "Child"]):
-        n_staff = sum(model.X[time_block, child, staff]
-                        for staff in df.Staff)
-        # if n_staff == 0, then z_child_no_staff = 1
-        # else, z_child_no_staff = 0
-        model.child_no_staff_constraints.add(
-            expr= n_staff >= (1 - model.z_child_no_staff[time_block, child])
-        )
+    model.switch_constraints = ConstraintList()
+    return SWITCH_FORMULATIONS[form](model)
+
+
+def set_indicator_values(model: ConcreteModel) -> ConcreteModel:
+    """
+    Set the indicator variables (and lunch starts, if any) to the values
+    implied by the current X values, e.g. to complete a MIP start. X is first
+    relabelled to meet any symmetry-breaking order.
+
+    Args:
+        model (ConcreteModel): Model with X values, z_child_2_staff_hrs and z_switch.
+
+    Returns:
+        ConcreteModel: The model with indicator values set.
+    """
+    model = order_symmetric_staff(model)
+    x = np.array([round(v.value or 0) for v in model.X_LIST] + [0])
+    for z in [*model.z_child_2_staff_hrs.values(), *model.z_switch.values()]:
+        z.set_value(0)
+
+    for (time_block, child), positions in model.INCIDENCE.time_child:
+        if x[positions].sum() > 1:
+            model.z_child_2_staff_hrs[time_block, child].set_value(1)
+
+    # Position -1 (a pruned variable) picks up the trailing 0 in x
+    pairs = model.INCIDENCE.switch_pairs
+    switched = pairs[x[pairs["Current"]] != x[pairs["Next"]]]
+    for time_block, staff in zip(switched["Time Block"], switched["Staff"]):
+        model.z_switch[time_block, staff].set_value(1)
+
+    if hasattr(model, "lunch_start"):
+        set_lunch_start_values(model, x[:-1])
     return model
+
@@ -0,0 +1,94 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel, Var
+
+from .objective import CHILD_2_STAFF_PENALTY, SWITCH_PENALTY, _role_rewards
+
+logger = logging.getLogger(__name__)
+
+
+def _finite(number: float) -> float:
+    return None if number is None or not np.isfinite(number) else float(number)
+
+
+def objective_components(model: ConcreteModel) -> dict:
+    """
+    Break a solved model's objective into its terms.
+
+    Returns:
+        dict: role_reward, two_staff_penalty and switch_penalty (objective =
+            role_reward - two_staff_penalty - switch_penalty), and child_hours:
+            the hours staff of each role spend with a child.
+    """
+    values = np.fromiter((v.value or 0 for v in model.X_LIST), dtype=float,
+                         count=len(model.X_LIST))
+    rewards = _role_rewards(model, model.BUILD_ARGS["reward_for_child_staff_role"])
+    assigned = model.INDEX_DF["Staff"][values > 0.5]
+    roles = model.ROLES.assign(Role=model.ROLES.Role.str.strip().str.lower())
+    return {
+        "role_reward": float(rewards @ values),
+        "two_staff_penalty": CHILD_2_STAFF_PENALTY * sum(
+            z.value or 0 for z in model.z_child_2_staff_hrs.values()),
+        "switch_penalty": SWITCH_PENALTY * sum(z.value or 0 for z in model.z_switch.values()),
+        "child_hours": {
+            role: int(assigned.isin(group.Name).sum()) / model.BLOCKS_PER_HOUR
+            for role, group in roles.groupby("Role")
+        },
+    }
+
+
+def solver_metrics(model: ConcreteModel) -> dict:
+    """
+    One record of how the day's model was built and solved, for
+    trending solver performance across runs.
+
+    Args:
+        model (ConcreteModel): The solved model, with BUILD_STATS and SOLVER_STATS.
+
+    Returns:
+        dict: The day and time, model size before and after presolve, build
+            time and constraints per builder step, solver stage times, nodes,
+            status, objective, bound and gap, and the objective components
+            (see objective_components). Values the backend doesn't report
+            are None.
+    """
+    stats = model.SOLVER_STATS
+    build = model.BUILD_STATS
+    steps = [step for step in build["steps"] if not step["skipped"]]
+    objective, bound = _finite(stats["objective"]), _finite(stats.get("bound"))
+    gap = None
+    if objective is not None and bound is not None:
+        gap = abs(bound - objective) / max(abs(objective), 1e-9)
+
+    metrics = {
+        "day": model.DAY,
+        "block_minutes": model.BLOCK_MINUTES,
+        "solved_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "backend": stats["backend"],
+        "termination": stats["termination"],
+        "cache": stats.get("cache"),
+        "fallback": stats.get("fallback"),
+        "warm_start": stats["warm_start"],
+        "variables": sum(1 for v in model.component_data_objects(Var) if not v.fixed),
+        "constraints": model.nconstraints(),
+        "presolved_rows": stats.get("presolved_rows"),
+        "presolved_columns": stats.get("presolved_columns"),
+        "build_s": build["total_s"],
+        "build_step_s": {step["name"]: step["seconds"] for step in steps},
+        "build_step_constraints": {step["name"]: step["constraints"] for step in steps},
+        "write_s": stats["write_s"],
+        "solve_s": stats["solve_s"],
+        "load_s": stats["load_s"],
+        "first_feasible_s": stats["first_feasible_s"],
+        "incumbents": len(stats["incumbents"]),
+        "nodes": stats.get("nodes"),
+        "objective": objective,
+        "bound": bound,
+        "gap": gap,
+        # Stored with a cached day, whose model has no indicators
+        **(stats.get("components") or objective_components(model)),
+    }
+    logger.debug("Solver metrics for %s: %s", model.DAY, metrics)
+    return metrics
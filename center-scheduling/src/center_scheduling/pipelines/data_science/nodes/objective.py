@@ -1,13 +1,32 @@
+from itertools import repeat
+
+import numpy as np
 import pandas as pd
 from pyomo.environ import (
     ConcreteModel, Var, Constraint, Objective, SolverFactory, Set, Binary,
     ConstraintList, maximize
 )
 
+from .expressions import linear_sum
 
 
 # Objective and solve -----------------------------------------------------------------
 
+# Objective cost of each block a child has two staff, and of each staff switch
+CHILD_2_STAFF_PENALTY = 1
+SWITCH_PENALTY = 0.1
+
+def _role_rewards(model: ConcreteModel, reward_for_child_staff_role: dict) -> np.ndarray:
+    """
+    Objective reward of each X (aligned with INDEX_DF), from the staff's roles.
+    Roles are matched case-insensitively.
+    """
+    x_coefs = np.zeros(len(model.INDEX_DF))
+    for role, reward in reward_for_child_staff_role.items():
+        relevant_staff = model.ROLES.pipe(lambda x: x[x.Role.str.lower() == role.lower()])["Name"]
+        x_coefs[model.INDEX_DF["Staff"].isin(relevant_staff).to_numpy()] += reward
+    return x_coefs
+
 def add_objective(model: ConcreteModel, reward_for_child_staff_role: dict) -> ConcreteModel:
     """
     Add an objective function to the model.
@@ -20,26 +39,19 @@ def add_objective(model: ConcreteModel, reward_for_child_staff_role: dict) -> Co
     """
     # Define the objective function
     # Maximize child hours - preference to techs though
-    child_hr_objs = {}
-    for role, reward in reward_for_child_staff_role.items():
-        relevant_staff = model.ROLES.pipe(lambda x: x[x.Role.str.lower() == role.lower()])["Name"]
-        relevant_staff = [x for x in relevant_staff if x in model.INDEX_DF["Staff"].unique()]
-        relevant_vars = model.INDEX_DF[model.INDEX_DF["Staff"].isin(relevant_staff)]
-        if len(relevant_vars) > 0:
-            child_hr_objs[role] = sum([model.X[time_block, child, staff]
-                                          for (time_block, staff, child), df 
-                                          in relevant_vars.groupby(["Time Block", "Staff", "Child"])]) * reward
+    x_coefs = _role_rewards(model, reward_for_child_staff_role)
+    rewarded = np.flatnonzero(x_coefs)
 
     # Penalize when children have two staff
-    child_2_staff_hrs = sum([model.z_child_2_staff_hrs[time_block, child]
-                                          for (time_block, child), _ in model.INDEX_DF.groupby(["Time Block", "Child"])])
+    child_2_staff_hrs = list(model.z_child_2_staff_hrs.values())
     # Penalize switches
-    child_switch_hrs = sum([model.z_switch[time_block, staff]
-                                          for (time_block, staff), _ in model.INDEX_DF.groupby(["Time Block", "Staff"])])
-
-    
-    model.objective = Objective(expr=sum(child_hr_objs.values())
-                                - child_2_staff_hrs
-                                - child_switch_hrs * 0.1, 
-                                sense=maximize)
-    return model
\ No newline at end of file
+    child_switch_hrs = list(model.z_switch.values())
+
+    model.objective = Objective(
+        expr=linear_sum(
+            [*(model.X_LIST[p] for p in rewarded), *child_2_staff_hrs, *child_switch_hrs],
+            [*x_coefs[rewarded], *repeat(-CHILD_2_STAFF_PENALTY, len(child_2_staff_hrs)),
+             *repeat(-SWITCH_PENALTY, len(child_switch_hrs))]
+        ),
+        sense=maximize)
+    return model
@@ -0,0 +1,138 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel
+
+from .build import build_day_model
+from .heuristic import add_heuristic_start
+from .solve import lookup_cached_solution, solution_long, solve
+from .times import BLOCK_MINUTES
+from .warm_start import _set_start, add_warm_start
+
+logger = logging.getLogger(__name__)
+
+ASSIGNMENT_COLUMNS = ["Time Block", "Child", "Staff"]
+
+
+def _fine_blocks(coarse: pd.DataFrame, ratio: int, shifts: range) -> pd.DataFrame:
+    """
+    Map coarse assignments (Block, Child, Staff) onto the fine blocks of
+    their coarse block moved by each of shifts, ratio fine blocks per coarse one.
+    """
+    offsets = np.array([shift * ratio + b for shift in shifts for b in range(ratio)])
+    rows = np.repeat(np.arange(len(coarse)), len(offsets))
+    return pd.DataFrame({
+        "Time Block": coarse["Block"].to_numpy()[rows] * ratio + np.tile(offsets, len(coarse)),
+        "Child": coarse["Child"].to_numpy()[rows],
+        "Staff": coarse["Staff"].to_numpy()[rows],
+    }, columns=ASSIGNMENT_COLUMNS).drop_duplicates(ignore_index=True)
+
+
+def coarse_neighborhood(coarse: pd.DataFrame, coarse_minutes: int, block_minutes: int,
+                        neighborhood: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Map a coarse schedule onto finer blocks.
+
+    Args:
+        coarse (pd.DataFrame): A solution_long of the coarse model.
+        coarse_minutes (int): The coarse model's block size.
+        block_minutes (int): The fine model's block size, which divides coarse_minutes.
+        neighborhood (int): How many coarse blocks before and after an
+            assignment the fine model may move it to.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: Time Block, Child and Staff (in fine
+            blocks) of the assignments the fine model may make, and of the
+            coarse schedule itself.
+    """
+    if coarse_minutes % block_minutes:
+        raise ValueError(f"Coarse blocks of {coarse_minutes} minutes can't be split "
+                         f"into blocks of {block_minutes}")
+    ratio = coarse_minutes // block_minutes
+    return (_fine_blocks(coarse, ratio, range(-neighborhood, neighborhood + 1)),
+            _fine_blocks(coarse, ratio, range(1)))
+
+
+def coarse_schedule(center_hours: pd.DataFrame,
+                    staff_child: pd.DataFrame,
+                    absences: pd.DataFrame,
+                    roles: pd.DataFrame,
+                    previous_solution: pd.DataFrame,
+                    day: str,
+                    params: dict,
+                    solver_options: dict = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    First pass of coarse-to-fine solving: schedule the day in coarse blocks
+    (coarse_to_fine.block_minutes), which has a fraction of the variables
+    and switch rows, and map the schedule onto the day's block_minutes.
+
+    The fine model then only has the assignments near the coarse ones (see
+    setup_decision_variables) and starts from the coarse schedule (see
+    add_coarse_start). Assignments can only move by up to neighborhood
+    coarse blocks, so its schedule can be worse than a full fine solve's.
+
+    Args:
+        center_hours, staff_child, absences, roles (pd.DataFrame): The input sheets.
+        previous_solution (pd.DataFrame): Optional warm start of the coarse
+            model, see add_warm_start.
+        day (str): Day of the week, e.g. "Mon".
+        params (dict): The project parameters.
+        solver_options (dict): Solver settings. Defaults to params["solver"];
+            coarse_to_fine.solver overrides either.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The neighborhood and the coarse
+            schedule, see coarse_neighborhood. Both empty when coarse_to_fine
+            is off.
+    """
+    settings = params.get("coarse_to_fine") or {}
+    if not settings.get("enabled"):
+        empty = pd.DataFrame(columns=ASSIGNMENT_COLUMNS)
+        return empty, empty
+
+    block_minutes = params.get("block_minutes", BLOCK_MINUTES)
+    coarse_params = {**params, "block_minutes": settings["block_minutes"]}
+    solver_options = {**(solver_options or params["solver"]), **settings.get("solver", {})}
+    cached = lookup_cached_solution(center_hours, staff_child, absences, roles, None, day,
+                                    coarse_params, solver_options)
+    model = build_day_model(center_hours, staff_child, absences, roles, day, coarse_params,
+                            cached=cached)
+    model = add_warm_start(model, previous_solution)
+    model = add_heuristic_start(model, params["reward_for_child_staff_role"],
+                                params.get("heuristic_start", False))
+    model = solve(model, solver_options)
+
+    allowed, start = coarse_neighborhood(solution_long(model), settings["block_minutes"],
+                                         block_minutes, settings.get("neighborhood", 1))
+    logger.info("Coarse schedule for %s in %d minute blocks: objective %s, "
+                "%d assignments allowed in %d minute blocks", day,
+                settings["block_minutes"], model.SOLVER_STATS["objective"],
+                len(allowed), block_minutes)
+    return allowed, start
+
+
+def add_coarse_start(model: ConcreteModel, coarse_start: pd.DataFrame) -> ConcreteModel:
+    """
+    Start the fine model from the coarse schedule, in place of any previous
+    schedule (the coarse model was warm-started from that already).
+
+    Args:
+        model (ConcreteModel): The fine model, up to the objective.
+        coarse_start (pd.DataFrame): The coarse schedule in the model's
+            blocks, see coarse_schedule. Empty to leave the model as it is,
+            as is a schedule from the cache.
+
+    Returns:
+        ConcreteModel: The model with X and indicator values set and
+            WARM_START summarising the mapping.
+    """
+    if coarse_start is None or coarse_start.empty or getattr(model, "CACHE_HIT", False):
+        return model
+    warm_start = _set_start(model, coarse_start)
+    if warm_start is None:
+        logger.warning("No usable assignments for %s in the coarse schedule", model.DAY)
+        return model
+    model.WARM_START = {**warm_start, "source": "coarse"}
+    logger.info("Coarse start for %s: %s", model.DAY, model.WARM_START)
+    return model
@@ -1,54 +1,52 @@
+import logging
+
+import numpy as np
 import pandas as pd
 from pyomo.environ import (
     ConcreteModel, Var, Constraint, Objective, SolverFactory, Set, Binary,
     ConstraintList, maximize
 )
 
+from .availability import _prunable_positions
+from .incidence import build_incidence
+from .times import (
+    BLOCK_MINUTES,
+    _24h_time_to_index,
+    _blocks_per_hour,
+    _index_to_24h_time,
+    absence_blocks,
+    format_time_errors,
+    parse_time_columns,
+)
+
+logger = logging.getLogger(__name__)
+
 def _clean_names(names: pd.Series) -> pd.Series:
     return names.str.strip().str.replace(" ", "").str.replace("_", "")
 
-def _24h_time_to_index(time: str) -> int:
+def _clean_absences(absences: pd.DataFrame, day: str) -> pd.DataFrame:
     """
-    Convert a 24-hour time string to an index.
-
-    Args:
-        time (str): Time in 24-hour format (e.g., "14:30").
-
-    Returns:
-        int: Index corresponding to the time.
+    Keep the absences for the day (or every day) and clean Type and Name.
     """
-    #hour, minute, sec = map(int, str(time).split(':'))
-    #return int(hour * 2 + minute / 30)
-    try:
-        time = float(time)
-        return int(time * 2)
-    except ValueError:
-        pass
-    if isinstance(time, pd.Timestamp):
-        hr = time.hour
-        minute = time.minute
-        return int(hr * 2 + minute / 30)
-    if isinstance(time, str):
-        hr = int(time.split(':')[0])
-        minute = int(time.split(':')[1])
-        return int(hr * 2 + minute / 30)
-    
-    return time * 2
-
+    return (
+        absences.pipe(lambda x: x[(x.Day.isna()) | (x.Day == day)])
+        .assign(Type = lambda x: x.Type.str.strip().str.lower(),
+               Name = lambda x: _clean_names(x.Name))
+    )
 
-def _index_to_24h_time(index: int) -> str:
+def _center_hours_blocks(center_hours: pd.DataFrame, blocks_per_hour: int) -> pd.DataFrame:
     """
-    Convert an index to a 24-hour time string.
+    Add Open Block and Close Block to the day's center hours.
 
-    Args:
-        index (int): Index corresponding to the time.
-
-    Returns:
-        str: Time in 24-hour format (e.g., "14:30").
+    Raises:
+        ValueError: With one line per time that is blank or can't be read.
     """
-    hour = int(index // 2)
-    minute = int((index % 2) * 30)
-    return f"{hour:02d}:{minute:02d}"
+    blocks, errors = parse_time_columns(center_hours, ["Open", "Close"], "center_hours", "Day",
+                                        blocks_per_hour, required=True)
+    if len(errors):
+        raise ValueError(f"Center hours can't be read:\n{format_time_errors(errors)}")
+    return center_hours.assign(**{"Open Block": blocks["Open"].astype(int),
+                                  "Close Block": blocks["Close"].astype(int)})
 
 def _add_sbt_ts_bs_to_staff_child(staff_child: pd.DataFrame, roles: pd.DataFrame) -> pd.DataFrame:
     """
@@ -65,20 +63,81 @@ def _add_sbt_ts_bs_to_staff_child(staff_child: pd.DataFrame, roles: pd.DataFrame
     ])
     
 
+def _build_index_df(time_blocks: range, staff_child: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cross join time blocks with the (child, staff) pairs.
+
+    Child and Staff are categorical columns, so their integer codes can be used
+    wherever we need to group or join on them. Rows are ordered by time block,
+    then by the order of the pairs in staff_child.
+
+    Args:
+        time_blocks (range): Time block indices for the day.
+        staff_child (pd.DataFrame): Long child x staff frame with Child and Staff.
+
+    Returns:
+        pd.DataFrame: One row per decision variable, with columns
+            "Time Block", "Child" and "Staff".
+    """
+    pairs = staff_child[["Child", "Staff"]].drop_duplicates()
+    child = pd.Categorical(pairs.Child, categories=pairs.Child.unique())
+    staff = pd.Categorical(pairs.Staff, categories=pairs.Staff.unique())
+    n_times, n_pairs = len(time_blocks), len(pairs)
+    return pd.DataFrame({
+        "Time Block": np.repeat(np.asarray(time_blocks, dtype=np.int32), n_pairs),
+        "Child": pd.Categorical.from_codes(np.tile(child.codes, n_times), 
+                                           categories=child.categories),
+        "Staff": pd.Categorical.from_codes(np.tile(staff.codes, n_times), 
+                                           categories=staff.categories),
+    })
+
+def _restrict_index(index_df: pd.DataFrame, allowed: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep the rows of index_df whose (Time Block, Child, Staff) is in allowed.
+    """
+    keys = pd.MultiIndex.from_arrays([index_df["Time Block"].astype(int),
+                                      index_df["Child"].astype(str),
+                                      index_df["Staff"].astype(str)])
+    allowed = pd.MultiIndex.from_arrays([allowed["Time Block"].astype(int),
+                                         allowed["Child"].astype(str),
+                                         allowed["Staff"].astype(str)])
+    return index_df[keys.isin(allowed)].reset_index(drop=True)
+
+def _index_tuples(index_df: pd.DataFrame) -> list[tuple[int, str, str]]:
+    """
+    (time, child, staff) tuples for each row of the index, in row order.
+    """
+    child, staff = index_df["Child"].array, index_df["Staff"].array
+    return list(zip(index_df["Time Block"].tolist(),
+                    np.asarray(child.categories)[child.codes].tolist(),
+                    np.asarray(staff.categories)[staff.codes].tolist()))
+
 def setup_decision_variables(center_hours: pd.DataFrame, 
                              staff_child: pd.DataFrame,
                              absences: pd.DataFrame,
                              roles: pd.DataFrame,
-                             day: str) -> ConcreteModel:
+                             day: str,
+                             constraint_on_off: dict = None,
+                             prune_variables: bool = False,
+                             block_minutes: int = BLOCK_MINUTES,
+                             allowed: pd.DataFrame = None) -> ConcreteModel:
     """
     Load center hours
     Load child x staff mapping
-    Decision variables: Daily 30 min blocks: child x staff
+    Decision variables: Daily blocks of block_minutes: child x staff
 
     Args:
         center_hours (pd.DataFrame): DataFrame containing center hours.
         staff_child (pd.DataFrame): DataFrame containing staff-child relationships.
         day (str): The day for which the model is being set up.
+        constraint_on_off (dict): Constraint switches. Only needed when pruning.
+        prune_variables (bool): If True, don't create variables that center hours
+            or absences would fix to 0 anyway. If False, create them all and let
+            the constraint nodes fix them.
+        block_minutes (int): Length of a time block, one of BLOCK_SIZES.
+        allowed (pd.DataFrame): Time Block, Child and Staff of the only
+            assignments to create, e.g. the neighborhood of a coarser schedule
+            (see coarse_schedule). None or empty for no restriction.
 
     Returns:
         ConcreteModel: A Pyomo model object with the loaded data.
@@ -87,7 +146,10 @@ def setup_decision_variables(center_hours: pd.DataFrame,
     # For example, you might want to merge or filter the data
 
     model = ConcreteModel()
-    model.CENTER_HOURS = center_hours.query(f"Day == '{day}'")
+    model.BLOCK_MINUTES = block_minutes
+    model.BLOCKS_PER_HOUR = _blocks_per_hour(block_minutes)
+    model.CENTER_HOURS = _center_hours_blocks(center_hours.query(f"Day == '{day}'"),
+                                              model.BLOCKS_PER_HOUR)
     model.STAFF_CHILD_MATRIX = staff_child
     model.STAFF_CHILD = (
         staff_child
@@ -99,11 +161,6 @@ def setup_decision_variables(center_hours: pd.DataFrame,
         .drop(columns="Allowed")
     )
     
-    model.ABSENCES = (
-        absences.pipe(lambda x: x[(x.Day.isna()) | (x.Day == day)])
-        .assign(Type = lambda x: x.Type.str.strip().str.lower(),
-               Name = lambda x: _clean_names(x.Name))
-    )
     model.ROLES = roles.assign(Name = lambda x: _clean_names(x.Name))
     model.STAFF_CHILD = (
         _add_sbt_ts_bs_to_staff_child(model.STAFF_CHILD, model.ROLES)
@@ -119,19 +176,29 @@ def setup_decision_variables(center_hours: pd.DataFrame,
 
     # Create decision variables for the model
     model.DAY = model.CENTER_HOURS.Day.iloc[0]
-    first_start = model.CENTER_HOURS.Open.min()
-    last_end = model.CENTER_HOURS.Close.max()
-    model.TIME_BLOCKS = range(_24h_time_to_index(first_start), 
-                                  _24h_time_to_index(last_end))
-    
-    # Create a list of valid (time, child, staff) combinations based on staff_child relationships
-    valid_combinations = []
-    for time in model.TIME_BLOCKS:
-        for _, row in model.STAFF_CHILD.iterrows():
-            valid_combinations.append((time, row['Child'], row['Staff']))
+    model.TIME_BLOCKS = range(model.CENTER_HOURS["Open Block"].min(),
+                              model.CENTER_HOURS["Close Block"].max())
+
+    # Times are parsed here once; the constraint builders read the blocks
+    model.ABSENCES, model.TIME_ERRORS = absence_blocks(_clean_absences(absences, day),
+                                                       model.TIME_BLOCKS, model.BLOCKS_PER_HOUR)
+    if len(model.TIME_ERRORS):
+        logger.warning("Absences left out of %s, their times can't be used:\n%s",
+                       model.DAY, format_time_errors(model.TIME_ERRORS))
     
-    model.X = Var(valid_combinations, within=Binary)
-    model.INDEX_DF = pd.DataFrame.from_records(model.X.keys(), columns=["Time Block", "Child", "Staff"])
+    # Create the (time, child, staff) index in one vectorized step and use it
+    # directly as the index of the decision variables
+    model.INDEX_DF = _build_index_df(model.TIME_BLOCKS, model.STAFF_CHILD)
+    if prune_variables:
+        pruned = _prunable_positions(model, constraint_on_off)
+        logger.info("Pruned %d of %d variables", len(pruned), len(model.INDEX_DF))
+        model.INDEX_DF = model.INDEX_DF.drop(index=pruned).reset_index(drop=True)
+    if allowed is not None and len(allowed):
+        n_index = len(model.INDEX_DF)
+        model.INDEX_DF = _restrict_index(model.INDEX_DF, allowed)
+        logger.info("Restricted %s to %d of %d variables", day, len(model.INDEX_DF), n_index)
+    model.X = Var(_index_tuples(model.INDEX_DF), within=Binary)
+    model = build_incidence(model)
     
     # Return the processed data
     return model
@@ -143,7 +210,11 @@ def input_sense_checks(model: ConcreteModel) -> ConcreteModel:
     """Checks:
     
     1. All names in staff_child matrix are in roles
+    2. All absence times can be read (absences that start after they end
+       were never applied either; setup only warns about those)
     """
     names_in_matrix_not_roles = {c for c in set(model.STAFF_CHILD.Staff) if c not in set(model.ROLES.Name)}
     assert len(names_in_matrix_not_roles) == 0, f"Names in staff_child matrix not in roles: {names_in_matrix_not_roles}"
+    unreadable = model.TIME_ERRORS[model.TIME_ERRORS.Problem == "unreadable"]
+    assert len(unreadable) == 0, f"Absence times can't be read:\n{format_time_errors(unreadable)}"
     return model
\ No newline at end of file
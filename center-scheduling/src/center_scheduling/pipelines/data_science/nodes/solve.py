@@ -1,55 +1,243 @@
+import logging
+
+import numpy as np
 import pandas as pd
 from pyomo.environ import (
     ConcreteModel, Var, Constraint, Objective, SolverFactory, Set, Binary,
     ConstraintList, maximize
 )
 
+from center_scheduling.cache import SolutionCache, cache_key
+
+from .backends import day_solver_options, run_backend
+from .heuristic import heuristic_schedule
+from .metrics import objective_components
 from .setup import _24h_time_to_index, _index_to_24h_time
 
+logger = logging.getLogger(__name__)
+
+
+def _solution_cache_key(center_hours: pd.DataFrame,
+                        staff_child: pd.DataFrame,
+                        absences: pd.DataFrame,
+                        roles: pd.DataFrame,
+                        allowed: pd.DataFrame,
+                        day: str,
+                        params: dict,
+                        solver_options: dict) -> str:
+    """
+    Key of the day's schedule: the inputs filtered to the day, the
+    assignments it is restricted to (so a model restricted to a coarse
+    schedule's neighborhood never shares a key with the full one), the
+    parameters that set up and build its model and the day's solver settings
+    (bar the log switches).
+    """
+    frames = {
+        "center_hours": center_hours[center_hours.Day == day],
+        "staff_child": staff_child,
+        "absences": absences[absences.Day.isna() | (absences.Day == day)],
+        "roles": roles,
+        "allowed": pd.DataFrame() if allowed is None else allowed,
+    }
+    options = day_solver_options(solver_options, day)
+    del options["tee"], options["on_event"]
+    build = {name: params.get(name) for name in [
+        "constraint_on_off", "prune_variables", "block_minutes",
+        "reward_for_child_staff_role", "formulation"]}
+    return cache_key(frames, {**build, "solver": options})
+
+
+def lookup_cached_solution(center_hours: pd.DataFrame,
+                           staff_child: pd.DataFrame,
+                           absences: pd.DataFrame,
+                           roles: pd.DataFrame,
+                           allowed: pd.DataFrame,
+                           day: str,
+                           params: dict,
+                           solver_options: dict = None) -> dict:
+    """
+    Look the day up in the solution cache before its model is built, so a
+    hit skips the build, the starts and the solve (see load_cached_solution).
+
+    Args:
+        center_hours, staff_child, absences, roles (pd.DataFrame): The input sheets.
+        allowed (pd.DataFrame): The assignments the model will be restricted
+            to, see setup_decision_variables. None or empty for none.
+        day (str): Day of the week, e.g. "Mon".
+        params (dict): The project parameters, with the cache settings (enabled,
+            path and max_mb, see center_scheduling.cache) under cache.
+        solver_options (dict): Settings the day will be solved with.
+            Defaults to params["solver"].
+
+    Returns:
+        dict: The cache path, max_mb, the day's key and its entry (None on a
+            miss). Empty if the cache is off.
+    """
+    cache = params.get("cache") or {}
+    if not cache.get("enabled"):
+        return {}
+    solver_options = params.get("solver") if solver_options is None else solver_options
+    key = _solution_cache_key(center_hours, staff_child, absences, roles, allowed, day,
+                              params, solver_options)
+    store = SolutionCache(cache["path"], cache["max_mb"])
+    return {"path": cache["path"], "max_mb": cache["max_mb"], "key": key, "entry": store.get(key)}
+
+
+def _load_cached_solution(model: ConcreteModel, solution: dict) -> bool:
+    """
+    Set X to a cached solution. False, with X untouched, if an assignment
+    has no variable in the model.
+    """
+    assigned = pd.DataFrame(solution).rename(columns={"Block": "Time Block"})
+    matched = (
+        model.INDEX_DF.reset_index(names="Position")
+        .astype({"Child": str, "Staff": str})
+        .merge(assigned, on=["Time Block", "Child", "Staff"])
+    )
+    if len(matched) != len(assigned):
+        return False
+    values = np.zeros(len(model.X_LIST))
+    values[matched["Position"].to_numpy()] = 1
+    for var, val in zip(model.X_LIST, values):
+        var.set_value(val)
+    return True
+
+
+def load_cached_solution(model: ConcreteModel, cached: dict) -> ConcreteModel:
+    """
+    Set the model's schedule from the solution cache, if lookup_cached_solution
+    found the day there. Such a model is marked CACHE_HIT and skips the
+    build, the starts and the solve; its SOLVER_STATS are the cached ones.
+
+    Args:
+        model (ConcreteModel): The model from setup_decision_variables.
+        cached (dict): The day's lookup, see lookup_cached_solution.
+
+    Returns:
+        ConcreteModel: The model, with the cache settings and key in CACHE
+            for solve to store its schedule under.
+    """
+    cached = cached or {}
+    entry = cached.get("entry")
+    model.CACHE = {k: v for k, v in cached.items() if k != "entry"}
+    model.CACHE_HIT = entry is not None and _load_cached_solution(model, entry["solution"])
+    if entry is not None and not model.CACHE_HIT:
+        logger.warning("Cached solution %s doesn't fit the %s model, solving it",
+                       cached["key"], model.DAY)
+    if model.CACHE_HIT:
+        model.SOLVER_STATS = {**entry["stats"], "cache": "hit", "cache_key": cached["key"]}
+    return model
+
 
-def solve(model: ConcreteModel) -> ConcreteModel:
+def solve(model: ConcreteModel, solver_options: dict = None) -> ConcreteModel:
     """
     Solve the optimization model with optimized settings.
 
+    If the solver stops (e.g. on its time limit) before finding any schedule,
+    the heuristic schedule is used instead, so there is always an answer.
+
+    A model loaded from the solution cache (see load_cached_solution) is
+    returned as it is. Otherwise, if the model has a cache key, a schedule
+    proven within the gap is stored under it.
+
     Args:
         model (ConcreteModel): The Pyomo model to be solved.
+        solver_options (dict): Backend and settings, see run_backend.
+            Defaults to CBC through an LP file, 4 threads, a 1% gap and no
+            time limit.
 
     Returns:
-        ConcreteModel: The solved model.
-    """
-    # Set solver options
-    solver = SolverFactory('cbc') #glpk
-    solver.options['threads'] = 4    # Use multiple threads if available
-    solver.options['ratio'] = 0.01   # Set gap tolerance to 1%
-    solver.options['heur'] = 'on'    # Enable heuristics
-    
-    # Solve with optimized settings
-    results = solver.solve(model, tee=True)
-    
+        ConcreteModel: The solved model, with per-stage timings in SOLVER_STATS
+            (plus cache "hit" or "miss" when the cache is on, and fallback
+            "heuristic" if the solver found nothing) and, if the heuristic ran,
+            how far its schedule was from this one.
+    """
+    if getattr(model, "CACHE_HIT", False):
+        logger.info("Solution for %s from cache: %s", model.DAY, model.SOLVER_STATS)
+        return model
+
+    model.SOLVER_STATS = run_backend(model, solver_options)
+    if model.SOLVER_STATS["objective"] is None:
+        logger.warning("No schedule from the solver for %s (%s), using the heuristic one",
+                       model.DAY, model.SOLVER_STATS["termination"])
+        model = heuristic_schedule(model, model.BUILD_ARGS["reward_for_child_staff_role"])
+        model.SOLVER_STATS.update({"fallback": "heuristic",
+                                   "objective": model.HEURISTIC_STATS["objective"]})
+        logger.info("Solved %s: %s", model.DAY, model.SOLVER_STATS)
+        return model
+    heuristic = getattr(model, "HEURISTIC_STATS", None)
+    if heuristic is not None:
+        model.SOLVER_STATS["heuristic_gap"] = heuristic_gap(
+            heuristic["objective"], model.SOLVER_STATS["objective"])
+    cache = getattr(model, "CACHE", None)
+    if cache and model.SOLVER_STATS["termination"].lower() == "optimal":
+        long = solution_long(model)
+        SolutionCache(cache["path"], cache["max_mb"]).put(cache["key"], {
+            "day": model.DAY,
+            "solution": long[["Block", "Child", "Staff"]].to_dict(orient="list"),
+            # A cached day isn't built, so has no indicators to read these from
+            "stats": {**model.SOLVER_STATS, "components": objective_components(model)},
+        })
+        model.SOLVER_STATS.update({"cache": "miss", "cache_key": cache["key"]})
+    logger.info("Solved %s: %s", model.DAY, model.SOLVER_STATS)
     return model
 
-def print_solution(model: ConcreteModel) -> pd.DataFrame:
+def heuristic_gap(heuristic_objective: float, objective: float) -> float:
     """
-    Print the solution of the model.
+    Relative gap of a heuristic schedule to the solver's, e.g. 0.02 for 2% worse.
+    """
+    return (objective - heuristic_objective) / max(abs(objective), 1e-9)
+
+def solution_long(model: ConcreteModel) -> pd.DataFrame:
+    """
+    Extract the assignments of a solved model, one row per (block, child, staff).
 
     Args:
         model (ConcreteModel): The solved Pyomo model.
+
+    Returns:
+        pd.DataFrame: Day, Block (time block index), Time Block (HH:MM), Child
+            and Staff, sorted by block and staff.
     """
-    # Iterate through the decision variables and print their values
-    results_df = pd.DataFrame({}, columns=["Day", "Time Block", "Child", "Staff"])
-    for (time_block, child, staff), _ in model.INDEX_DF.groupby(["Time Block", "Child", "Staff"]):
-        if model.X[time_block, child, staff].value > 0:
-            results_df = pd.concat([results_df, pd.DataFrame({
-                "Day": [model.DAY],
-                "Time Block": [time_block],
-                "Child": [child],
-                "Staff": [staff]
-            })], ignore_index=True)
-    results_df_wide = (
-        results_df
-        .pivot(index=["Day", "Time Block"], columns = "Staff", values = "Child")
+    values = np.fromiter((v.value or 0 for v in model.X_LIST), dtype=float,
+                         count=len(model.X_LIST))
+    assigned = model.INDEX_DF[values > 0.5]
+    return (
+        pd.DataFrame({
+            "Day": model.DAY,
+            "Block": assigned["Time Block"].to_numpy(),
+            "Child": assigned["Child"].astype(str).to_numpy(),
+            "Staff": assigned["Staff"].astype(str).to_numpy(),
+        })
+        .sort_values(["Block", "Staff"], ignore_index=True)
+        .assign(**{"Time Block": lambda x: x.Block.map(
+            lambda b: _index_to_24h_time(b, model.BLOCKS_PER_HOUR))})
+        [["Day", "Block", "Time Block", "Child", "Staff"]]
+    )
+
+def solution_wide(long: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pivot a long solution (see solution_long) to one row per time block and
+    one column per staff member, holding the child they are with.
+    """
+    return (
+        long
+        .pivot(index=["Day", "Block", "Time Block"], columns="Staff", values="Child")
         .reset_index()
-        .sort_values("Time Block")
-        .assign(**{"Time Block": lambda x: x["Time Block"].apply(_index_to_24h_time)})
+        .rename_axis(columns=None)
+        .sort_values("Block")
+        .drop(columns="Block")
     )
-    return results_df_wide
\ No newline at end of file
+
+def print_solution(model: ConcreteModel) -> pd.DataFrame:
+    """
+    Print the solution of the model.
+
+    Args:
+        model (ConcreteModel): The solved Pyomo model.
+
+    Returns:
+        pd.DataFrame: One row per time block, one column per staff member,
+            holding the child they are with.
+    """
+    return solution_wide(solution_long(model))
@@ -0,0 +1,112 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel, ConstraintList
+
+from .expressions import linear_sum
+from .objective import _role_rewards
+
+logger = logging.getLogger(__name__)
+
+
+def staff_symmetry_classes(model: ConcreteModel,
+                           reward_for_child_staff_role: dict) -> list[tuple[list[str], np.ndarray]]:
+    """
+    Group the staff that are interchangeable in the day's model: the same free
+    (not fixed) variables, i.e. the same eligible children and availability,
+    with the same rewards. Swapping the schedules of two such staff gives a
+    schedule with the same objective.
+
+    Args:
+        model (ConcreteModel): The model, after the variables are fixed.
+        reward_for_child_staff_role (dict): Objective reward per role.
+
+    Returns:
+        list[tuple[list[str], np.ndarray]]: For each group of two or more staff,
+            their names and their free X positions, one row per staff member,
+            with the columns aligned on (time block, child).
+    """
+    free = np.flatnonzero([not x.fixed for x in model.X_LIST])
+    rewards = _role_rewards(model, reward_for_child_staff_role)
+    staff = model.INDEX_DF["Staff"]
+    df = pd.DataFrame({
+        "position": free,
+        "staff": staff.cat.codes.to_numpy()[free],
+        "time": model.INDEX_DF["Time Block"].to_numpy()[free],
+        "child": model.INDEX_DF["Child"].cat.codes.to_numpy()[free],
+        "reward": rewards[free],
+    }).sort_values(["staff", "time", "child"], kind="stable")
+
+    groups = {}
+    for code, group in df.groupby("staff", sort=True):
+        key = group[["time", "child", "reward"]].to_numpy(dtype=float).tobytes()
+        groups.setdefault(key, []).append((code, group["position"].to_numpy()))
+
+    names = staff.cat.categories
+    return [
+        ([str(names[code]) for code, _ in members], np.vstack([p for _, p in members]))
+        for members in groups.values() if len(members) > 1
+    ]
+
+
+def add_symmetry_breaking(model: ConcreteModel,
+                          reward_for_child_staff_role: dict,
+                          formulation: dict = None) -> ConcreteModel:
+    """
+    Break the symmetry between interchangeable staff (see staff_symmetry_classes).
+
+    With symmetry "order", staff in a group are ordered by their number of
+    assigned blocks: any schedule can be relabelled to meet the order, so no
+    optimum is cut off, but branch and bound no longer explores every
+    relabelling. "none" adds nothing.
+
+    HiGHS finds this symmetry itself. CBC 2.10 does not, but on the rosters
+    tried (benchmarks/bench_symmetry.py) the rows slowed it down, as its
+    root heuristics find the optimum before any branching; hence none by default.
+
+    Args:
+        model (ConcreteModel): The model, after the variables are fixed.
+        reward_for_child_staff_role (dict): Objective reward per role.
+        formulation (dict): symmetry is "none" or "order". Defaults to none.
+
+    Returns:
+        ConcreteModel: The model with the rows in symmetry_constraints and the
+            groups in SYMMETRY (None for "none").
+    """
+    form = (formulation or {}).get("symmetry", "none")
+    if form not in ("none", "order"):
+        raise ValueError(f"Unknown symmetry formulation {form!r}; expected 'none' or 'order'")
+    model.SYMMETRY = None
+    if form == "none":
+        return model
+
+    classes = staff_symmetry_classes(model, reward_for_child_staff_role)
+    model.symmetry_constraints = ConstraintList()
+    x = model.X_LIST
+    for _, positions in classes:
+        ones = np.ones(positions.shape[1])
+        for first, second in zip(positions[:-1], positions[1:]):
+            model.symmetry_constraints.add(expr = linear_sum(
+                [*(x[p] for p in second), *(x[p] for p in first)],
+                np.concatenate([ones, -ones])) <= 0)
+
+    model.SYMMETRY = {"classes": classes}
+    logger.info("Symmetric staff for %s: %s", model.DAY, [names for names, _ in classes])
+    return model
+
+
+def order_symmetric_staff(model: ConcreteModel) -> ConcreteModel:
+    """
+    Relabel the current X values within each group of interchangeable staff so
+    they meet the symmetry-breaking order, e.g. before a MIP start.
+    """
+    if getattr(model, "SYMMETRY", None) is None:
+        return model
+    x = model.X_LIST
+    for _, positions in model.SYMMETRY["classes"]:
+        values = np.array([[x[p].value or 0 for p in row] for row in positions])
+        for row, source in zip(positions, np.argsort(-values.sum(axis=1), kind="stable")):
+            for p, val in zip(row, values[source]):
+                x[p].set_value(val)
+    return model
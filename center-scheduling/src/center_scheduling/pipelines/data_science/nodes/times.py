@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel
+
+# Time blocks are 30 minutes unless block_minutes says otherwise
+BLOCK_MINUTES = 30
+BLOCKS_PER_HOUR = 60 // BLOCK_MINUTES
+
+# Block sizes that divide an hour into a power of two, so block times (e.g.
+# 8.25 for 8:15) are exact in hours
+BLOCK_SIZES = (15, 30, 60)
+
+# "8:30", "08:30:00" (an Excel time) or "2024-01-01 08:30:00" (a timestamp)
+CLOCK_TIME = r"^\s*(?:\d{4}-\d{2}-\d{2}[ T])?(\d{1,2}):(\d{2})(?::\d{2}(?:\.\d+)?)?\s*$"
+
+TIME_ERROR_COLUMNS = ["Sheet", "Row", "Name", "Column", "Value", "Problem"]
+
+
+def _blocks_per_hour(block_minutes: int) -> int:
+    """
+    Blocks per hour for a block size in minutes.
+
+    Raises:
+        ValueError: If block_minutes isn't one of BLOCK_SIZES.
+    """
+    if block_minutes not in BLOCK_SIZES:
+        raise ValueError(f"Unsupported block_minutes {block_minutes!r}; "
+                         f"expected one of {list(BLOCK_SIZES)}")
+    return 60 // block_minutes
+
+
+def _24h_time_to_index(time: str, blocks_per_hour: int = BLOCKS_PER_HOUR) -> int:
+    """
+    Convert a 24-hour time string to an index.
+
+    Args:
+        time (str): Time in 24-hour format (e.g., "14:30").
+        blocks_per_hour (int): Blocks per hour, e.g. 2 for 30 minute blocks.
+
+    Returns:
+        int: Index of the block the time falls in.
+    """
+    #hour, minute, sec = map(int, str(time).split(':'))
+    #return int(hour * 2 + minute / 30)
+    try:
+        time = float(time)
+        return int(time * blocks_per_hour)
+    except ValueError:
+        pass
+    if isinstance(time, pd.Timestamp):
+        hr = time.hour
+        minute = time.minute
+        return int(hr * blocks_per_hour + minute * blocks_per_hour / 60)
+    if isinstance(time, str):
+        hr = int(time.split(':')[0])
+        minute = int(time.split(':')[1])
+        return int(hr * blocks_per_hour + minute * blocks_per_hour / 60)
+    
+    return time * blocks_per_hour
+
+
+def _index_to_24h_time(index: int, blocks_per_hour: int = BLOCKS_PER_HOUR) -> str:
+    """
+    Convert an index to a 24-hour time string.
+
+    Args:
+        index (int): Index corresponding to the time.
+        blocks_per_hour (int): Blocks per hour, e.g. 2 for 30 minute blocks.
+
+    Returns:
+        str: Time in 24-hour format (e.g., "14:30").
+    """
+    hour = int(index // blocks_per_hour)
+    minute = int((index % blocks_per_hour) * 60 // blocks_per_hour)
+    return f"{hour:02d}:{minute:02d}"
+
+def parse_time_blocks(times: pd.Series,
+                      blocks_per_hour: int = BLOCKS_PER_HOUR) -> tuple[pd.Series, pd.Series]:
+    """
+    Convert a column of times to block indices in one vectorized pass, as
+    _24h_time_to_index does one at a time: hours (e.g. 12.5 for 12:30),
+    "HH:MM" strings, Excel times and timestamps. Clock times past 24:00 or
+    with 60 minutes or more are unreadable.
+
+    Args:
+        times (pd.Series): The column, e.g. absences.Start.
+        blocks_per_hour (int): Blocks per hour, e.g. 60 for minutes.
+
+    Returns:
+        tuple[pd.Series, pd.Series]: The block index of each time (float, NaN
+            where blank or unreadable) and whether each was unreadable.
+    """
+    text = times.astype(str)
+    blank = times.isna() | text.str.strip().eq("")
+    if pd.api.types.is_datetime64_any_dtype(times):
+        hours = pd.Series(np.nan, index=times.index)
+    else:
+        hours = pd.to_numeric(times, errors="coerce")
+    clock = text.str.extract(CLOCK_TIME).astype(float)
+    # Out of range, e.g. "25:00" or "9:75", counts as unreadable
+    clock = clock[(clock[0] <= 24) & (clock[1] < 60)].reindex(times.index)
+    # The nudge keeps e.g. 17 / 60 hours in minute 17 despite rounding
+    blocks = (np.trunc(hours * blocks_per_hour + 1e-9)
+              .fillna(clock[0] * blocks_per_hour + clock[1] // (60 / blocks_per_hour))
+              .mask(blank))
+    return blocks, blocks.isna() & ~blank
+
+
+def _time_errors(frame: pd.DataFrame, rows: pd.Series, sheet: str, name: str,
+                 column: str, problem: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Sheet": sheet,
+        "Row": frame.index[rows],
+        "Name": frame.loc[rows, name].to_numpy(),
+        "Column": column,
+        "Value": frame.loc[rows, column].astype(str).to_numpy(),
+        "Problem": problem,
+    }, columns=TIME_ERROR_COLUMNS)
+
+
+def parse_time_columns(frame: pd.DataFrame, columns: list[str], sheet: str, name: str,
+                       blocks_per_hour: int = BLOCKS_PER_HOUR,
+                       required: bool = False) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    parse_time_blocks for several columns of a sheet, with a report of the
+    values that couldn't be read.
+
+    Args:
+        frame (pd.DataFrame): The sheet.
+        columns (list[str]): Its time columns.
+        sheet (str): Sheet name, for the report.
+        name (str): Column that identifies a row, for the report, e.g. "Name".
+        blocks_per_hour (int): Blocks per hour.
+        required (bool): Whether blank values are reported too.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The block indices, one column per
+            time column, on frame's index; and one row per unreadable (or
+            blank, if required) value with the sheet, row (frame's index),
+            name, column, value and problem.
+    """
+    blocks, errors = {}, [pd.DataFrame(columns=TIME_ERROR_COLUMNS)]
+    for column in columns:
+        blocks[column], bad = parse_time_blocks(frame[column], blocks_per_hour)
+        errors.append(_time_errors(frame, bad, sheet, name, column, "unreadable"))
+        if required:
+            blank = blocks[column].isna() & ~bad
+            errors.append(_time_errors(frame, blank, sheet, name, column, "blank"))
+    return pd.DataFrame(blocks, index=frame.index), pd.concat(errors, ignore_index=True)
+
+
+def format_time_errors(errors: pd.DataFrame) -> str:
+    """
+    One line per unusable time, e.g. "absences row 5 (red): Start '25:00'
+    is unreadable", with the row numbered as in the workbook (the header is
+    row 1).
+    """
+    return "\n".join(
+        f"{e.Sheet} row {e.Row + 2} ({e.Name}): {e.Column} {e.Value!r} is {e.Problem}"
+        for e in errors.itertuples()
+    )
+
+
+def absence_blocks(absences: pd.DataFrame, time_blocks: range,
+                   blocks_per_hour: int = BLOCKS_PER_HOUR) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Add Start Block and End Block to cleaned absences: a blank start or end
+    is the start or end of the day, and both are clipped to time_blocks.
+    Absences with a time that can't be read, or that start after they end
+    (e.g. Start 16, End 11:30), are left out and reported.
+
+    Args:
+        absences (pd.DataFrame): Cleaned absences, see _clean_absences.
+        time_blocks (range): The day's time blocks.
+        blocks_per_hour (int): Blocks per hour of time_blocks.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The absences with their blocks, and
+            the unusable times (see parse_time_columns), with Problem
+            "unreadable" or, for the start of an inverted absence, "after End".
+    """
+    blocks, errors = parse_time_columns(absences, ["Start", "End"], "absences", "Name",
+                                        blocks_per_hour)
+    inverted = blocks["Start"] > blocks["End"]
+    errors = pd.concat([errors, _time_errors(absences, inverted, "absences", "Name",
+                                             "Start", "after End")], ignore_index=True)
+    first, last = min(time_blocks), max(time_blocks)
+    absences = absences.drop(index=errors["Row"]).assign(**{
+        "Start Block": blocks["Start"].fillna(first).clip(lower=first).astype(int),
+        "End Block": blocks["End"].fillna(last).clip(upper=last).astype(int),
+    })
+    return absences, errors
@@ -0,0 +1,93 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel
+
+from .indicators import set_indicator_values
+from .setup import _clean_names
+from .times import BLOCKS_PER_HOUR, _24h_time_to_index
+
+logger = logging.getLogger(__name__)
+
+
+def _solution_long(previous_solution: pd.DataFrame, day: str,
+                   blocks_per_hour: int = BLOCKS_PER_HOUR) -> pd.DataFrame:
+    """
+    Turn one day of a wide solution (as print_solution writes it) into
+    Time Block, Child, Staff rows, with blocks_per_hour blocks per hour.
+    """
+    wide = previous_solution.pipe(lambda x: x[x.Day == day])
+    return (
+        wide.melt(id_vars=["Day", "Time Block"], var_name="Staff", value_name="Child")
+        .dropna(subset=["Child"])
+        .assign(**{"Time Block": lambda x: x["Time Block"].map(
+                       lambda t: _24h_time_to_index(t, blocks_per_hour)),
+                   "Staff": lambda x: _clean_names(x.Staff.astype(str)),
+                   "Child": lambda x: _clean_names(x.Child.astype(str))})
+        [["Time Block", "Child", "Staff"]]
+    )
+
+
+def _set_start(model: ConcreteModel, assigned: pd.DataFrame) -> dict:
+    """
+    Set X (and the indicators) to the assignments (Time Block, Child, Staff)
+    that the model still allows, the rest to 0.
+
+    Returns:
+        dict: How many assignments there were, were used and were dropped.
+            None, with X untouched, if none could be used.
+    """
+    matched = (
+        model.INDEX_DF.reset_index(names="Position")
+        .astype({"Child": str, "Staff": str})
+        .merge(assigned, on=["Time Block", "Child", "Staff"])
+    )
+    positions = [
+        pos for pos in matched["Position"]
+        if not model.X_LIST[pos].fixed and model.X_LIST[pos].ub != 0
+    ]
+    if not positions:
+        return None
+
+    values = np.zeros(len(model.X_LIST))
+    values[positions] = 1
+    for var, val in zip(model.X_LIST, values):
+        if not var.fixed:
+            var.set_value(val)
+    set_indicator_values(model)
+    return {
+        "entries": len(assigned),
+        "used": len(positions),
+        "dropped": len(assigned) - len(positions),
+    }
+
+
+def add_warm_start(model: ConcreteModel, previous_solution: pd.DataFrame) -> ConcreteModel:
+    """
+    Set X to a previous schedule for the same day, to be used as a MIP start.
+
+    Every constraint is an upper bound on sums of X, so dropping the
+    assignments that no longer exist or are fixed to 0 (new absences,
+    changed staff x child matrix) leaves a feasible start.
+
+    Args:
+        model (ConcreteModel): The model, up to the objective.
+        previous_solution (pd.DataFrame): A wide solution.csv, e.g. last week's.
+            Empty for a cold start. Ignored if the schedule came from the cache.
+
+    Returns:
+        ConcreteModel: The model with X and indicator values set, and a summary
+            of the mapping in WARM_START (None for a cold start).
+    """
+    model.WARM_START = None
+    if previous_solution is None or previous_solution.empty or getattr(model, "CACHE_HIT", False):
+        return model
+
+    assigned = _solution_long(previous_solution, model.DAY, model.BLOCKS_PER_HOUR)
+    model.WARM_START = _set_start(model, assigned)
+    if model.WARM_START is None:
+        logger.warning("No usable assignments for %s in the previous solution", model.DAY)
+        return model
+    logger.info("Warm start for %s: %s", model.DAY, model.WARM_START)
+    return model
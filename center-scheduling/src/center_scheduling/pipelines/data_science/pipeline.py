@@ -10,10 +10,29 @@ def _base_opt_pipeline(day: int) -> Pipeline:
     # Define the pipeline
     return pipeline(
         [
+            # Coarse-to-fine: schedule in coarse blocks first (empty when off)
+            node(
+                func = coarse_schedule,
+                inputs = ["center_hours", "staff_child", "absences", "roles",
+                          "previous_solution", "params:day", "parameters"],
+                outputs = ["coarse_neighborhood", "coarse_start"],
+            ),
+
+            # Solution cache, keyed by the day's inputs and parameters, so a
+            # hit skips the build, the starts and the solve (empty when off)
+            node(
+                func = lookup_cached_solution,
+                inputs = ["center_hours", "staff_child", "absences", "roles",
+                          "coarse_neighborhood", "params:day", "parameters"],
+                outputs = "cached_solution",
+            ),
+
             # Data
             node(
                 func = setup_decision_variables,
-                inputs = ["center_hours", "staff_child", "absences","roles","params:day"],
+                inputs = ["center_hours", "staff_child", "absences","roles","params:day",
+                          "params:constraint_on_off", "params:prune_variables",
+                          "params:block_minutes", "coarse_neighborhood"],
                 outputs = "base_model",
             ),
             node(
@@ -27,96 +46,47 @@ def _base_opt_pipeline(day: int) -> Pipeline:
                 outputs="model_index",
             ),
 
-            # Constraints
-            ## Center hours
-            node(
-                func = center_hours_constraints,
-                inputs = ["base_model", "params:constraint_on_off"],
-                outputs = "model_c0",
-            ),
-            ## Staff x child matching
-            node(
-                func = add_staff_child_constraints,
-                inputs = ["model_c0", "params:constraint_on_off"],
-                outputs = "model_c1",
-            ),
-            ## Assessments (TBC)
-            ## 1:1 trainings (TBC)
-            ## Admin (TBC)
-            ## Each staff and child in one place at a time
-            node(
-                func = add_one_place_per_time_constraint,
-                inputs = ["model_c1", "params:constraint_on_off"],
-                outputs = "model_c2",
-            ),
-            ## Lunch
-            node(
-                func = add_lunch_constraints,
-                inputs = ["model_c2", "params:constraint_on_off"],
-                outputs = "model_c3",
-            ),
-            ## PTO
-            node(
-                func = add_pto_constraints,
-                inputs = ["model_c3", "params:constraint_on_off"],
-                outputs = "model_c42",
-            ),
-            ## Parent training
             node(
-                func = add_parent_training_constraints,
-                inputs = ["model_c42", "params:constraint_on_off"],
-                outputs = "model_c43",
+                func = load_cached_solution,
+                inputs = ["base_model", "cached_solution"],
+                outputs = "model_cached",
             ),
-            ## Team meeting
-            node(
-                func = add_team_meeting_constraints,
-                inputs = ["model_c43", "params:constraint_on_off"],
-                outputs = "model_c44",
-            ),
-            ## Nap
-            node(
-                func = add_nap_time_constraints,
-                inputs = ["model_c44", "params:constraint_on_off"],
-                outputs = "model_c45",
-            ),
-            ## Therapy
-            node(
-                func = add_speech_therapy_constraints,
-                inputs = ["model_c45", "params:constraint_on_off"],
-                outputs = "model_c46",
-            ),
-            ## Late arrivals, early departures
+
+            # Constraints, indicators and objective, see MODEL_BUILDERS
             node(
-                func = add_arrival_departure_constraints,
-                inputs = ["model_c46", "params:constraint_on_off"],
-                outputs = "model_c47",
+                func = build_model,
+                inputs = ["model_cached", "params:constraint_on_off",
+                          "params:reward_for_child_staff_role", "params:trace_build_memory",
+                          "params:formulation"],
+                outputs = "model_obj",
             ),
-            
-            ## Unavailability: Staff training, PTO, Parent training, remote, Team meeting
 
-            ## Indicators
+            # Warm start from a previous schedule, if there is one
             node(
-                func = add_child_2_staff_indicator,
-                inputs = "model_c47",
-                outputs = "model_c5",
+                func = add_warm_start,
+                inputs = ["model_obj", "previous_solution"],
+                outputs = "model_warm",
             ),
+
+            # Or from the coarse schedule, when solving coarse-to-fine
             node(
-                func = add_switch_indicator,
-                inputs= "model_c5",
-                outputs = "model_c8",
+                func = add_coarse_start,
+                inputs = ["model_warm", "coarse_start"],
+                outputs = "model_coarse_start",
             ),
 
-            # Objective: Maximize child-staff hours
+            # Otherwise, optionally warm start from the heuristic schedule
             node(
-                func = add_objective,
-                inputs = ["model_c8", "params:reward_for_child_staff_role"],
-                outputs = "model_obj",
+                func = add_heuristic_start,
+                inputs = ["model_coarse_start", "params:reward_for_child_staff_role",
+                          "params:heuristic_start"],
+                outputs = "model_seeded",
             ),
 
             # Solve
             node(
                 func=solve,
-                inputs = "model_obj",
+                inputs = ["model_seeded", "params:solver"],
                 outputs = "model_solved",
             ),
             node(
@@ -124,10 +94,25 @@ def _base_opt_pipeline(day: int) -> Pipeline:
                 inputs = "model_solved",
                 outputs = "solution_excel",
             ),
+            node(
+                func=solution_long,
+                inputs = "model_solved",
+                outputs = "solution_long",
+            ),
+            node(
+                func=solver_metrics,
+                inputs = "model_solved",
+                outputs = "solver_metrics",
+            ),
         ],
         parameters={"params:day": f"params:day{day}",
-                    **{c: c for c in ["params:reward_for_child_staff_role", "params:constraint_on_off"]}},
-        inputs = {c: c for c in ["center_hours", "staff_child", "absences","roles"]},
+                    **{c: c for c in ["params:reward_for_child_staff_role", "params:constraint_on_off",
+                                       "params:prune_variables", "params:trace_build_memory",
+                                       "params:block_minutes",
+                                       "params:formulation",
+                                       "params:heuristic_start", "params:solver"]}},
+        inputs = {c: c for c in ["center_hours", "staff_child", "absences","roles",
+                                 "previous_solution"]},
         namespace=f"d{day}",
     )
 
@@ -0,0 +1,3 @@
+"""Day-level parallel pipeline: each worker builds and solves whole days"""
+
+from .pipeline import create_pipeline  # NOQA
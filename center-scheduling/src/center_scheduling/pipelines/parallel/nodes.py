@@ -0,0 +1,101 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from center_scheduling.pipelines.data_science.nodes import (
+    add_coarse_start,
+    add_heuristic_start,
+    add_warm_start,
+    build_day_model,
+    coarse_schedule,
+    lookup_cached_solution,
+    print_solution,
+    solution_long,
+    solve,
+    solver_metrics,
+)
+
+logger = logging.getLogger(__name__)
+
+DAY_KEYS = [f"day{d}" for d in range(1, 6)]
+
+
+def schedule_day(center_hours: pd.DataFrame,
+                 staff_child: pd.DataFrame,
+                 absences: pd.DataFrame,
+                 roles: pd.DataFrame,
+                 previous_solution: pd.DataFrame,
+                 day: str,
+                 params: dict,
+                 solver_options: dict) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Build, solve and extract one day's schedule in the current process,
+    coarse-to-fine if params say so (see coarse_schedule).
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame, dict]: The wide and long solutions
+            and the solver metrics (see solver_metrics).
+    """
+    allowed, coarse_start = coarse_schedule(center_hours, staff_child, absences, roles,
+                                            previous_solution, day, params, solver_options)
+    cached = lookup_cached_solution(center_hours, staff_child, absences, roles, allowed, day,
+                                    params, solver_options)
+    model = build_day_model(center_hours, staff_child, absences, roles, day, params, allowed,
+                            cached)
+    model = add_warm_start(model, previous_solution)
+    model = add_coarse_start(model, coarse_start)
+    model = add_heuristic_start(model, params["reward_for_child_staff_role"],
+                                params.get("heuristic_start", False))
+    model = solve(model, solver_options)
+    return print_solution(model), solution_long(model), solver_metrics(model)
+
+
+def _solver_threads(solver_threads: int, workers: int) -> int:
+    """
+    Split the cores between concurrent days, never above the configured threads.
+    """
+    return max(1, min(solver_threads, (os.cpu_count() or 1) // workers))
+
+
+def schedule_week_parallel(center_hours: pd.DataFrame,
+                           staff_child: pd.DataFrame,
+                           absences: pd.DataFrame,
+                           roles: pd.DataFrame,
+                           previous_solution: pd.DataFrame,
+                           params: dict) -> tuple[pd.DataFrame, ...]:
+    """
+    Schedule every day in a process pool. Only the input sheets go to the
+    workers and only the solutions come back; no Pyomo model is pickled.
+
+    Args:
+        center_hours, staff_child, absences, roles (pd.DataFrame): The input sheets.
+        previous_solution (pd.DataFrame): Optional warm start, see add_warm_start.
+        params (dict): The project parameters.
+
+    Returns:
+        tuple[pd.DataFrame, ...]: One wide solution per day, in day order,
+            then one long solution per day, then the solver metrics per day.
+    """
+    days = [params[key] for key in DAY_KEYS]
+    workers = min(params["parallel"]["workers"], len(days))
+    solver_options = {
+        **params["solver"],
+        "threads": _solver_threads(params["solver"]["threads"], workers),
+        # Solver logs from concurrent days would interleave
+        "tee": False,
+    }
+    logger.info("Scheduling %d days on %d workers with %d solver threads each",
+                len(days), workers, solver_options["threads"])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(schedule_day, center_hours, staff_child, absences, roles,
+                        previous_solution, day, params, solver_options)
+            for day in days
+        ]
+        # Each worker's solve node logs its own stats
+        results = [future.result() for future in futures]
+    return (*(wide for wide, _, _ in results), *(long for _, long, _ in results),
+            *(metrics for _, _, metrics in results))
@@ -0,0 +1,22 @@
+from kedro.pipeline import Pipeline, node, pipeline
+
+from .nodes import *
+
+def create_pipeline(**kwargs) -> Pipeline:
+    """
+    Schedule all days in one node backed by a process pool. Produces the same
+    per-day solutions as the data science pipeline, so it is registered
+    separately from __default__: kedro run --pipeline parallel
+    """
+    return pipeline(
+        [
+            node(
+                func = schedule_week_parallel,
+                inputs = ["center_hours", "staff_child", "absences", "roles",
+                          "previous_solution", "parameters"],
+                outputs = [*(f"d{d}.solution_excel" for d in range(1, 6)),
+                           *(f"d{d}.solution_long" for d in range(1, 6)),
+                           *(f"d{d}.solver_metrics" for d in range(1, 6))],
+            ),
+        ]
+    )
@@ -9,4 +9,11 @@ def combine_outputs(df1, df2, df3, df4, df5):
     Combine the outputs of the 5 models into a single DataFrame.
     """
     # Concatenate the DataFrames
-    return pd.concat([df1, df2, df3, df4, df5], ignore_index=True)
\ No newline at end of file
+    return pd.concat([df1, df2, df3, df4, df5], ignore_index=True)
+
+def combine_solver_metrics(*day_metrics: dict) -> pd.DataFrame:
+    """
+    Flatten each day's solver_metrics into one row, nested keys joined with
+    dots (e.g. build_step_s.lunch, child_hours.tech).
+    """
+    return pd.json_normalize(list(day_metrics))
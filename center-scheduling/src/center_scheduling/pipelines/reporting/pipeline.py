@@ -11,5 +11,10 @@ def create_pipeline() -> Pipeline:
                 inputs = [f"d{d}.solution_excel" for d in range(1, 6)],
                 outputs = "solution_excel",
             ),
+            node(
+                func = combine_solver_metrics,
+                inputs = [f"d{d}.solver_metrics" for d in range(1, 6)],
+                outputs = "solver_metrics",
+            ),
         ]
     )
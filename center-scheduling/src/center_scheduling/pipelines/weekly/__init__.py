@@ -0,0 +1,3 @@
+"""Weekly pipeline: day subproblems coordinated on weekly rules by a Lagrangian master"""
+
+from .pipeline import create_pipeline  # NOQA
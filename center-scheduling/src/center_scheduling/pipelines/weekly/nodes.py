@@ -0,0 +1,282 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel, value
+
+from center_scheduling.pipelines.data_science.nodes import (
+    add_heuristic_start,
+    build_day_model,
+    solution_long,
+    solution_wide,
+    solve,
+    solver_metrics,
+)
+from center_scheduling.pipelines.data_science.nodes.expressions import linear_sum
+from center_scheduling.pipelines.data_science.nodes.objective import (
+    CHILD_2_STAFF_PENALTY,
+    SWITCH_PENALTY,
+)
+from center_scheduling.pipelines.data_science.nodes.setup import _clean_names
+from center_scheduling.pipelines.data_science.nodes.times import BLOCK_MINUTES, _blocks_per_hour
+from center_scheduling.pipelines.data_science.nodes.warm_start import _set_start
+from center_scheduling.pipelines.parallel.nodes import DAY_KEYS, _solver_threads
+
+logger = logging.getLogger(__name__)
+
+
+def _position_prices(model: ConcreteModel, tech_prices: dict, pair_prices: dict) -> np.ndarray:
+    """
+    Price of each X (aligned with INDEX_DF) under the weekly multipliers.
+    """
+    staff = model.INDEX_DF["Staff"].astype(str)
+    child = model.INDEX_DF["Child"].astype(str)
+    prices = staff.map(tech_prices).fillna(0).to_numpy(dtype=float)
+    if pair_prices:
+        pairs = pd.Series(pair_prices, dtype=float)
+        prices += pairs.reindex(pd.MultiIndex.from_arrays([child, staff])).fillna(0).to_numpy()
+    return prices
+
+
+def solve_day_subproblem(sheets: dict,
+                         day: str,
+                         params: dict,
+                         solver_options: dict,
+                         tech_prices: dict,
+                         pair_prices: dict,
+                         start: pd.DataFrame = None) -> dict:
+    """
+    Build and solve one day with the weekly prices subtracted from the
+    objective, in the current process.
+
+    The prices only change the objective, so the day's schedule from the
+    previous round (start) is still feasible and is passed as the MIP start.
+    Without one, the heuristic schedule is, if params say so.
+
+    Returns:
+        dict: day, the day's time blocks, the long solution, the priced
+            objective value, the solver's bound on it (None if the backend
+            doesn't report one) and the solver metrics (with the priced
+            objective and bound).
+    """
+    model = build_day_model(sheets["center_hours"], sheets["staff_child"],
+                            sheets["absences"], sheets["roles"], day, params)
+    model.WARM_START = None
+    if start is not None and len(start):
+        model.WARM_START = _set_start(
+            model, start[["Block", "Child", "Staff"]].rename(columns={"Block": "Time Block"}))
+    model = add_heuristic_start(model, params["reward_for_child_staff_role"],
+                                params.get("heuristic_start", False))
+    prices = _position_prices(model, tech_prices, pair_prices)
+    priced = np.flatnonzero(prices)
+    if len(priced):
+        model.objective.expr = model.objective.expr - linear_sum(
+            [model.X_LIST[p] for p in priced], prices[priced])
+    model = solve(model, solver_options)
+    metrics = solver_metrics(model)
+    return {
+        "day": day,
+        "time_blocks": model.TIME_BLOCKS,
+        "long": solution_long(model),
+        "priced_objective": value(model.objective),
+        "priced_bound": metrics["bound"],
+        "metrics": metrics,
+    }
+
+
+def _day_objective(long: pd.DataFrame, time_blocks: range, staff_reward: pd.Series) -> float:
+    """
+    The day model's objective for a long solution, with the indicators at
+    their smallest feasible values: role rewards, minus 1 per (block, child)
+    with two staff, minus 0.1 per (block, staff) whose child changes next block.
+    """
+    reward = staff_reward.reindex(long.Staff, fill_value=0).sum()
+    two_staff = (long.groupby(["Block", "Child"]).size() > 1).sum()
+    children = (
+        long.pivot(index="Block", columns="Staff", values="Child")
+        .reindex(time_blocks)
+        .fillna("")
+    )
+    switches = (children.iloc[:-1].to_numpy() != children.iloc[1:].to_numpy()).sum()
+    return float(reward - CHILD_2_STAFF_PENALTY * two_staff - SWITCH_PENALTY * switches)
+
+
+def _trim_to_budgets(week: pd.DataFrame, techs: list[str], tech_budget: float,
+                     pair_budget: float) -> pd.DataFrame:
+    """
+    Drop the latest assignments of every pair and tech over its weekly budget.
+    The day constraints are all upper bounds on X, so each day stays feasible.
+
+    Args:
+        week (pd.DataFrame): Long solutions for the week, with a Day Order column.
+    """
+    week = week.sort_values(["Day Order", "Block"], ascending=False)
+    if pair_budget is not None:
+        latest_first = week.groupby(["Child", "Staff"]).cumcount()
+        used = week.groupby(["Child", "Staff"])["Block"].transform("size")
+        week = week[latest_first >= used - pair_budget]
+    if tech_budget is not None:
+        latest_first = week.groupby("Staff").cumcount()
+        used = week.groupby("Staff")["Block"].transform("size")
+        week = week[~week.Staff.isin(techs) | (latest_first >= used - tech_budget)]
+    return week.sort_values(["Day Order", "Block", "Staff"])
+
+
+def schedule_week_lagrangian(center_hours: pd.DataFrame,
+                             staff_child: pd.DataFrame,
+                             absences: pd.DataFrame,
+                             roles: pd.DataFrame,
+                             params: dict) -> tuple[pd.DataFrame, ...]:
+    """
+    Schedule the week under the weekly rules by Lagrangian decomposition.
+
+    Weekly rules couple the days: a cap on each tech's hours over the week, and
+    a cap on the hours any one staff member spends with a child over the week.
+    They are relaxed with Lagrange multipliers (prices per block), so each day
+    stays a separate MIP with a priced objective, solved in parallel. Each
+    round's week is trimmed to the budgets, which gives a feasible week; the
+    best one is kept. A subgradient master then updates the prices from the
+    week's usage, with a Polyak step scaled by the gap to the best week. It
+    stops when the best week is within tolerance of the Lagrangian bound,
+    after max_iterations, or once a round ends past time_limit seconds.
+    Each day starts from its schedule in the previous round, and its solve is
+    capped by the solver settings under weekly (e.g. a time_limit per day).
+
+    The days are only solved to the solver's gap, so the bound sums each
+    day's MIP dual bound, not its schedule's objective. If the backend
+    doesn't report a day's bound, that round has no bound: its priced
+    schedules only estimate one for the step, and the gap isn't known.
+
+    Args:
+        center_hours, staff_child, absences, roles (pd.DataFrame): The input sheets.
+        params (dict): The project parameters, including weekly.
+
+    Returns:
+        tuple[pd.DataFrame, ...]: The wide solution for each day, the long
+            solution for each day, the solver metrics of each day's subproblem
+            in the round that gave the best week (before trimming), and one row
+            per master iteration with the round's Lagrangian value and whether
+            it is a bound, the best bound and week found so far and their gap,
+            the violation before trimming and the time spent in the master and
+            in the day subproblems.
+    """
+    weekly = params["weekly"]
+    days = [params[key] for key in DAY_KEYS]
+    sheets = {"center_hours": center_hours, "staff_child": staff_child,
+              "absences": absences, "roles": roles}
+    techs = list(_clean_names(roles.Name[roles.Role.str.strip().str.lower() == "tech"]))
+    blocks_per_hour = _blocks_per_hour(params.get("block_minutes", BLOCK_MINUTES))
+    tech_budget = (None if weekly["tech_hours_cap"] is None
+                   else weekly["tech_hours_cap"] * blocks_per_hour)
+    pair_budget = (None if weekly["child_staff_hours_cap"] is None
+                   else weekly["child_staff_hours_cap"] * blocks_per_hour)
+    rewards = {role.lower(): reward
+               for role, reward in params["reward_for_child_staff_role"].items()}
+    staff_reward = (roles.Role.str.lower().map(rewards).fillna(0)
+                    .groupby(_clean_names(roles.Name)).sum())
+
+    workers = min(weekly["workers"], len(days))
+    solver_options = {
+        **params["solver"],
+        **(weekly.get("solver") or {}),
+        "threads": _solver_threads(params["solver"]["threads"], workers),
+        "tee": False,
+    }
+    deadline = (np.inf if weekly.get("time_limit") is None
+                else time.perf_counter() + weekly["time_limit"])
+
+    tech_prices, pair_prices = {}, {}
+    starts = [None] * len(days)
+    theta = weekly["step_size"]
+    best, best_objective, bound, last_dual = None, -np.inf, np.inf, np.inf
+    iterations = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for iteration in range(1, weekly["max_iterations"] + 1):
+            start = time.perf_counter()
+            futures = [
+                pool.submit(solve_day_subproblem, sheets, day, params, solver_options,
+                            tech_prices, pair_prices, start)
+                for day, start in zip(days, starts)
+            ]
+            results = [f.result() for f in futures]
+            starts = [r["long"] for r in results]
+            subproblem_s = time.perf_counter() - start
+
+            master_start = time.perf_counter()
+            week = pd.concat([r["long"].assign(**{"Day Order": i})
+                              for i, r in enumerate(results)])
+            tech_excess = pair_excess = pd.Series(dtype=float)
+            if tech_budget is not None:
+                tech_excess = week.groupby("Staff").size().reindex(techs, fill_value=0) - tech_budget
+            if pair_budget is not None:
+                pair_usage = week.groupby(["Child", "Staff"]).size()
+                # Priced pairs that went unused this round still need a step down
+                unused = [k for k in pair_prices if k not in pair_usage.index]
+                pair_excess = pd.concat([
+                    pair_usage, pd.Series(0, index=pd.Index(unused, tupleize_cols=False)),
+                ]) - pair_budget
+
+            # Lagrangian bound: the bounds on the priced day optima plus the
+            # priced budgets. Without every day's bound, an estimate from the
+            # priced schedules that only steers the step.
+            is_bound = all(r["priced_bound"] is not None for r in results)
+            dual = (sum(r["priced_bound"] if is_bound else r["priced_objective"]
+                        for r in results)
+                    + sum(tech_prices.values()) * (tech_budget or 0)
+                    + sum(pair_prices.values()) * (pair_budget or 0))
+            if dual >= (bound if is_bound else last_dual):
+                theta /= 2
+            last_dual = dual
+            if is_bound:
+                bound = min(bound, dual)
+
+            trimmed = _trim_to_budgets(week, techs, tech_budget, pair_budget)
+            objective = sum(
+                _day_objective(trimmed[trimmed["Day Order"] == i], r["time_blocks"], staff_reward)
+                for i, r in enumerate(results)
+            )
+            if objective > best_objective:
+                best, best_objective = trimmed, objective
+                best_metrics = [{**r["metrics"], "weekly_iteration": iteration} for r in results]
+
+            # Polyak subgradient step towards the best week, prices kept non-negative
+            moving = pd.concat([
+                tech_excess[(tech_excess > 0) | (tech_excess.index.map(tech_prices.get) > 0)],
+                pair_excess[(pair_excess > 0) | (pair_excess.index.map(pair_prices.get) > 0)],
+            ])
+            step = theta * (dual - best_objective) / max((moving ** 2).sum(), 1)
+            tech_prices = {k: max(0.0, tech_prices.get(k, 0.0) + step * g)
+                           for k, g in tech_excess.items()}
+            pair_prices = {k: max(0.0, pair_prices.get(k, 0.0) + step * g)
+                           for k, g in pair_excess.items()}
+            pair_prices = {k: p for k, p in pair_prices.items() if p > 0}
+
+            gap = (bound - best_objective) / abs(bound) if np.isfinite(bound) else None
+            iterations.append({
+                "iteration": iteration, "dual": dual, "dual_is_bound": is_bound,
+                "bound": bound if np.isfinite(bound) else None, "objective": objective,
+                "best_objective": best_objective,
+                "violation_blocks": float(tech_excess.clip(lower=0).sum()
+                                          + pair_excess.clip(lower=0).sum()),
+                "gap": gap,
+                "master_s": time.perf_counter() - master_start,
+                "subproblem_s": subproblem_s,
+            })
+            logger.info("Weekly iteration %s", iterations[-1])
+            if gap is not None and gap <= weekly["tolerance"]:
+                break
+            if time.perf_counter() > deadline:
+                logger.warning("Weekly decomposition stopped on its time limit after "
+                               "%d iterations, gap %s", iteration, gap)
+                break
+
+    report = pd.DataFrame(iterations)
+    logger.info("Weekly decomposition: %d master iterations, %.1fs in the master, "
+                "%.1fs in day subproblems, objective %.1f, bound %s",
+                len(report), report.master_s.sum(), report.subproblem_s.sum(),
+                best_objective, f"{bound:.1f}" if np.isfinite(bound) else "unknown")
+    longs = [best[best["Day Order"] == i].drop(columns="Day Order").reset_index(drop=True)
+             for i in range(len(days))]
+    return (*(solution_wide(long) for long in longs), *longs, *best_metrics, report)
@@ -0,0 +1,23 @@
+from kedro.pipeline import Pipeline, node, pipeline
+
+from .nodes import *
+
+def create_pipeline(**kwargs) -> Pipeline:
+    """
+    Schedule the week under the weekly rules in parameters (weekly), with the
+    days solved in parallel as Lagrangian subproblems. Produces the same
+    per-day solutions as the data science pipeline, so it is registered
+    separately from __default__: kedro run --pipeline weekly
+    """
+    return pipeline(
+        [
+            node(
+                func = schedule_week_lagrangian,
+                inputs = ["center_hours", "staff_child", "absences", "roles", "parameters"],
+                outputs = [*(f"d{d}.solution_excel" for d in range(1, 6)),
+                           *(f"d{d}.solution_long" for d in range(1, 6)),
+                           *(f"d{d}.solver_metrics" for d in range(1, 6)),
+                           "weekly_iterations"],
+            ),
+        ]
+    )
@@ -0,0 +1,178 @@
+"""Incremental re-solves for what-if edits to one day's schedule.
+
+Build and solve a day once, then apply absence deltas ("Mario is out after
+14:00", "red arrives late") as variable bound changes on the same model. With
+the highs backend the solver is persistent, so only the changed bounds are
+sent to it; any other backend re-solves the edited model from scratch. Either
+way each re-solve is warm-started from the previous schedule.
+
+    session = WhatIfSession.from_inputs(center_hours, staff_child, absences, roles,
+                                        "Mon", params)
+    schedule = session.solve()
+    schedule = session.apply(pd.DataFrame({
+        "Name": ["Mario"], "Day": ["Mon"], "Start": ["14:00"], "End": [None],
+        "Type": ["pto"],
+    }))
+"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel, value
+
+from center_scheduling.pipelines.data_science.nodes import (
+    build_day_model,
+    print_solution,
+    set_indicator_values,
+)
+from center_scheduling.pipelines.data_science.nodes.availability import (
+    _unavailable_intervals,
+    _unavailable_positions,
+)
+from center_scheduling.pipelines.data_science.nodes.backends import WarmStartHighs, run_backend
+from center_scheduling.pipelines.data_science.nodes.setup import _clean_absences
+from center_scheduling.pipelines.data_science.nodes.times import (
+    absence_blocks,
+    format_time_errors,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WhatIfSession:
+    """
+    Keeps one day's model, and with the highs backend a persistent solver,
+    alive between edits.
+
+    Args:
+        model (ConcreteModel): A built model, e.g. from build_day_model.
+        constraint_on_off (dict): Constraint switches, used to interpret absences.
+        solver_options (dict): backend, gap, threads and tee, as in the solver
+            parameters, plus an optional time_limit in seconds for each
+            re-solve. Defaults to the highs backend.
+    """
+
+    def __init__(self, model: ConcreteModel, constraint_on_off: dict,
+                 solver_options: dict = None):
+        solver_options = {"backend": "highs", "tee": False, **(solver_options or {})}
+        self.model = model
+        self.constraint_on_off = constraint_on_off
+        self.solver_options = solver_options
+        self.solver = None
+        if solver_options["backend"] == "highs":
+            self.solver = WarmStartHighs()
+            self.solver.config.mip_gap = solver_options.get("gap", 0.01)
+            self.solver.config.stream_solver = solver_options["tee"]
+            self.solver.config.load_solution = False
+            self.solver.highs_options["threads"] = solver_options.get("threads", 4)
+            # A what-if answer is often wanted quickly rather than proven optimal
+            self.solver.config.time_limit = solver_options.get("time_limit")
+        else:
+            logger.info("What-if edits re-solve from scratch with the %s backend; "
+                        "highs re-solves incrementally", solver_options["backend"])
+        # INDEX_DF positions blocked by what-if absences
+        self.blocked = np.array([], dtype=int)
+        self.history = []
+
+    @classmethod
+    def from_inputs(cls, center_hours: pd.DataFrame, staff_child: pd.DataFrame,
+                    absences: pd.DataFrame, roles: pd.DataFrame, day: str,
+                    params: dict) -> "WhatIfSession":
+        # Variables pruned at setup couldn't be unblocked by a later edit
+        params = {**params, "prune_variables": False}
+        model = build_day_model(center_hours, staff_child, absences, roles, day, params)
+        return cls(model, params["constraint_on_off"], params.get("solver"))
+
+    def solve(self) -> pd.DataFrame:
+        """
+        Re-solve the model as it stands and return the schedule.
+
+        Returns:
+            pd.DataFrame: The schedule, in print_solution's format.
+        """
+        start = time.perf_counter()
+        if self.solver is None:
+            termination = self._solve_from_scratch()
+        else:
+            results = self.solver.solve(self.model)
+            termination = results.termination_condition.name
+            if results.best_feasible_objective is None:
+                raise RuntimeError(f"No schedule found: {termination}")
+            results.solution_loader.load_vars()
+        # Keep the indicators in step with X so the next warm start is feasible
+        set_indicator_values(self.model)
+        self.history.append({
+            "blocked": len(self.blocked),
+            "termination": termination,
+            "objective": value(self.model.objective),
+            "solve_s": time.perf_counter() - start,
+        })
+        logger.info("What-if solve: %s", self.history[-1])
+        return print_solution(self.model)
+
+    def _solve_from_scratch(self) -> str:
+        """
+        Solve with a non-persistent backend, warm-started from the previous
+        schedule (if any) with the blocked assignments dropped from it.
+        """
+        if self.history:
+            for pos in self.blocked:
+                self.model.X_LIST[pos].set_value(0)
+            set_indicator_values(self.model)
+            self.model.WARM_START = {"source": "what-if"}
+        stats = run_backend(self.model, self.solver_options)
+        if stats["objective"] is None:
+            raise RuntimeError(f"No schedule found: {stats['termination']}")
+        return stats["termination"]
+
+    def apply(self, absences: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add absences (same columns as the absences sheet) and re-solve.
+
+        Variables in the new absences get an upper bound of 0; everything
+        else about the model and the solver stays as it was.
+
+        Args:
+            absences (pd.DataFrame): Name, Day, Start, End and Type.
+
+        Returns:
+            pd.DataFrame: The new schedule, in print_solution's format.
+
+        Raises:
+            ValueError: If a Start or End can't be read.
+        """
+        absences, errors = absence_blocks(_clean_absences(absences, self.model.DAY),
+                                          self.model.TIME_BLOCKS, self.model.BLOCKS_PER_HOUR)
+        if len(errors):
+            raise ValueError(f"What-if times can't be read:\n{format_time_errors(errors)}")
+        intervals = _unavailable_intervals(self.model, self.constraint_on_off,
+                                           absences=absences)
+        positions = _unavailable_positions(self.model.INDEX_DF, intervals)
+        for pos in positions:
+            self.model.X_LIST[pos].setub(0)
+        self.blocked = np.union1d(self.blocked, positions)
+
+        # Warm start from the previous schedule of everyone the edit doesn't touch
+        index_df = self.model.INDEX_DF
+        touched = (index_df["Staff"].isin(intervals["Name"])
+                   | index_df["Child"].isin(intervals["Name"]))
+        if intervals["Applies"].isna().any():
+            touched[:] = True
+        if self.solver is None:
+            return self.solve()
+        self.solver.start_vars = [self.model.X_LIST[pos] for pos in np.flatnonzero(~touched)]
+        try:
+            return self.solve()
+        finally:
+            self.solver.start_vars = None
+
+    def reset(self) -> pd.DataFrame:
+        """
+        Undo every what-if absence and re-solve.
+        """
+        for pos in self.blocked:
+            self.model.X_LIST[pos].setub(1)
+        self.blocked = np.array([], dtype=int)
+        return self.solve()
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+from pyomo.environ import SolverFactory
+
+PARAMETERS = Path(__file__).parents[2] / "conf" / "base" / "parameters.yml"
+
+requires_cbc = pytest.mark.skipif(not SolverFactory("cbc").available(exception_flag=False),
+                                  reason="CBC is not installed")
+
+
+@pytest.fixture
+def params() -> dict:
+    """
+    The project parameters, with the solver quiet and the cache off.
+    """
+    with open(PARAMETERS) as f:
+        params = yaml.safe_load(f)
+    params["solver"] = {**params["solver"], "threads": 1, "tee": False}
+    params["cache"] = {**params["cache"], "enabled": False}
+    return params
+
+
+@pytest.fixture
+def sheets() -> dict[str, pd.DataFrame]:
+    """
+    A small center, open 9:00-12:00 on Monday, as WorkbookDataset loads it.
+    """
+    return {
+        "center_hours": pd.DataFrame({"Day": ["Mon"], "Open": [9.0], "Close": [12.0]}),
+        "staff_child": pd.DataFrame({
+            "Child": ["red", "blue", "green"],
+            "Mario": ["x", "x", None],
+            "Luigi": [None, "x", "x"],
+            "Peach": ["x", None, "x"],
+        }),
+        "absences": pd.DataFrame({
+            "Name": ["red"], "Day": ["Mon"], "Start": [np.nan], "End": [10.0],
+            "Type": ["late arrival"], "Occurrence": ["weekly"],
+        }),
+        "roles": pd.DataFrame({"Name": ["Mario", "Luigi", "Peach"],
+                               "Role": ["Tech", "Tech", "SBT"]}),
+    }
@@ -0,0 +1,158 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from pyomo.environ import value
+
+from center_scheduling.pipelines.data_science.nodes import (
+    add_heuristic_start,
+    build_day_model,
+    solve,
+)
+from center_scheduling.pipelines.data_science.nodes.backends import (
+    SOLVER_BACKENDS,
+    SolverEvents,
+    _CbcLogStream,
+)
+
+from .conftest import requires_cbc
+
+# The module, which the package's solve function shadows
+solve_module = importlib.import_module("center_scheduling.pipelines.data_science.nodes.solve")
+
+# Lines of the CBC log of a maximized day that solved at the root, as CBC
+# writes them: incumbents negated, the root LP bound in the model's sense
+CBC_ROOT_LOG = """\
+Continuous objective value is 142.5 - 0.10 seconds
+Cgl0004I processed model has 1617 rows, 1628 columns (1628 integer (1628 of which binary)) and 8813 elements
+Cbc0038I Initial state - 8 integers unsatisfied sum - 2.5
+Cbc0012I Integer solution of -142.5 found by feasibility pump after 0 iterations and 0 nodes (0.16 seconds)
+Cbc0001I Search completed - best objective -142.5, took 0 iterations and 0 nodes (0.17 seconds)
+
+Result - Optimal solution found
+
+Objective value:                142.50000000
+Enumerated nodes:               0
+Total iterations:               0
+"""
+
+# ... and of one that branched, with a MIP start and a final bound
+CBC_SEARCH_LOG = """\
+MIPStart provided solution with cost 300.2
+Continuous objective value is 311.409 - 3.52 seconds
+Cgl0004I processed model has 3786 rows, 3591 columns (3591 integer (3591 of which binary)) and 20947 elements
+Cbc0012I Integer solution of -310.9 found by feasibility pump after 0 iterations and 0 nodes (16.48 seconds)
+Cbc0010I After 100 nodes, 12 on tree, -310.9 best solution, best possible -311.238 (20.03 seconds)
+
+Result - Stopped on time limit
+
+Objective value:                310.90000000
+Upper bound:                    311.238
+Enumerated nodes:               100
+"""
+
+
+def _day(sheets: dict, params: dict):
+    return build_day_model(sheets["center_hours"], sheets["staff_child"],
+                           sheets["absences"], sheets["roles"], "Mon", params)
+
+
+@pytest.fixture
+def large_sheets() -> dict[str, pd.DataFrame]:
+    """
+    A center open all day, too large for CBC to prove within a fraction of a second.
+    """
+    rng = np.random.default_rng(1)
+    children = [f"child {i}" for i in range(30)]
+    techs = [f"Tech {i}" for i in range(10)]
+    allowed = rng.random((len(children), len(techs))) < 0.4
+    allowed[np.arange(len(children)), rng.integers(0, len(techs), len(children))] = True
+    staff_child = pd.DataFrame(np.where(allowed, "x", None), columns=techs)
+    staff_child.insert(0, "Child", children)
+    return {
+        "center_hours": pd.DataFrame({"Day": ["Mon"], "Open": ["8:30"], "Close": ["16:30"]}),
+        "staff_child": staff_child,
+        "absences": pd.DataFrame(columns=["Name", "Day", "Start", "End", "Type", "Occurrence"]),
+        "roles": pd.DataFrame({"Name": techs + ["SBT 1", "TS 1"],
+                               "Role": ["Tech"] * len(techs) + ["SBT", "TS"]}),
+    }
+
+
+def _log(text: str, sign: float = -1) -> tuple[SolverEvents, _CbcLogStream]:
+    events = SolverEvents("Mon", "cbc")
+    stream = _CbcLogStream(events, sign, tee=False)
+    # CBC writes its log in blocks that split lines
+    for start in range(0, len(text), 50):
+        stream.write(text[start:start + 50])
+    return events, stream
+
+
+def test_cbc_log_of_a_root_solve():
+    events, stream = _log(CBC_ROOT_LOG)
+    assert [(e["event"], e["elapsed_s"], e["objective"], e["bound"]) for e in events.incumbents] \
+        == [("incumbent", 0.16, 142.5, 142.5)]
+    assert events.incumbents[0]["gap"] == 0
+    # No final bound in the log, so the root one stands
+    assert stream.summary == {"presolved_rows": 1617, "presolved_columns": 1628,
+                              "nodes": 0, "bound": 142.5}
+
+
+def test_cbc_log_of_a_search():
+    seen = []
+    events = SolverEvents("Mon", "cbc", on_event=seen.append)
+    stream = _CbcLogStream(events, -1, tee=False)
+    stream.write(CBC_SEARCH_LOG)
+    # The MIP start shows unsigned and before the root bound
+    assert [e["objective"] for e in events.incumbents] == [-300.2, 310.9]
+    assert [e["event"] for e in seen] == ["incumbent", "bound", "incumbent", "bound"]
+    assert seen[-1]["elapsed_s"] == 20.03
+    assert seen[-1]["bound"] == pytest.approx(311.238)
+    assert seen[-1]["gap"] == pytest.approx((311.238 - 310.9) / 310.9)
+    assert stream.summary == {"presolved_rows": 3786, "presolved_columns": 3591,
+                              "nodes": 100, "bound": 311.238}
+
+
+def test_cbc_log_skips_a_repeated_mip_start():
+    events, _ = _log("MIPStart provided solution with cost 5\n"
+                     "Cbc0012I Integer solution of 5 found by heuristic after 0 iterations "
+                     "and 0 nodes (0.01 seconds)\n", sign=1)
+    assert len(events.incumbents) == 1
+
+
+@requires_cbc
+@pytest.mark.parametrize("backend", sorted(SOLVER_BACKENDS))
+def test_every_backend_finds_the_optimum(sheets, params, backend):
+    if backend == "highs":
+        pytest.importorskip("highspy")
+    expected = solve(_day(sheets, params), {**params["solver"], "backend": "cbc"})
+    model = solve(_day(sheets, params), {**params["solver"], "backend": backend, "gap": 0.0})
+    assert model.SOLVER_STATS["backend"] == backend
+    assert "fallback" not in model.SOLVER_STATS
+    assert model.SOLVER_STATS["objective"] == pytest.approx(expected.SOLVER_STATS["objective"])
+    assert value(model.objective) == pytest.approx(model.SOLVER_STATS["objective"])
+
+
+@requires_cbc
+def test_time_limit_keeps_the_best_incumbent(large_sheets, params):
+    model = _day(large_sheets, params)
+    model.WARM_START = None
+    model = add_heuristic_start(model, params["reward_for_child_staff_role"], True)
+    model = solve(model, {**params["solver"], "gap": 0.0, "time_limit": 0.01})
+    assert model.SOLVER_STATS["termination"] == "maxTimeLimit"
+    assert "fallback" not in model.SOLVER_STATS
+    assert model.SOLVER_STATS["objective"] >= model.HEURISTIC_STATS["objective"] - 1e-6
+    assert value(model.objective) == pytest.approx(model.SOLVER_STATS["objective"])
+
+
+def test_solve_falls_back_to_the_heuristic(sheets, params, monkeypatch):
+    def no_schedule(model, solver_options=None):
+        return {"backend": "cbc", "termination": "maxTimeLimit", "objective": None,
+                "incumbents": []}
+
+    monkeypatch.setattr(solve_module, "run_backend", no_schedule)
+    model = solve(_day(sheets, params), params["solver"])
+    assert model.SOLVER_STATS["fallback"] == "heuristic"
+    assert model.SOLVER_STATS["objective"] == model.HEURISTIC_STATS["objective"]
+    assert model.SOLVER_STATS["objective"] == pytest.approx(value(model.objective))
+    assert model.SOLVER_STATS["objective"] > 0
@@ -0,0 +1,148 @@
+import importlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from center_scheduling.cache import SolutionCache, cache_key
+from center_scheduling.pipelines.data_science.nodes import (
+    build_day_model,
+    lookup_cached_solution,
+    solution_long,
+    solve,
+    solver_metrics,
+)
+from center_scheduling.pipelines.data_science.nodes.solve import _solution_cache_key
+
+from .conftest import requires_cbc
+
+# The module, which the package's solve function shadows
+solve_module = importlib.import_module("center_scheduling.pipelines.data_science.nodes.solve")
+
+
+def _day(sheets: dict, params: dict, **kwargs):
+    return build_day_model(sheets["center_hours"], sheets["staff_child"],
+                           sheets["absences"], sheets["roles"], "Mon", params, **kwargs)
+
+
+def test_cache_key_ignores_dict_order_and_index():
+    frame = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    key = cache_key({"f": frame, "g": frame}, {"x": 1, "y": {"z": 2}})
+    assert key == cache_key({"g": frame, "f": frame.set_index(pd.Index([5, 6]))},
+                            {"y": {"z": 2}, "x": 1})
+    assert key != cache_key({"f": frame, "g": frame.assign(a=[1, 3])}, {"x": 1, "y": {"z": 2}})
+    assert key != cache_key({"f": frame, "g": frame}, {"x": 2, "y": {"z": 2}})
+
+
+def test_get_and_put(tmp_path):
+    cache = SolutionCache(tmp_path / "cache")
+    assert cache.get("missing") is None
+    cache.put("abc", {"day": "Mon", "stats": {"objective": 1.5}})
+    assert cache.get("abc")["stats"] == {"objective": 1.5}
+    (tmp_path / "cache" / "bad.json").write_text("{not json")
+    assert cache.get("bad") is None
+    assert set(cache.entries().key) == {"abc", "bad"}
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = SolutionCache(tmp_path)
+    entry = {"day": "Mon", "solution": {"Block": list(range(100))}}
+    cache.put("a", entry)
+    cache.max_bytes = 2.5 * (tmp_path / "a.json").stat().st_size
+    cache.put("b", entry)
+    os.utime(tmp_path / "a.json", (1000, 1000))
+    os.utime(tmp_path / "b.json", (2000, 2000))
+    # Reading a makes b the least recently used
+    assert cache.get("a") is not None
+    cache.put("c", entry)
+    assert sorted(f.stem for f in tmp_path.glob("*.json")) == ["a", "c"]
+
+
+def test_purge(tmp_path):
+    cache = SolutionCache(tmp_path)
+    for key in ["aa1", "aa2", "bb1", "cc1"]:
+        cache.put(key, {"day": "Mon"})
+    os.utime(tmp_path / "cc1.json", (1000, 1000))
+    assert sorted(cache.purge(["aa"])) == ["aa1", "aa2"]
+    assert cache.purge(older_than_days=1) == ["cc1"]
+    assert cache.purge() == ["bb1"]
+    assert cache.entries().empty
+
+
+def _cached_day(sheets: dict, params: dict, allowed: pd.DataFrame = None):
+    cached = lookup_cached_solution(sheets["center_hours"], sheets["staff_child"],
+                                    sheets["absences"], sheets["roles"], allowed, "Mon", params)
+    return _day(sheets, params, allowed=allowed, cached=cached)
+
+
+def _key(sheets: dict, params: dict, solver_options: dict = None) -> str:
+    return _solution_cache_key(sheets["center_hours"], sheets["staff_child"], sheets["absences"],
+                               sheets["roles"], None, "Mon", params,
+                               solver_options or params["solver"])
+
+
+@requires_cbc
+def test_a_hit_skips_the_build_and_the_solve(tmp_path, sheets, params, monkeypatch):
+    params = {**params, "cache": {"enabled": True, "path": str(tmp_path), "max_mb": 10}}
+    solved = solve(_cached_day(sheets, params), params["solver"])
+    assert solved.SOLVER_STATS["cache"] == "miss"
+    stored = json.loads((tmp_path / f"{solved.SOLVER_STATS['cache_key']}.json").read_text())
+    assert stored["day"] == "Mon"
+
+    monkeypatch.setattr(solve_module, "run_backend", None)
+    hit = solve(_cached_day(sheets, params), params["solver"])
+    assert hit.SOLVER_STATS["cache"] == "hit"
+    assert hit.BUILD_STATS["steps"] == [] and hit.nconstraints() == 0
+    assert hit.SOLVER_STATS["objective"] == pytest.approx(solved.SOLVER_STATS["objective"])
+    pd.testing.assert_frame_equal(solution_long(hit), solution_long(solved))
+    metrics, expected = solver_metrics(hit), solver_metrics(solved)
+    for name in ["role_reward", "two_staff_penalty", "switch_penalty", "child_hours"]:
+        assert metrics[name] == pytest.approx(expected[name])
+
+
+@requires_cbc
+def test_restricted_model_misses_the_full_models_entry(tmp_path, sheets, params):
+    params = {**params, "cache": {"enabled": True, "path": str(tmp_path), "max_mb": 10}}
+    allowed = _day(sheets, params).INDEX_DF.iloc[::3][["Time Block", "Child", "Staff"]]
+    restricted = solve(_cached_day(sheets, params, allowed), params["solver"])
+    assert restricted.SOLVER_STATS["cache"] == "miss"
+
+    full = solve(_cached_day(sheets, params), params["solver"])
+    assert full.SOLVER_STATS["cache"] == "miss"
+    assert full.SOLVER_STATS["cache_key"] != restricted.SOLVER_STATS["cache_key"]
+    assert len(solution_long(full)) > len(solution_long(restricted))
+
+
+def test_cache_off_looks_nothing_up(sheets, params):
+    assert lookup_cached_solution(sheets["center_hours"], sheets["staff_child"],
+                                  sheets["absences"], sheets["roles"], None, "Mon", params) == {}
+
+
+@pytest.mark.parametrize("overrides", [
+    {"prune_variables": True},
+    {"block_minutes": 60},
+    {"reward_for_child_staff_role": {"tech": 2, "SBT": 0.8, "TS": 0.6, "SBA": 0.4, "OM": 0.2}},
+    {"formulation": {"switch": "pairwise"}},
+])
+def test_differently_built_models_have_different_keys(sheets, params, overrides):
+    params = {**params, "prune_variables": False}
+    key = _key(sheets, params)
+    assert key == _key(sheets, params)
+    assert _key(sheets, {**params, **overrides}) != key
+
+
+def test_only_the_days_inputs_change_the_key(sheets, params):
+    key = _key(sheets, params)
+    other_day = pd.DataFrame({"Name": ["blue"], "Day": ["Tue"], "Start": [np.nan],
+                              "End": [10.0], "Type": ["late arrival"], "Occurrence": ["weekly"]})
+    absences = pd.concat([sheets["absences"], other_day], ignore_index=True)
+    assert _key({**sheets, "absences": absences}, params) == key
+    assert _key({**sheets, "absences": absences.assign(Day="Mon")}, params) != key
+
+
+def test_solver_settings_change_the_key(sheets, params):
+    key = _key(sheets, params)
+    assert key == _key(sheets, params, {**params["solver"], "tee": True})
+    assert key != _key(sheets, params, {**params["solver"], "gap": 0.05})
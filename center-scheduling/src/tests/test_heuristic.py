@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from center_scheduling.pipelines.data_science.nodes import build_day_model, heuristic_schedule
+from center_scheduling.pipelines.data_science.nodes.heuristic import _Schedule
+
+
+@pytest.fixture
+def schedule() -> _Schedule:
+    """
+    A random schedule of 4 staff over 6 blocks, with every assignment available.
+    """
+    rng = np.random.default_rng(0)
+    n_staff, n_blocks, n_children = 4, 6, 3
+    position = np.arange(n_staff * n_blocks * n_children).reshape(n_staff, n_blocks, n_children)
+    schedule = _Schedule(position, reward=np.array([1.0, 1.0, 0.8, 0.6]))
+    for s in range(n_staff):
+        for b in range(n_blocks):
+            child = rng.integers(-1, n_children)
+            if schedule.allowed(s, b, child):
+                schedule.move(s, b, child)
+    return schedule
+
+
+def test_gain_is_the_change_in_objective(schedule):
+    n_staff, n_blocks, n_children = schedule.position.shape
+    for s in range(n_staff):
+        for b in range(n_blocks):
+            for c in range(-1, n_children):
+                if not schedule.allowed(s, b, c):
+                    continue
+                before, current = schedule.objective(), schedule.assign[s, b]
+                gain = schedule.gain(s, b, c)
+                schedule.move(s, b, c)
+                assert gain == pytest.approx(schedule.objective() - before)
+                schedule.move(s, b, current)
+
+
+def test_swap_gain_is_the_change_in_objective(schedule):
+    n_staff, n_blocks, _ = schedule.position.shape
+    swaps = 0
+    for b in range(n_blocks):
+        for s1 in range(n_staff):
+            for s2 in range(s1 + 1, n_staff):
+                a, c = schedule.assign[s1, b], schedule.assign[s2, b]
+                if a < 0 or c < 0 or a == c:
+                    continue
+                before, gain = schedule.objective(), schedule.swap_gain(s1, s2, b)
+                schedule.move(s1, b, c)
+                schedule.move(s2, b, a)
+                assert gain == pytest.approx(schedule.objective() - before)
+                schedule.move(s2, b, c)
+                schedule.move(s1, b, a)
+                swaps += 1
+    assert swaps
+
+
+def test_heuristic_schedule_is_feasible(sheets, params):
+    model = build_day_model(sheets["center_hours"], sheets["staff_child"],
+                            sheets["absences"], sheets["roles"], "Mon", params)
+    model = heuristic_schedule(model, params["reward_for_child_staff_role"])
+    assigned = model.INDEX_DF[[v.value > 0.5 for v in model.X_LIST]]
+    assert not assigned.duplicated(["Time Block", "Staff"]).any()
+    assert assigned.groupby(["Time Block", "Child"], observed=True).size().max() <= 2
+    assert all(not v.fixed or v.value == 0 for v in model.X_LIST)
+    assert model.HEURISTIC_STATS["objective"] >= model.HEURISTIC_STATS["constructed_objective"]
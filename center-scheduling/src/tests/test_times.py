@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from center_scheduling.pipelines.data_science.nodes.setup import _center_hours_blocks
+from center_scheduling.pipelines.data_science.nodes.times import (
+    absence_blocks,
+    format_time_errors,
+    parse_time_blocks,
+    parse_time_columns,
+)
+
+
+def test_parse_time_blocks():
+    times = pd.Series([12.5, "16", "14:30", "08:30:00", "2024-01-01 09:15:00", None, " ",
+                       "noon", "25:00", "9:75"])
+    blocks, bad = parse_time_blocks(times)
+    expected = [25, 32, 29, 17, 18, np.nan, np.nan, np.nan, np.nan, np.nan]
+    np.testing.assert_array_equal(blocks.to_numpy(), expected)
+    assert bad.tolist() == [False] * 7 + [True] * 3
+
+
+def test_parse_time_blocks_to_the_minute():
+    blocks, _ = parse_time_blocks(pd.Series([17 / 60, "9:17", 8.25]), blocks_per_hour=60)
+    assert blocks.tolist() == [17, 557, 495]
+
+
+def test_parse_time_columns_reports_bad_cells():
+    frame = pd.DataFrame({"Name": ["red", "blue", "green"], "Start": ["9:00", "noon", None],
+                          "End": [10.0, None, "25:00"]}, index=[3, 4, 5])
+    blocks, errors = parse_time_columns(frame, ["Start", "End"], "absences", "Name")
+    assert blocks.index.tolist() == [3, 4, 5]
+    assert blocks.loc[3].tolist() == [18, 20]
+    assert errors[["Row", "Name", "Column", "Value", "Problem"]].values.tolist() == [
+        [4, "blue", "Start", "noon", "unreadable"],
+        [5, "green", "End", "25:00", "unreadable"],
+    ]
+    assert format_time_errors(errors).splitlines() == [
+        "absences row 6 (blue): Start 'noon' is unreadable",
+        "absences row 7 (green): End '25:00' is unreadable",
+    ]
+
+
+def test_parse_time_columns_reports_blanks_if_required():
+    frame = pd.DataFrame({"Day": ["Mon", "Tue"], "Open": [8.5, None], "Close": [16.5, " "]})
+    _, errors = parse_time_columns(frame, ["Open", "Close"], "center_hours", "Day")
+    assert errors.empty
+    _, errors = parse_time_columns(frame, ["Open", "Close"], "center_hours", "Day",
+                                   required=True)
+    assert errors[["Name", "Column", "Problem"]].values.tolist() == [
+        ["Tue", "Open", "blank"], ["Tue", "Close", "blank"],
+    ]
+
+
+def test_blank_center_hours_raise():
+    center_hours = pd.DataFrame({"Day": ["Mon"], "Open": [None], "Close": [16.5]})
+    with pytest.raises(ValueError, match="center_hours row 2 \\(Mon\\): Open 'None' is blank"):
+        _center_hours_blocks(center_hours, 2)
+
+
+def test_absence_blocks():
+    absences = pd.DataFrame({
+        "Name": ["pink", "darkblue", "red", "blue"],
+        "Start": [None, 16, "13:00", "9:75"],
+        "End": [10.0, 11.5, None, None],
+        "Type": ["late arrival"] * 2 + ["leaves early"] * 2,
+    })
+    blocks, errors = absence_blocks(absences, range(17, 33))
+    # A blank start or end is the start or end of the day
+    assert blocks.Name.tolist() == ["pink", "red"]
+    assert blocks[["Start Block", "End Block"]].values.tolist() == [[17, 20], [26, 32]]
+    assert errors[["Name", "Column", "Problem"]].values.tolist() == [
+        ["blue", "Start", "unreadable"], ["darkblue", "Start", "after End"],
+    ]
+    assert "absences row 3 (darkblue): Start '16' is after End" in format_time_errors(errors)